@@ -0,0 +1,260 @@
+"""Pretests drawn from a subject's pool of vetted, calibrated questions.
+
+Pool items follow the three-parameter logistic IRT model: a learner of
+ability theta answers item (a, b, c) correctly with probability
+
+    c + (1 - c) / (1 + exp(-a * (theta - b)))
+
+where c is the chance of guessing one of four options. Abilities and item
+difficulties share the scale of question difficulty levels and mastery
+ratings (see mastery.py): a level-d question starts at b = d - 3 and a = 1
+until it is calibrated.
+
+A pretest starts at the prior mean, administers an unused item with high
+Fisher information at the current ability estimate, re-estimates the
+ability (expected a posteriori, standard normal prior) after every answer,
+and stops once the estimate's standard error is small enough. Each item
+comes from the topics asked least so far, drawn at random among the few
+most informative ones, so coverage stays balanced and learners do not all
+see the same opening questions. Draws are seeded by the pretest id and the
+answer count, so a pretest can be replayed.
+
+Until a pool is large enough to be adaptive, ``assemble_form`` draws a
+fixed form from it the same way: a seeded draw taking topics in turn.
+The pool is built offline (see build-pretest-pool.py), so starting a
+pretest never waits on Gemini.
+
+``calibrate`` re-estimates item parameters in batch from graded responses;
+see calibrate-items.py.
+
+Environment:
+    PRETEST_POOL_MIN    items a subject's pool needs before pretests become adaptive (default 20)
+    PRETEST_FORM_SIZE   questions on a fixed-form pretest (default 5)
+    PRETEST_TARGET_SE   standard error at which a pretest stops (default 0.6)
+    PRETEST_MIN_ITEMS   questions every adaptive pretest asks (default 3)
+    PRETEST_MAX_ITEMS   questions after which a pretest stops regardless (default 10)
+"""
+import math
+import os
+import random
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import mastery
+
+GUESSING = 0.25
+DEFAULT_DISCRIMINATION = 1.0
+MIN_DISCRIMINATION, MAX_DISCRIMINATION = 0.2, 3.0
+MIN_DIFFICULTY, MAX_DIFFICULTY = -4.0, 4.0
+# Ability grid for the posterior, with a standard normal prior
+GRID = [MIN_DIFFICULTY + i * 0.1 for i in range(81)]
+PRIOR = [math.exp(-theta * theta / 2) for theta in GRID]
+# Items are drawn at random among this many of the most informative
+RANDOMESQUE = 3
+
+
+def pool_min() -> int:
+    return int(os.getenv('PRETEST_POOL_MIN', '20'))
+
+
+def form_size() -> int:
+    return int(os.getenv('PRETEST_FORM_SIZE', '5'))
+
+
+def target_se() -> float:
+    return float(os.getenv('PRETEST_TARGET_SE', '0.6'))
+
+
+def min_items() -> int:
+    return int(os.getenv('PRETEST_MIN_ITEMS', '3'))
+
+
+def max_items() -> int:
+    return int(os.getenv('PRETEST_MAX_ITEMS', '10'))
+
+
+@dataclass(frozen=True)
+class Item:
+    id: str
+    a: float
+    b: float
+    c: float = GUESSING
+    topic: str = ''
+
+
+def item_from_doc(doc: Dict) -> Item:
+    """An item from a stored question; uncalibrated questions get parameters from their difficulty level"""
+    irt = doc.get('irt') or {}
+    return Item(
+        id=doc['id'],
+        a=irt.get('a', DEFAULT_DISCRIMINATION),
+        b=irt.get('b', mastery.difficulty_rating(doc.get('difficulty_level'))),
+        c=irt.get('c', GUESSING),
+        topic=doc.get('topic') or ''
+    )
+
+
+def selection_rng(pretest_id: str, answered: int) -> random.Random:
+    """The seeded generator choosing a pretest's item after ``answered`` answers"""
+    return random.Random(f"{pretest_id}:{answered}")
+
+
+def probability(theta: float, item: Item) -> float:
+    """Chance a learner of ability ``theta`` answers ``item`` correctly"""
+    return item.c + (1 - item.c) / (1 + math.exp(-item.a * (theta - item.b)))
+
+
+def information(theta: float, item: Item) -> float:
+    """Fisher information ``item`` gives about ability ``theta``"""
+    p = probability(theta, item)
+    return (item.a ** 2) * ((p - item.c) ** 2) / ((1 - item.c) ** 2) * (1 - p) / p
+
+
+def estimate(responses: Sequence[Tuple[Item, bool]]) -> Tuple[float, float]:
+    """Posterior mean ability and its standard deviation (the standard error) after ``responses``"""
+    weights = list(PRIOR)
+    for item, correct in responses:
+        for i, theta in enumerate(GRID):
+            p = probability(theta, item)
+            weights[i] *= p if correct else 1 - p
+    total = sum(weights)
+    mean = sum(w * theta for w, theta in zip(weights, GRID)) / total
+    variance = sum(w * (theta - mean) ** 2 for w, theta in zip(weights, GRID)) / total
+    return mean, math.sqrt(variance)
+
+
+def next_item(theta: float, items: Iterable[Item], administered: Set[str],
+              rng: Optional[random.Random] = None) -> Optional[Item]:
+    """An unused item from the least-asked topics that is informative at ``theta``.
+
+    Without ``rng`` this is the most informative such item."""
+    items = list(items)
+    candidates = [item for item in items if item.id not in administered]
+    if not candidates:
+        return None
+    asked = Counter(item.topic for item in items if item.id in administered)
+    fewest = min(asked[item.topic] for item in candidates)
+    candidates = [item for item in candidates if asked[item.topic] == fewest]
+    ranked = sorted(candidates, key=lambda item: information(theta, item), reverse=True)
+    return rng.choice(ranked[:RANDOMESQUE]) if rng else ranked[0]
+
+
+def finished(answered: int, standard_error: float) -> bool:
+    if answered >= max_items():
+        return True
+    return answered >= min_items() and standard_error <= target_se()
+
+
+def step(items: Dict[str, Item], responses: List[Dict],
+         rng: Optional[random.Random] = None) -> Tuple[float, float, Optional[Item]]:
+    """Ability estimate after graded ``responses`` and the item to ask next (None when done)"""
+    theta, standard_error = estimate([(items[r['question_id']], r['is_correct'])
+                                      for r in responses if r['question_id'] in items])
+    if finished(len(responses), standard_error):
+        return theta, standard_error, None
+    return theta, standard_error, next_item(theta, items.values(), {r['question_id'] for r in responses}, rng)
+
+
+def assemble_form(pool: List[Dict], size: int, seed: str) -> List[Dict]:
+    """A fixed form of ``size`` pool questions drawn with ``seed``, easiest first.
+
+    Topics are taken in turn (in a random order) so the form covers as many
+    as it can, each contributing a random question per turn. The same seed
+    draws the same form from a pool in whatever order the pool is given."""
+    rng = random.Random(seed)
+    by_topic = defaultdict(list)
+    for doc in pool:
+        by_topic[doc.get('topic') or ''].append(doc)
+    topics = sorted(by_topic)
+    rng.shuffle(topics)
+    # Pools come back in no particular order; the seed alone decides the draw
+    for topic in sorted(by_topic):
+        by_topic[topic].sort(key=lambda doc: doc['id'])
+        rng.shuffle(by_topic[topic])
+    form = []
+    while len(form) < size and any(by_topic.values()):
+        for topic in topics:
+            if by_topic[topic] and len(form) < size:
+                form.append(by_topic[topic].pop())
+    return sorted(form, key=lambda doc: doc.get('difficulty_level') or 0)
+
+
+def calibrate(attempts: Iterable[List[Tuple[str, bool]]], items: Dict[str, Item],
+              min_responses: int = 20, iterations: int = 10) -> Dict[str, Dict]:
+    """Re-estimate item parameters from graded attempts.
+
+    Each attempt is the (item id, correct) pairs of one pretest. Parameters
+    are fitted by marginal maximum likelihood with EM over the ability grid
+    (Bock-Aitkin): every iteration spreads each attempt over the grid by its
+    posterior, then takes Fisher scoring steps on each item's discrimination
+    and difficulty against the expected counts, with priors at the current
+    values so sparse items move little. Guessing stays fixed. Returns the new
+    parameters of items with at least ``min_responses`` responses."""
+    attempts = [[(item_id, correct) for item_id, correct in attempt if item_id in items] for attempt in attempts]
+    attempts = [attempt for attempt in attempts if attempt]
+    counts: Dict[str, int] = {}
+    for attempt in attempts:
+        for item_id, _ in attempt:
+            counts[item_id] = counts.get(item_id, 0) + 1
+    current = {item_id: item for item_id, item in items.items() if counts.get(item_id, 0) >= min_responses}
+    if not current:
+        return {}
+    priors = dict(current)
+
+    for _ in range(iterations):
+        model = {**items, **current}
+        curves = {item_id: [probability(theta, item) for theta in GRID] for item_id, item in model.items()}
+        # Expected respondents and correct answers per grid point, per item
+        expected = {item_id: ([0.0] * len(GRID), [0.0] * len(GRID)) for item_id in current}
+        for attempt in attempts:
+            weights = list(PRIOR)
+            for item_id, correct in attempt:
+                curve = curves[item_id]
+                for k in range(len(GRID)):
+                    weights[k] *= curve[k] if correct else 1 - curve[k]
+            total = sum(weights)
+            posterior = [w / total for w in weights]
+            for item_id, correct in attempt:
+                if item_id in expected:
+                    respondents, right = expected[item_id]
+                    for k, w in enumerate(posterior):
+                        respondents[k] += w
+                        if correct:
+                            right[k] += w
+        current = {item_id: _fit_item(current[item_id], priors[item_id], *expected[item_id])
+                   for item_id in current}
+
+    return {item_id: {'a': round(item.a, 4), 'b': round(item.b, 4), 'c': item.c, 'n': counts[item_id]}
+            for item_id, item in current.items()}
+
+
+def _fit_item(item: Item, prior: Item, respondents: List[float], right: List[float], steps: int = 3) -> Item:
+    a, b = item.a, item.b
+    for _ in range(steps):
+        # Gradient and expected information of the log posterior in (a, b)
+        grad_a = -(a - prior.a) / 0.25  # prior sd 0.5
+        grad_b = -(b - prior.b)  # prior sd 1
+        info_aa, info_bb, info_ab = 4.0, 1.0, 0.0
+        for theta, n, r in zip(GRID, respondents, right):
+            if n < 1e-9:
+                continue
+            star = 1 / (1 + math.exp(-a * (theta - b)))
+            p = item.c + (1 - item.c) * star
+            slope = (1 - item.c) * star * (1 - star)
+            d_a, d_b = slope * (theta - b), -slope * a
+            residual = (r - n * p) / (p * (1 - p))
+            grad_a += residual * d_a
+            grad_b += residual * d_b
+            weight = n / (p * (1 - p))
+            info_aa += weight * d_a * d_a
+            info_bb += weight * d_b * d_b
+            info_ab += weight * d_a * d_b
+        det = info_aa * info_bb - info_ab * info_ab
+        if det <= 0:
+            break
+        a += (info_bb * grad_a - info_ab * grad_b) / det
+        b += (info_aa * grad_b - info_ab * grad_a) / det
+        a = min(MAX_DISCRIMINATION, max(MIN_DISCRIMINATION, a))
+        b = min(MAX_DIFFICULTY, max(MIN_DIFFICULTY, b))
+    return Item(item.id, a, b, item.c)
@@ -1,35 +1,97 @@
-from flask import Flask, request, jsonify
+import startup
+from flask import Flask, request, jsonify, g, Response
 from flask_cors import CORS
 import os
-from pymongo import MongoClient
-from datetime import datetime
+from datetime import datetime, timezone
 import json
 import uuid
-from typing import Dict, List, Any
-from dataclasses import dataclass, asdict
+from typing import Dict, List, Any, Awaitable, Callable, Coroutine, Optional, Sequence, Tuple, TypeVar
+from dataclasses import dataclass, asdict, field, fields
 import time
-import re
+import hashlib
+import heapq
 import requests
+import httpx
+import asyncio
+import logging
 from dotenv import load_dotenv
+from logs import configure_logging, new_request_id, request_id_var
+import metrics
+import tracing
+import slo
+import mastery
+import adaptive
+import cassette
+import salvage
+import prompts
+import routing
+from serialization import FastJSONProvider, compress_response, stream_json
+from storage import create_storage, AsyncStorage, ANALYTICS_COUNTER, CATALOG_COUNTER
+from catalog import SAMPLE_CATALOG_PATH, CatalogError, load_catalog
+startup.profile.mark('import dependencies')
 
 # Load environment variables
 load_dotenv()
+configure_logging()
+tracing.configure_tracing()
+logger = logging.getLogger(__name__)
+startup.profile.mark('configure logging and tracing')
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app)
 
+@app.before_request
+def bind_request_context():
+    new_request_id(request.headers.get('X-Request-ID'))
+    metrics.begin_request()
+    g.request_started = time.perf_counter()
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    g.request_span = tracing.span(f"{request.method} {route}", {
+        'http.method': request.method, 'http.route': route, 'http.target': request.path,
+        'request_id': request_id_var.get()
+    })
+    g.request_span.__enter__()
+
+@app.after_request
+def finish_request_context(response):
+    response.headers['X-Request-ID'] = request_id_var.get() or ''
+    if 'request_started' in g:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.finish_request(route, request.method, response.status_code,
+                               time.perf_counter() - g.request_started)
+    tracing.set_attributes({'http.status_code': response.status_code})
+    return response
+
+@app.after_request
+def compress_body(response):
+    return compress_response(response, request.headers.get('Accept-Encoding'))
+
+@app.teardown_request
+def end_request_span(error):
+    request_span = g.pop('request_span', None)
+    if request_span is not None:
+        request_span.__exit__(type(error) if error else None, error, error.__traceback__ if error else None)
+
 # Gemini AI configuration
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-GEMINI_BASE_URL = 'https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash-exp:generateContent'
+# Models, generation configs and timeouts per task are in routing.py
 
 if not GEMINI_API_KEY:
-    print("❌ GEMINI_API_KEY not found in environment variables!")
-    print("Please set your Gemini API key in .env file")
+    logger.error("❌ GEMINI_API_KEY not found in environment variables! Please set your Gemini API key in .env file")
 else:
-    print(f"🤖 Using Gemini AI with API key: {GEMINI_API_KEY[:10]}...")
+    logger.info("🤖 Using Gemini AI (API key configured)")
+
+# Data access goes through the configured storage backend (STORAGE_BACKEND).
+# The client is created on first use so importing the app does no I/O.
+def build_storage():
+    backend = os.getenv('STORAGE_BACKEND', 'mongo').lower()
+    if backend == 'mongo':
+        metrics.register_mongo_metrics()
+    return tracing.instrument_storage(create_storage(backend))
 
-client = MongoClient(os.getenv('MONGODB_URI', 'mongodb://localhost:27017/'))
-db = client.personalized_tutor
+storage = startup.Lazy('storage', build_storage)
+async_storage = startup.Lazy('async_storage', lambda: AsyncStorage(storage.get()))
 
 @dataclass
 class LearnerProfile:
@@ -41,6 +103,11 @@ class LearnerProfile:
     weak_areas: List[str]
     created_at: datetime
 
+    @classmethod
+    def from_doc(cls, doc: Dict) -> 'LearnerProfile':
+        """Build from a stored profile, ignoring bookkeeping fields such as version"""
+        return cls(**{f.name: doc[f.name] for f in fields(cls) if f.name in doc})
+
 @dataclass
 class LearningResource:
     id: str
@@ -71,228 +138,569 @@ class QuizQuestion:
     topic: str
     difficulty_level: int
     resource_id: str
+    # Feedback for choosing each option, in the order of options; empty when not generated
+    explanations: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_doc(cls, doc: Dict) -> 'QuizQuestion':
+        """Build from a stored question, ignoring pool fields such as subject and irt"""
+        return cls(**{f.name: doc[f.name] for f in fields(cls) if f.name in doc})
 
-def clean_mongo_doc(doc):
-    if doc and '_id' in doc:
-        del doc['_id']
-    return doc
+    def explanation_for(self, answer: str) -> Optional[str]:
+        """Stored feedback for an answer, or None if it matches no option or none was generated"""
+        normalized = answer.strip().lower()
+        for option, explanation in zip(self.options, self.explanations):
+            if option.strip().lower() == normalized:
+                return explanation or None
+        return None
+
+def question_content_hash(question: QuizQuestion) -> str:
+    """Stable id for a question derived from its content, used for deduplication"""
+    content = json.dumps({
+        'question': question.question,
+        'options': question.options,
+        'correct_answer': question.correct_answer,
+        'topic': question.topic,
+        'difficulty_level': question.difficulty_level
+    }, sort_keys=True)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()[:32]
+
+def prepare_questions(questions: List[QuizQuestion], subject: Optional[str] = None) -> List[Dict]:
+    """Assign content-hash ids to questions and return their storage documents.
+    
+    With ``subject`` the questions also join that subject's pretest pool."""
+    created_at = datetime.utcnow()
+    docs = []
+    for question in questions:
+        question.id = question_content_hash(question)
+        doc = {**asdict(question), 'created_at': created_at}
+        if subject:
+            doc['subject'] = subject
+        docs.append(doc)
+    return docs
+
+def save_questions(questions: List[QuizQuestion], subject: Optional[str] = None) -> List[str]:
+    """Store questions once in the question store and return their ordered ids"""
+    storage.questions.save_many(prepare_questions(questions, subject))
+    return [q.id for q in questions]
+
+def build_attempt(learner_id: str, kind: str, source_id: str, resource_id: str,
+                  questions: List[QuizQuestion], user_answers: Dict, results: List[Dict],
+                  overall_feedback: Dict) -> Dict[str, Any]:
+    """Build the attempts history entry for a graded quiz or pretest"""
+    topic_results = {}
+    responses = []
+    for question, result in zip(questions, results):
+        topic = topic_results.setdefault(question.topic, {'correct': 0, 'total': 0})
+        topic['total'] += 1
+        if result['is_correct']:
+            topic['correct'] += 1
+        response = {
+            'question_id': question.id,
+            'answer': user_answers.get(question.id, ''),
+            'is_correct': result['is_correct'],
+            # Kept so mastery can be replayed from the attempts history
+            'topic': question.topic,
+            'difficulty': question.difficulty_level
+        }
+        if result.get('feedback'):
+            response['feedback'] = result['feedback']
+        responses.append(response)
+    
+    return {
+        'id': str(uuid.uuid4()),
+        'learner_id': learner_id,
+        'kind': kind,
+        'source_id': source_id,
+        'resource_id': resource_id,
+        'timestamp': datetime.utcnow(),
+        'score': overall_feedback['average_score'],
+        'correct_answers': overall_feedback['correct_answers'],
+        'total_questions': overall_feedback['total_questions'],
+        'topic_results': topic_results,
+        'responses': responses
+    }
+
+def attempt_summary(attempt: Dict) -> Dict[str, Any]:
+    """Score summary of a stored attempt, in the shape of EvaluatorAgent.summarize_results"""
+    topic_results = attempt.get('topic_results', {})
+    return {
+        'average_score': attempt['score'],
+        'total_questions': attempt['total_questions'],
+        'correct_answers': attempt['correct_answers'],
+        'weak_topics': [topic for topic, r in topic_results.items() if r['correct'] < r['total']],
+        'strong_topics': [topic for topic, r in topic_results.items() if r['correct'] > 0]
+    }
+
+def find_response(attempt: Optional[Dict], question_id: str) -> Optional[Dict]:
+    if not attempt:
+        return None
+    return next((r for r in attempt.get('responses', []) if r['question_id'] == question_id), None)
+
+def question_payload(question: QuizQuestion) -> Dict[str, Any]:
+    """What a learner sees of a question; the answer and explanations stay on the server"""
+    return {'id': question.id, 'question': question.question, 'options': question.options}
+
+def new_adaptive_pretest(learner_id: str, subject: str, pool: List[Dict]) -> Optional[Dict[str, Any]]:
+    """An adaptive pretest over a subject's pool, or None if the pool is too small for one"""
+    if len(pool) < adaptive.pool_min():
+        return None
+    pretest_id = str(uuid.uuid4())
+    ability, standard_error, first = adaptive.step({doc['id']: adaptive.item_from_doc(doc) for doc in pool}, [],
+                                                   adaptive.selection_rng(pretest_id, 0))
+    return {
+        'id': pretest_id,
+        'learner_id': learner_id,
+        'subject': subject,
+        'mode': 'adaptive',
+        'question_ids': [first.id],
+        'responses': [],
+        'ability': ability,
+        'standard_error': standard_error,
+        'finished': False,
+        'created_at': datetime.utcnow()
+    }
+
+def answer_adaptive_pretest(pretest: Dict, pool: List[Dict], question_id: str,
+                            answer: str) -> Tuple[Dict, float, float, Optional[Dict]]:
+    """Grade the question an adaptive pretest is waiting on and choose the next one.
+
+    Returns the graded response, the new ability estimate and its standard
+    error, and the next question document (None when the pretest is done).
+    Raises ValueError if ``question_id`` is not the question awaiting an answer."""
+    responses = pretest.get('responses', [])
+    pending = pretest['question_ids'][len(responses)] if len(pretest['question_ids']) > len(responses) else None
+    docs = {doc['id']: doc for doc in pool}
+    if pretest.get('finished') or question_id != pending or question_id not in docs:
+        raise ValueError("Question is not awaiting an answer")
+
+    question = QuizQuestion.from_doc(docs[question_id])
+    response = {
+        'question_id': question_id,
+        'answer': answer,
+        'is_correct': orchestrator.evaluator_agent.is_correct(question, answer)
+    }
+    ability, standard_error, following = adaptive.step(
+        {doc['id']: adaptive.item_from_doc(doc) for doc in pool}, responses + [response],
+        adaptive.selection_rng(pretest['id'], len(responses) + 1)
+    )
+    return response, ability, standard_error, docs[following.id] if following else None
+
+def new_form_pretest(learner_id: str, subject: str, pool: List[Dict]) -> Optional[Tuple[Dict[str, Any], List[Dict]]]:
+    """A fixed-form pretest drawn from a subject's pool and its question documents,
+    or None if the pool cannot fill a form"""
+    size = adaptive.form_size()
+    if len(pool) < size:
+        return None
+    pretest_id = str(uuid.uuid4())
+    form = adaptive.assemble_form(pool, size, pretest_id)
+    return {
+        'id': pretest_id,
+        'learner_id': learner_id,
+        'subject': subject,
+        'mode': 'fixed',
+        'question_ids': [doc['id'] for doc in form],
+        'created_at': datetime.utcnow()
+    }, form
+
+def adaptive_answers(pretest: Dict) -> Dict[str, str]:
+    """The answers recorded so far by an adaptive pretest, keyed by question id"""
+    return {r['question_id']: r['answer'] for r in pretest.get('responses', [])}
+
+class GeminiThrottled(Exception):
+    """The model is out of capacity (429/503); the call may be retried on another model"""
 
 class GeminiClient:
-    def __init__(self, api_key: str = GEMINI_API_KEY):
+    def __init__(self, api_key: str = GEMINI_API_KEY, agent_name: str = 'default'):
         self.api_key = api_key
-        self.base_url = GEMINI_BASE_URL
-        
-    def generate(self, prompt: str, max_tokens: int = 2048) -> str:
-        """Generate text using Gemini AI API"""
-        try:
-            url = f"{self.base_url}?key={self.api_key}"
-            
-            payload = {
-                "contents": [
-                    {
-                        "parts": [
-                            {
-                                "text": prompt
-                            }
-                        ]
-                    }
-                ],
-                "generationConfig": {
-                    "temperature": 0.7,
-                    "maxOutputTokens": max_tokens,
-                    "topP": 0.8,
-                    "topK": 40
+        self.agent_name = agent_name
+        self._async_client = None
+    
+    def _build_payload(self, prompt: str, max_tokens: int, schema: Optional[Dict[str, Any]] = None,
+                       system: Optional[str] = None,
+                       generation_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        payload = {
+            "contents": [
+                {
+                    "parts": [
+                        {
+                            "text": prompt
+                        }
+                    ]
                 }
+            ],
+            "generationConfig": {
+                **(generation_config or routing.route('adhoc').generation_config),
+                "maxOutputTokens": max_tokens
             }
-            
-            print(f"🤖 Sending request to Gemini AI...")
-            response = requests.post(
-                url, 
-                json=payload, 
-                headers={'Content-Type': 'application/json'},
-                verify=False
-            )
+        }
+        if schema:
+            # Structured output: the reply is JSON matching the schema, with no prose or code fences
+            payload["generationConfig"]["responseMimeType"] = "application/json"
+            payload["generationConfig"]["responseSchema"] = schema
+        if system:
+            payload["systemInstruction"] = {"parts": [{"text": system}]}
+        return payload
+    
+    def _extract_text(self, result: Dict[str, Any]) -> str:
+        if 'candidates' in result and len(result['candidates']) > 0:
+            if 'content' in result['candidates'][0]:
+                if 'parts' in result['candidates'][0]['content']:
+                    return result['candidates'][0]['content']['parts'][0]['text']
+        
+        logger.error("❌ Unexpected Gemini response format: %.500s", result)
+        return ""
+    
+    def _observe(self, route: routing.Route, model: str, outcome: str, started: float,
+                 usage: Optional[Dict[str, Any]]) -> None:
+        metrics.observe_gemini_call(self.agent_name, outcome, time.perf_counter() - started, usage, route.task,
+                                    model, routing.cost(model, usage))
+        tracing.set_attributes({
+            'gemini.model': model,
+            'gemini.outcome': outcome,
+            'gemini.prompt_tokens': (usage or {}).get('promptTokenCount'),
+            'gemini.completion_tokens': (usage or {}).get('candidatesTokenCount')
+        })
+    
+    def _fail_over(self, route: routing.Route, model: str, error: GeminiThrottled) -> None:
+        metrics.record_failover(route.task, model)
+        logger.warning("⚠️ %s throttled for %s (%s), failing over to %s", model, route.task, error, route.fallback)
+        
+    def generate(self, prompt: str, max_tokens: int = 2048, schema: Optional[Dict[str, Any]] = None,
+                  system: Optional[str] = None, task: str = 'adhoc') -> str:
+        """Generate text using Gemini AI API with the task's routed model; with ``schema`` the text is JSON matching it"""
+        route = routing.route(task)
+        payload = self._build_payload(prompt, max_tokens, schema, system, route.generation_config)
+        with tracing.span('gemini.generate', {'agent': self.agent_name, 'task': task, 'max_tokens': max_tokens,
+                                              'prompt_chars': len(prompt), 'structured': schema is not None}):
+            for model in route.models:
+                try:
+                    return self._post(route, model, payload)
+                except GeminiThrottled as e:
+                    if model == route.models[-1]:
+                        raise Exception(f"Gemini generation failed: {e}")
+                    self._fail_over(route, model, e)
+    
+    def _post(self, route: routing.Route, model: str, payload: Dict[str, Any]) -> str:
+        started = time.perf_counter()
+        outcome, usage = 'error', None
+        try:
+            url = f"{routing.url(model)}?key={self.api_key}"
+        
+            tape = cassette.active()
+            if tape and tape.replaying:
+                exchange = tape.play(model, payload)
+                time.sleep(tape.delay(exchange))
+                response = exchange.to_requests(url)
+            else:
+                logger.debug("🤖 Sending request to Gemini AI (%s)...", model)
+                response = requests.post(
+                    url, 
+                    json=payload, 
+                    headers={'Content-Type': 'application/json'},
+                    timeout=route.timeout,
+                    verify=False
+                )
+                if tape:
+                    tape.record(model, payload, response.status_code, response.text, time.perf_counter() - started)
+            if response.status_code in routing.THROTTLED_STATUSES:
+                outcome = 'throttled'
+                raise GeminiThrottled(f"{model} returned {response.status_code}")
             response.raise_for_status()
-            
+        
             result = response.json()
-            
-            if 'candidates' in result and len(result['candidates']) > 0:
-                if 'content' in result['candidates'][0]:
-                    if 'parts' in result['candidates'][0]['content']:
-                        return result['candidates'][0]['content']['parts'][0]['text']
-            
-            print(f"❌ Unexpected Gemini response format: {result}")
-            return ""
-            
+            usage = result.get('usageMetadata')
+            text = self._extract_text(result)
+            outcome = 'success' if text else 'empty'
+            return text
+        
+        except GeminiThrottled:
+            raise
         except requests.exceptions.RequestException as e:
-            print(f"❌ Gemini request error: {e}")
+            logger.error("❌ Gemini request error: %s", e)
             raise Exception(f"Failed to connect to Gemini AI: {e}")
         except Exception as e:
-            print(f"❌ Gemini error: {e}")
+            logger.error("❌ Gemini error: %s", e)
             raise Exception(f"Gemini generation failed: {e}")
+        finally:
+            self._observe(route, model, outcome, started, usage)
+    
+    async def agenerate(self, prompt: str, max_tokens: int = 2048, schema: Optional[Dict[str, Any]] = None,
+                         system: Optional[str] = None, task: str = 'adhoc') -> str:
+        """Generate text using Gemini AI API without blocking the event loop"""
+        route = routing.route(task)
+        payload = self._build_payload(prompt, max_tokens, schema, system, route.generation_config)
+        with tracing.span('gemini.generate', {'agent': self.agent_name, 'task': task, 'max_tokens': max_tokens,
+                                              'prompt_chars': len(prompt), 'structured': schema is not None}):
+            for model in route.models:
+                try:
+                    return await self._apost(route, model, payload)
+                except GeminiThrottled as e:
+                    if model == route.models[-1]:
+                        raise Exception(f"Gemini generation failed: {e}")
+                    self._fail_over(route, model, e)
+    
+    async def _apost(self, route: routing.Route, model: str, payload: Dict[str, Any]) -> str:
+        started = time.perf_counter()
+        outcome, usage = 'error', None
+        try:
+            if self._async_client is None:
+                # Created lazily so it binds to the serving event loop; timeouts are per route
+                self._async_client = httpx.AsyncClient(verify=False, timeout=None)
+        
+            tape = cassette.active()
+            if tape and tape.replaying:
+                exchange = tape.play(model, payload)
+                await asyncio.sleep(tape.delay(exchange))
+                response = exchange.to_httpx(routing.url(model))
+            else:
+                logger.debug("🤖 Sending async request to Gemini AI (%s)...", model)
+                response = await self._async_client.post(
+                    routing.url(model),
+                    params={'key': self.api_key},
+                    json=payload,
+                    headers={'Content-Type': 'application/json'},
+                    timeout=route.timeout
+                )
+                if tape:
+                    tape.record(model, payload, response.status_code, response.text, time.perf_counter() - started)
+            if response.status_code in routing.THROTTLED_STATUSES:
+                outcome = 'throttled'
+                raise GeminiThrottled(f"{model} returned {response.status_code}")
+            response.raise_for_status()
+        
+            result = response.json()
+            usage = result.get('usageMetadata')
+            text = self._extract_text(result)
+            outcome = 'success' if text else 'empty'
+            return text
+        
+        except GeminiThrottled:
+            raise
+        except httpx.HTTPError as e:
+            logger.error("❌ Gemini request error: %s", e)
+            raise Exception(f"Failed to connect to Gemini AI: {e}")
+        except Exception as e:
+            logger.error("❌ Gemini error: %s", e)
+            raise Exception(f"Gemini generation failed: {e}")
+        finally:
+            self._observe(route, model, outcome, started, usage)
+    
+    def complete(self, prompt: prompts.Prompt, schema: Optional[Dict[str, Any]] = None) -> str:
+        """Generate from a rendered prompt template, within its output budget"""
+        return self.generate(prompt.text, prompt.max_tokens, schema, system=prompt.system, task=prompt.task)
+    
+    async def acomplete(self, prompt: prompts.Prompt, schema: Optional[Dict[str, Any]] = None) -> str:
+        """Async variant of complete"""
+        return await self.agenerate(prompt.text, prompt.max_tokens, schema, system=prompt.system, task=prompt.task)
+
+def quiz_questions_schema(count: int) -> Dict[str, Any]:
+    """Response schema for an array of ``count`` multiple choice questions"""
+    four_strings = {"type": "ARRAY", "items": {"type": "STRING"}, "minItems": 4, "maxItems": 4}
+    return {
+        "type": "ARRAY",
+        "minItems": count,
+        "maxItems": count,
+        "items": {
+            "type": "OBJECT",
+            "properties": {
+                "question": {"type": "STRING"},
+                "options": four_strings,
+                "correct_answer": {"type": "STRING"},
+                "explanations": four_strings,
+                "topic": {"type": "STRING"}
+            },
+            "required": ["question", "options", "correct_answer", "explanations", "topic"],
+            "propertyOrdering": ["question", "options", "correct_answer", "explanations", "topic"]
+        }
+    }
+
+def resource_ids_schema(resource_ids: List[str], min_items: int = 3, max_items: int = 8) -> Dict[str, Any]:
+    """Response schema for an ordered array of ids drawn from ``resource_ids``"""
+    return {
+        "type": "ARRAY",
+        "minItems": min_items,
+        "maxItems": max_items,
+        "items": {"type": "STRING", "enum": list(resource_ids)}
+    }
 
 class ContentGeneratorAgent:
     """AI Agent for generating educational content using Gemini AI"""
     
     def __init__(self):
-        self.gemini = GeminiClient()
         self.agent_name = "ContentGenerator"
-        self.system_context = """You are an expert educational content generator. 
-        Your role is to create high-quality learning materials, quizzes, and analyze learning patterns."""
+        self.gemini = GeminiClient(agent_name=self.agent_name)
+        
+    def _quiz_prompt(self, topic: str, difficulty: int, count: int, existing: Sequence[str] = ()) -> prompts.Prompt:
+        # Asking for the rest of a partly generated quiz: the new questions must differ
+        avoid = "".join(f"\n- {question}" for question in existing)
+        return prompts.QUIZ.render(topic=topic, difficulty=difficulty, count=count,
+                                   avoid=f"\nDo not repeat these questions:{avoid}" if avoid else "")
+    
+    def _parse_quiz_questions(self, response_text: str, topic: str, difficulty: int, count: int) -> List[QuizQuestion]:
+        """Parse and validate a quiz generation response.
+        
+        Returns up to ``count`` valid questions, fewer if the reply was truncated
+        or had malformed questions; raises if it has none."""
+        if not response_text:
+            raise Exception("Empty response from Gemini AI")
+        
+        logger.debug("📥 Raw Gemini response: %.300s...", response_text)
+        
+        try:
+            questions_data = json.loads(response_text)
+        except json.JSONDecodeError:
+            # Structured output makes this rare; keep the complete questions of a truncated or broken reply
+            metrics.record_fallback(self.agent_name, 'json_salvage')
+            salvaged = salvage.salvage_array(response_text)
+            logger.warning("⚠️ Salvaged %s questions from unparseable JSON (complete: %s, skipped: %s)",
+                           len(salvaged.items), salvaged.complete, salvaged.skipped)
+            questions_data = salvaged.items
+        
+        if not isinstance(questions_data, list):
+            metrics.record_parse_failure(self.agent_name)
+            raise ValueError("Response is not a JSON array")
+        
+        # Take only the requested number of questions
+        questions_data = questions_data[:count]
+        
+        questions = []
+        for i, q_data in enumerate(questions_data):
+            # Validate question structure
+            required_fields = ['question', 'options', 'correct_answer']
+            if not isinstance(q_data, dict) or not all(field in q_data for field in required_fields):
+                logger.warning("⚠️ Question %s missing fields, skipping", i+1)
+                continue
+            
+            if not isinstance(q_data['options'], list) or len(q_data['options']) < 4:
+                logger.warning("⚠️ Question %s invalid options, skipping", i+1)
+                continue
+            
+            # Ensure we have exactly 4 options
+            options = q_data['options'][:4]
+            
+            # Make sure correct answer is in options
+            correct_answer = q_data['correct_answer']
+            if correct_answer not in options:
+                # Use the first option as correct answer
+                correct_answer = options[0]
+            
+            # Explanations are optional; without a full set feedback is generated on demand
+            explanations = q_data.get('explanations')
+            if not (isinstance(explanations, list) and len(explanations) >= 4
+                    and all(isinstance(e, str) and e.strip() for e in explanations[:4])):
+                logger.debug("Question %s has no usable explanations", i+1)
+                explanations = []
+            
+            question = QuizQuestion(
+                id=str(uuid.uuid4()),
+                question=q_data['question'],
+                options=options,
+                correct_answer=correct_answer,
+                topic=q_data.get('topic', topic),
+                difficulty_level=difficulty,
+                resource_id="",
+                explanations=[e.strip() for e in explanations[:4]]
+            )
+            questions.append(question)
         
-    def generate_quiz_questions(self, topic: str, difficulty: int, count: int = 5) -> List[QuizQuestion]:
-        """Generate quiz questions using Gemini AI"""
+        if not questions:
+            metrics.record_parse_failure(self.agent_name)
+            raise ValueError("Response has no valid questions")
+        
+        return questions[:count]
+    
+    def _add_new_questions(self, questions: List[QuizQuestion], fresh: List[QuizQuestion]) -> List[QuizQuestion]:
+        """``questions`` followed by the ``fresh`` ones that do not repeat a question"""
+        seen = {q.question.strip().lower() for q in questions}
+        merged = list(questions)
+        for question in fresh:
+            if question.question.strip().lower() not in seen:
+                seen.add(question.question.strip().lower())
+                merged.append(question)
+        return merged
+    
+    @tracing.traced
+    def generate_ai_quiz_questions(self, topic: str, difficulty: int, count: int = 5) -> List[QuizQuestion]:
+        """Generate quiz questions with Gemini AI, retrying, and raise if every attempt fails"""
         
         max_retries = 3
         retry_count = 0
+        questions: List[QuizQuestion] = []
         
         while retry_count < max_retries:
-            try:
-                print(f"🤖 Generating {count} questions for topic: {topic}, difficulty: {difficulty}/5 (attempt {retry_count + 1})")
-                
-                prompt = f"""{self.system_context}
-
-TASK: Create exactly {count} multiple choice questions about {topic} at difficulty level {difficulty} out of 5.
-
-REQUIREMENTS:
-- Each question must have exactly 4 options
-- Difficulty level {difficulty}/5 where 1=beginner, 5=expert
-- Focus specifically on {topic}
-- Return ONLY valid JSON format
-- Make questions educational and accurate
-- Ensure one correct answer per question
-
-FORMAT (return exactly this structure):
-[
-  {{
-    "question": "What is the main concept of {topic}?",
-    "options": ["Correct Answer", "Wrong Option 1", "Wrong Option 2", "Wrong Option 3"],
-    "correct_answer": "Correct Answer",
-    "topic": "{topic}"
-  }}
-]
-
-Create {count} questions about {topic} now. Return only the JSON array without any additional text or formatting:"""
-                
-                response_text = self.gemini.generate(prompt, max_tokens=2048)
-                
-                if not response_text:
-                    raise Exception("Empty response from Gemini AI")
-                
-                print(f"📥 Raw Gemini response: {response_text[:300]}...")
-                
-                # Clean the response
-                response_text = self._clean_json_response(response_text)
-                
-                # Parse JSON
-                questions_data = json.loads(response_text)
-                
-                if not isinstance(questions_data, list):
-                    raise ValueError("Response is not a JSON array")
-                
-                # Take only the requested number of questions
-                questions_data = questions_data[:count]
-                
-                questions = []
-                for i, q_data in enumerate(questions_data):
-                    # Validate question structure
-                    required_fields = ['question', 'options', 'correct_answer']
-                    if not all(field in q_data for field in required_fields):
-                        print(f"⚠️ Question {i+1} missing fields, skipping")
-                        continue
-                    
-                    if not isinstance(q_data['options'], list) or len(q_data['options']) < 4:
-                        print(f"⚠️ Question {i+1} invalid options, skipping")
-                        continue
-                    
-                    # Ensure we have exactly 4 options
-                    options = q_data['options'][:4]
+            # Later attempts ask only for the questions still missing
+            needed = count - len(questions)
+            prompt = self._quiz_prompt(topic, difficulty, needed, [q.question for q in questions])
+            progressed = False
+            with tracing.span('ContentGeneratorAgent.quiz_attempt', {'attempt': retry_count + 1, 'requested': needed}):
+                try:
+                    logger.debug("🤖 Generating %s questions for topic: %s, difficulty: %s/5 (attempt %s)", needed, topic, difficulty, retry_count + 1)
                     
-                    # Make sure correct answer is in options
-                    correct_answer = q_data['correct_answer']
-                    if correct_answer not in options:
-                        # Use the first option as correct answer
-                        correct_answer = options[0]
+                    response_text = self.gemini.complete(prompt, schema=quiz_questions_schema(needed))
+                    fresh = self._parse_quiz_questions(response_text, topic, difficulty, needed)
+                    merged = self._add_new_questions(questions, fresh)
+                    progressed = len(merged) > len(questions)
+                    questions = merged
+                    if len(questions) >= count:
+                        logger.debug("✅ Successfully generated %s questions", count)
+                        return questions[:count]
+                    logger.warning("⚠️ Got %s of %s valid questions (attempt %s), requesting the rest", len(questions), count, retry_count + 1)
                     
-                    question = QuizQuestion(
-                        id=str(uuid.uuid4()),
-                        question=q_data['question'],
-                        options=options,
-                        correct_answer=correct_answer,
-                        topic=q_data.get('topic', topic),
-                        difficulty_level=difficulty,
-                        resource_id=""
-                    )
-                    questions.append(question)
-                
-                if len(questions) >= count:
-                    questions = questions[:count]
-                    print(f"✅ Successfully generated {len(questions)} questions")
-                    return questions
-                else:
-                    raise ValueError(f"Generated only {len(questions)} valid questions, need {count}")
-                
-            except json.JSONDecodeError as e:
-                print(f"❌ JSON parsing error (attempt {retry_count + 1}): {e}")
-                print(f"Response text: {response_text}")
-                retry_count += 1
-                time.sleep(2)
-                
-            except Exception as e:
-                print(f"❌ Error generating questions (attempt {retry_count + 1}): {e}")
-                retry_count += 1
-                time.sleep(2)
+                except Exception as e:
+                    logger.error("❌ Error generating questions (attempt %s): %s", retry_count + 1, e)
+                    tracing.record_error(e)
+            
+            retry_count += 1
+            # A partial reply is not a transient failure, so the shortfall is requested at once
+            if retry_count < max_retries and not progressed:
+                with tracing.span('retry_backoff', {'seconds': 2}):
+                    time.sleep(2)
         
-        # If all retries failed, generate simple questions
-        print("⚠️ Gemini AI failed, generating basic questions")
-        return self._generate_basic_questions(topic, difficulty, count)
+        raise Exception(f"Gemini AI failed to generate {count} questions after {max_retries} attempts")
     
-    def _clean_json_response(self, response_text: str) -> str:
-        """Clean the Gemini response to extract valid JSON"""
+    @tracing.traced
+    async def agenerate_ai_quiz_questions(self, topic: str, difficulty: int, count: int = 5) -> List[QuizQuestion]:
+        """Async variant of generate_ai_quiz_questions"""
         
-        # Remove markdown code blocks if present
-        response_text = re.sub(r'```json\s*', '', response_text)
-        response_text = re.sub(r'```\s*', '', response_text)
-        
-        # Find JSON array boundaries
-        start_idx = response_text.find('[')
-        end_idx = response_text.rfind(']')
+        max_retries = 3
+        retry_count = 0
+        questions: List[QuizQuestion] = []
         
-        if start_idx != -1 and end_idx != -1 and start_idx < end_idx:
-            json_content = response_text[start_idx:end_idx + 1]
-        else:
-            # Try to find individual objects and wrap in array
-            objects = []
-            lines = response_text.split('\n')
-            current_object = ""
-            brace_count = 0
-            
-            for line in lines:
-                if '{' in line:
-                    current_object = line
-                    brace_count = line.count('{') - line.count('}')
-                elif current_object and brace_count > 0:
-                    current_object += " " + line
-                    brace_count += line.count('{') - line.count('}')
+        while retry_count < max_retries:
+            # Later attempts ask only for the questions still missing
+            needed = count - len(questions)
+            prompt = self._quiz_prompt(topic, difficulty, needed, [q.question for q in questions])
+            progressed = False
+            with tracing.span('ContentGeneratorAgent.quiz_attempt', {'attempt': retry_count + 1, 'requested': needed}):
+                try:
+                    logger.debug("🤖 Generating %s questions for topic: %s, difficulty: %s/5 (attempt %s)", needed, topic, difficulty, retry_count + 1)
                     
-                    if brace_count == 0:
-                        try:
-                            obj = json.loads(current_object)
-                            objects.append(obj)
-                            current_object = ""
-                        except:
-                            current_object = ""
-                            brace_count = 0
+                    response_text = await self.gemini.acomplete(prompt, schema=quiz_questions_schema(needed))
+                    fresh = self._parse_quiz_questions(response_text, topic, difficulty, needed)
+                    merged = self._add_new_questions(questions, fresh)
+                    progressed = len(merged) > len(questions)
+                    questions = merged
+                    if len(questions) >= count:
+                        logger.debug("✅ Successfully generated %s questions", count)
+                        return questions[:count]
+                    logger.warning("⚠️ Got %s of %s valid questions (attempt %s), requesting the rest", len(questions), count, retry_count + 1)
+                    
+                except Exception as e:
+                    logger.error("❌ Error generating questions (attempt %s): %s", retry_count + 1, e)
+                    tracing.record_error(e)
             
-            if objects:
-                json_content = json.dumps(objects)
-            else:
-                json_content = response_text
+            retry_count += 1
+            # A partial reply is not a transient failure, so the shortfall is requested at once
+            if retry_count < max_retries and not progressed:
+                with tracing.span('retry_backoff', {'seconds': 2}):
+                    await asyncio.sleep(2)
         
-        return json_content
+        raise Exception(f"Gemini AI failed to generate {count} questions after {max_retries} attempts")
     
     def _generate_basic_questions(self, topic: str, difficulty: int, count: int) -> List[QuizQuestion]:
         """Generate basic questions when Gemini AI fails"""
+        metrics.record_fallback(self.agent_name, 'basic_questions')
         questions = []
         
         question_templates = {
@@ -357,149 +765,123 @@ Create {count} questions about {topic} now. Return only the JSON array without a
             questions.append(question)
         
         return questions[:count]
-    
-    def analyze_weak_areas(self, quiz_results: List[Dict]) -> List[str]:
-        """Analyze quiz results to identify weak areas using Gemini AI"""
-        try:
-            if not quiz_results:
-                return []
-            
-            prompt = f"""{self.system_context}
-
-TASK: Analyze quiz results and identify weak learning areas.
-
-Quiz Results:
-{json.dumps(quiz_results, indent=2)}
-
-Based on incorrect answers and topics, identify the main weak areas that need attention.
-Return only a JSON array of weak area topics (maximum 5 topics).
-
-Example format: ["algebra", "geometry", "calculus"]
-
-Return only the JSON array without any additional text:"""
-            
-            response = self.gemini.generate(prompt, max_tokens=500)
-            
-            # Try to extract JSON array
-            try:
-                start = response.find('[')
-                end = response.rfind(']')
-                if start != -1 and end != -1:
-                    weak_areas = json.loads(response[start:end+1])
-                    return weak_areas if isinstance(weak_areas, list) else []
-            except:
-                pass
-            
-            # Fallback to simple analysis
-            incorrect_topics = []
-            for result in quiz_results:
-                if not result.get('is_correct', False):
-                    topic = result.get('topic', '').lower()
-                    if topic:
-                        incorrect_topics.append(topic)
-            return list(set(incorrect_topics))
-            
-        except Exception as e:
-            print(f"❌ Error analyzing weak areas: {e}")
-            # Fallback analysis
-            incorrect_topics = []
-            for result in quiz_results:
-                if not result.get('is_correct', False):
-                    topic = result.get('topic', '').lower()
-                    if topic:
-                        incorrect_topics.append(topic)
-            return list(set(incorrect_topics))
 
 class PathGeneratorAgent:
     """AI Agent for generating personalized learning paths using Gemini AI"""
     
     def __init__(self):
-        self.gemini = GeminiClient()
         self.agent_name = "PathGenerator"
-        self.system_context = """You are an AI learning path optimization specialist. 
-        Your role is to create optimal learning sequences based on learner profiles and available resources."""
+        self.gemini = GeminiClient(agent_name=self.agent_name)
+        
+    def _rank_resources(self, learner_profile: LearnerProfile,
+                        available_resources: List[LearningResource]) -> List[LearningResource]:
+        """The resources a path prompt can offer, most relevant to the learner first:
+        weak-area topics, then their style, then nearest their level"""
+        weak_areas = [area.lower() for area in learner_profile.weak_areas]
+        styles = (learner_profile.learning_style, 'universal')
+        level = int(learner_profile.knowledge_level)
+        # Catalogs have far fewer topics than resources
+        weak_topics = {topic: any(area in topic.lower() for area in weak_areas)
+                       for topic in {r.topic for r in available_resources}}
+        # Every row costs at least two tokens, which bounds how many the budget can hold
+        return heapq.nsmallest(prompts.PATH.max_prompt_tokens // 2, available_resources, key=lambda r: (
+            not weak_topics[r.topic],
+            r.learning_style not in styles,
+            abs(r.difficulty_level - level),
+            r.difficulty_level
+        ))
+    
+    @staticmethod
+    def _resource_rows(resources: List[LearningResource]):
+        return prompts.table(('id', 'title', 'topic', 'difficulty', 'style', 'type'), (
+            f"{r.id}|{prompts.cell(r.title)}|{prompts.cell(r.topic)}|{r.difficulty_level}|{r.learning_style}|{r.type}"
+            for r in resources
+        ))
+    
+    def _path_prompt(self, learner_profile: LearnerProfile,
+                     available_resources: List[LearningResource]) -> Tuple[prompts.Prompt, List[LearningResource]]:
+        """The path prompt and the resources it offers; the least relevant are left out beyond the token budget"""
+        values = {
+            'style': learner_profile.learning_style,
+            'subject': learner_profile.subject,
+            'level': learner_profile.knowledge_level,
+            'weak_areas': ', '.join(learner_profile.weak_areas) or 'none'
+        }
+        # Ranking only decides what to leave out, so a catalog that fits is offered as it is.
+        # Rows are formatted lazily, so finding one that does not fit stops at the budget.
+        offered = available_resources
+        prompt = prompts.PATH.render(rows=self._resource_rows(offered), **values)
+        if prompt.rows < len(offered):
+            offered = self._rank_resources(learner_profile, available_resources)
+            prompt = prompts.PATH.render(rows=self._resource_rows(offered), **values)
+        return prompt, offered[:prompt.rows]
+    
+    def _parse_path(self, response: str, available_resources: List[LearningResource]) -> List[str]:
+        """Extract a valid path from the response, or return an empty list"""
+        try:
+            path_ids = json.loads(response)
+        except json.JSONDecodeError:
+            # Structured output makes this rare; keep the complete ids of a truncated or broken reply
+            metrics.record_fallback(self.agent_name, 'json_salvage')
+            path_ids = salvage.salvage_array(response).items
+        if not isinstance(path_ids, list):
+            metrics.record_parse_failure(self.agent_name)
+            return []
         
-    def generate_learning_path(self, learner_profile: LearnerProfile, available_resources: List[LearningResource]) -> List[str]:
-        """Generate personalized learning path using Gemini AI"""
+        # Validate resource IDs
+        valid_ids = {r.id for r in available_resources}
+        filtered_path = [rid for rid in path_ids if rid in valid_ids]
         
-        print(f"🛤️ Generating learning path for learner: {learner_profile.name}")
-        print(f"Learning style: {learner_profile.learning_style}")
-        print(f"Weak areas: {learner_profile.weak_areas}")
-        print(f"Knowledge level: {learner_profile.knowledge_level}")
-        print(f"Subject: {learner_profile.subject}")
-        print(f"Available resources: {len(available_resources)}")
+        if len(filtered_path) >= 3:
+            logger.debug("✅ Generated AI learning path: %s", filtered_path)
+            return filtered_path
+        return []
+    
+    def _log_path_request(self, learner_profile: LearnerProfile, available_resources: List[LearningResource]):
+        logger.debug(
+            "🛤️ Generating learning path for learner %s: style=%s weak_areas=%s level=%s subject=%s resources=%s",
+            learner_profile.id, learner_profile.learning_style, learner_profile.weak_areas,
+            learner_profile.knowledge_level, learner_profile.subject, len(available_resources)
+        )
         
         if not available_resources:
             raise Exception("No learning resources available")
         
-        try:
-            # Use Gemini AI to generate learning path
-            resource_list = []
-            for resource in available_resources:
-                resource_list.append(f"ID: {resource.id}, Title: {resource.title}, Topic: {resource.topic}, Difficulty: {resource.difficulty_level}, Style: {resource.learning_style}, Type: {resource.type}")
-            
-            prompt = f"""{self.system_context}
-
-TASK: Create an optimal learning sequence for this learner.
-
-LEARNER PROFILE:
-- Name: {learner_profile.name}
-- Learning Style: {learner_profile.learning_style}
-- Subject: {learner_profile.subject}
-- Knowledge Level: {learner_profile.knowledge_level}/5
-- Weak Areas: {learner_profile.weak_areas}
-
-AVAILABLE RESOURCES:
-{chr(10).join(resource_list)}
-
-OPTIMIZATION CRITERIA:
-1. Prioritize learning style: {learner_profile.learning_style}
-2. Focus on weak areas: {learner_profile.weak_areas}
-3. Start with difficulty level {learner_profile.knowledge_level} or lower
-4. Progress logically through prerequisites
-5. Ensure smooth difficulty progression
-6. Select 6-8 resources maximum
-
-Return only a JSON array of resource IDs in optimal learning order:
-["resource_id_1", "resource_id_2", "resource_id_3"]
-
-Return only the JSON array without any additional text:"""
-            
-            print("🤖 Asking Gemini AI to generate learning path...")
-            response = self.gemini.generate(prompt, max_tokens=1000)
-            
-            # Try to extract JSON from response
-            json_match = re.search(r'\[.*?\]', response, re.DOTALL)
-            if json_match:
-                try:
-                    path_ids = json.loads(json_match.group())
-                    
-                    # Validate resource IDs
-                    valid_ids = [r.id for r in available_resources]
-                    filtered_path = [rid for rid in path_ids if rid in valid_ids]
-                    
-                    if filtered_path and len(filtered_path) >= 3:
-                        print(f"✅ Generated AI learning path: {filtered_path}")
-                        return filtered_path
-                except json.JSONDecodeError:
-                    pass
-            
-            # Fallback to manual generation
-            print("⚠️ AI path generation failed, using manual approach")
-            return self._manual_path_generation(learner_profile, available_resources)
-            
-        except Exception as e:
-            print(f"❌ Error with Gemini path generation: {e}")
-            return self._manual_path_generation(learner_profile, available_resources)
+    @tracing.traced
+    def generate_ai_learning_path(self, learner_profile: LearnerProfile, available_resources: List[LearningResource]) -> List[str]:
+        """Learning path from Gemini AI alone; raises if it returns no usable path"""
+        # Use Gemini AI to generate learning path
+        logger.debug("🤖 Asking Gemini AI to generate learning path...")
+        prompt, offered = self._path_prompt(learner_profile, available_resources)
+        response = self.gemini.complete(prompt, schema=resource_ids_schema([r.id for r in offered]))
+        
+        path = self._parse_path(response, offered)
+        if not path:
+            raise ValueError("Gemini response has no usable learning path")
+        return path
+    
+    @tracing.traced
+    async def agenerate_ai_learning_path(self, learner_profile: LearnerProfile, available_resources: List[LearningResource]) -> List[str]:
+        """Async variant of generate_ai_learning_path"""
+        logger.debug("🤖 Asking Gemini AI to generate learning path...")
+        prompt, offered = self._path_prompt(learner_profile, available_resources)
+        response = await self.gemini.acomplete(prompt, schema=resource_ids_schema([r.id for r in offered]))
+        
+        path = self._parse_path(response, offered)
+        if not path:
+            raise ValueError("Gemini response has no usable learning path")
+        return path
     
     def _manual_path_generation(self, learner_profile: LearnerProfile, available_resources: List[LearningResource]) -> List[str]:
         """Manual path generation logic"""
-        print("🔧 Using manual path generation")
+        logger.info("🔧 Using manual path generation")
+        metrics.record_fallback(self.agent_name, 'manual_path')
         
         # Filter by learning style preference
         preferred = [r for r in available_resources if r.learning_style == learner_profile.learning_style]
         universal = [r for r in available_resources if r.learning_style == 'universal']
-        other = [r for r in available_resources if r not in preferred and r not in universal]
+        # Partition by style directly; membership tests against the lists above are quadratic
+        other = [r for r in available_resources if r.learning_style not in (learner_profile.learning_style, 'universal')]
         
         # Combine in order of preference
         filtered_resources = preferred + universal + other
@@ -533,101 +915,84 @@ class EvaluatorAgent:
     """AI Agent for evaluating quiz responses and providing feedback using Gemini AI"""
     
     def __init__(self):
-        self.gemini = GeminiClient()
         self.agent_name = "QuizEvaluator"
-        self.system_context = """You are an educational assessment expert. 
-        Your role is to evaluate quiz responses and provide constructive, encouraging feedback."""
+        self.gemini = GeminiClient(agent_name=self.agent_name)
     
-    def evaluate_quiz_response(self, question: QuizQuestion, user_answer: str) -> Dict[str, Any]:
-        """Evaluate quiz response using Gemini AI"""
-        
-        is_correct = user_answer.strip().lower() == question.correct_answer.strip().lower()
-        
-        try:
-            prompt = f"""{self.system_context}
-
-TASK: Provide educational feedback for this quiz question.
-
-QUESTION: {question.question}
-OPTIONS: {', '.join(question.options)}
-CORRECT ANSWER: {question.correct_answer}
-USER ANSWER: {user_answer}
-RESULT: {'CORRECT' if is_correct else 'INCORRECT'}
-
-Write helpful, encouraging feedback (2-3 sentences) that:
-1. Explains why the answer is correct/incorrect
-2. Provides a learning tip or concept explanation
-3. Encourages continued learning
-
-Keep the tone positive and educational. Return only the feedback text without any additional formatting:"""
-            
-            response = self.gemini.generate(prompt, max_tokens=300)
-            feedback = response.strip() if response else f"Your answer is {'correct' if is_correct else 'incorrect'}."
-            
-        except Exception as e:
-            print(f"❌ Error generating feedback: {e}")
-            feedback = f"Your answer is {'correct' if is_correct else 'incorrect'}. The correct answer is {question.correct_answer}."
-        
-        return {
-            'is_correct': is_correct,
-            'feedback': feedback,
-            'topic': question.topic,
-            'score': 100 if is_correct else 0
-        }
+    def _feedback_prompt(self, question: QuizQuestion, user_answer: str, is_correct: bool) -> prompts.Prompt:
+        return prompts.FEEDBACK.render(
+            question=question.question,
+            options=' | '.join(question.options),
+            correct_answer=question.correct_answer,
+            answer=user_answer,
+            result='correct' if is_correct else 'incorrect'
+        )
     
-    def generate_overall_feedback(self, quiz_results: List[Dict]) -> Dict[str, Any]:
-        """Generate overall feedback for quiz performance using Gemini AI"""
-        if not quiz_results:
-            return {
-                'average_score': 0,
-                'total_questions': 0,
-                'correct_answers': 0,
-                'weak_topics': [],
-                'strong_topics': [],
-                'recommendation': 'No quiz data available'
-            }
-        
+    def is_correct(self, question: QuizQuestion, user_answer: str) -> bool:
+        return user_answer.strip().lower() == question.correct_answer.strip().lower()
+    
+    def template_feedback(self, question: QuizQuestion, is_correct: bool) -> str:
+        metrics.record_fallback(self.agent_name, 'template_feedback')
+        return f"Your answer is {'correct' if is_correct else 'incorrect'}. The correct answer is {question.correct_answer}."
+    
+    @tracing.traced
+    def generate_feedback(self, question: QuizQuestion, user_answer: str, is_correct: bool) -> str:
+        """Feedback text from Gemini AI alone; raises if it returns none"""
+        response = self.gemini.complete(self._feedback_prompt(question, user_answer, is_correct))
+        if not response.strip():
+            raise ValueError("Empty feedback from Gemini AI")
+        return response.strip()
+    
+    @tracing.traced
+    async def agenerate_feedback(self, question: QuizQuestion, user_answer: str, is_correct: bool) -> str:
+        """Async variant of generate_feedback"""
+        response = await self.gemini.acomplete(self._feedback_prompt(question, user_answer, is_correct))
+        if not response.strip():
+            raise ValueError("Empty feedback from Gemini AI")
+        return response.strip()
+    
+    def summarize_results(self, quiz_results: List[Dict]) -> Dict[str, Any]:
         total_score = sum(r.get('score', 0) for r in quiz_results)
         average_score = total_score / len(quiz_results)
         
         weak_topics = [r['topic'] for r in quiz_results if not r.get('is_correct', False)]
         strong_topics = [r['topic'] for r in quiz_results if r.get('is_correct', False)]
         
-        try:
-            prompt = f"""{self.system_context}
-
-TASK: Provide an encouraging recommendation based on quiz performance.
-
-PERFORMANCE DATA:
-- Score: {average_score:.1f}%
-- Correct: {len(strong_topics)}/{len(quiz_results)}
-- Strong areas: {list(set(strong_topics))}
-- Areas to improve: {list(set(weak_topics))}
-
-Write an encouraging 1-2 sentence recommendation that:
-1. Acknowledges their effort
-2. Provides specific guidance for improvement
-3. Motivates continued learning
-
-Return only the recommendation text without any additional formatting:"""
-            
-            response = self.gemini.generate(prompt, max_tokens=200)
-            recommendation = response.strip() if response else (
-                'Great job! Keep up the good work!' if average_score >= 70 else 'Keep practicing to improve your understanding!'
-            )
-            
-        except Exception as e:
-            print(f"❌ Error generating recommendation: {e}")
-            recommendation = 'Great job! Keep up the good work!' if average_score >= 70 else 'Keep practicing to improve!'
-        
         return {
             'average_score': average_score,
             'total_questions': len(quiz_results),
             'correct_answers': len(strong_topics),
             'weak_topics': list(set(weak_topics)),
-            'strong_topics': list(set(strong_topics)),
-            'recommendation': recommendation
+            'strong_topics': list(set(strong_topics))
         }
+    
+    def _recommendation_prompt(self, summary: Dict[str, Any]) -> prompts.Prompt:
+        return prompts.RECOMMENDATION.render(
+            score=summary['average_score'],
+            correct=summary['correct_answers'],
+            total=summary['total_questions'],
+            strong=', '.join(summary['strong_topics']) or 'none yet',
+            weak=', '.join(summary['weak_topics']) or 'none'
+        )
+    
+    def template_recommendation(self, summary: Dict[str, Any]) -> str:
+        metrics.record_fallback(self.agent_name, 'template_recommendation')
+        return 'Great job! Keep up the good work!' if summary['average_score'] >= 70 else 'Keep practicing to improve!'
+    
+    @tracing.traced
+    def generate_recommendation(self, summary: Dict[str, Any]) -> str:
+        """Recommendation text from Gemini AI alone; raises if it returns none"""
+        response = self.gemini.complete(self._recommendation_prompt(summary))
+        if not response.strip():
+            raise ValueError("Empty recommendation from Gemini AI")
+        return response.strip()
+    
+    @tracing.traced
+    async def agenerate_recommendation(self, summary: Dict[str, Any]) -> str:
+        """Async variant of generate_recommendation"""
+        response = await self.gemini.acomplete(self._recommendation_prompt(summary))
+        if not response.strip():
+            raise ValueError("Empty recommendation from Gemini AI")
+        return response.strip()
 
 class AgentOrchestrator:
     """Orchestrates all AI agents for coordinated learning experience"""
@@ -636,9 +1001,178 @@ class AgentOrchestrator:
         self.content_agent = ContentGeneratorAgent()
         self.path_agent = PathGeneratorAgent()
         self.evaluator_agent = EvaluatorAgent()
-        print("✅ Initialized AI Agent Orchestrator with Gemini AI")
+        logger.info("✅ Initialized AI Agent Orchestrator with Gemini AI")
+    
+    # Budgeted generation (see slo.py). Each method returns an slo.Served whose
+    # tier says whether Gemini, the cache or the deterministic fallback answered.
+    
+    def _path_key(self, profile: LearnerProfile, resources: List[LearningResource]) -> Tuple:
+        # Learners with the same profile get the same path from the same catalog
+        return (profile.subject, profile.learning_style, int(profile.knowledge_level),
+                tuple(sorted(area.lower() for area in profile.weak_areas)), hash(tuple(r.id for r in resources)))
+    
+    def _recommendation_key(self, summary: Dict[str, Any]) -> Tuple:
+        return (round(summary['average_score']), tuple(sorted(summary['strong_topics'])),
+                tuple(sorted(summary['weak_topics'])))
+    
+    def quiz_questions(self, topic: str, difficulty: int, count: int) -> slo.Served:
+        content = self.content_agent
+        return slo.within_budget(
+            'quiz', (topic.lower(), difficulty, count),
+            lambda: content.generate_ai_quiz_questions(topic, difficulty, count),
+            lambda: content._generate_basic_questions(topic, difficulty, count)
+        )
+    
+    async def aquiz_questions(self, topic: str, difficulty: int, count: int) -> slo.Served:
+        content = self.content_agent
+        return await slo.awithin_budget(
+            'quiz', (topic.lower(), difficulty, count),
+            lambda: content.agenerate_ai_quiz_questions(topic, difficulty, count),
+            lambda: content._generate_basic_questions(topic, difficulty, count)
+        )
+    
+    def learning_path(self, profile: LearnerProfile, resources: List[LearningResource]) -> slo.Served:
+        path_agent = self.path_agent
+        path_agent._log_path_request(profile, resources)
+        return slo.within_budget(
+            'path', self._path_key(profile, resources),
+            lambda: path_agent.generate_ai_learning_path(profile, resources),
+            lambda: path_agent._manual_path_generation(profile, resources)
+        )
+    
+    async def alearning_path(self, profile: LearnerProfile, resources: List[LearningResource]) -> slo.Served:
+        path_agent = self.path_agent
+        path_agent._log_path_request(profile, resources)
+        return await slo.awithin_budget(
+            'path', self._path_key(profile, resources),
+            lambda: path_agent.agenerate_ai_learning_path(profile, resources),
+            lambda: path_agent._manual_path_generation(profile, resources)
+        )
     
-    def process_new_learner(self, profile_data: Dict) -> Dict[str, Any]:
+    def grade_answers(self, questions: List[QuizQuestion], user_answers: Dict) -> List[Dict]:
+        """Score every answer locally, with the explanation stored for the chosen option.
+        
+        ``feedback`` is None where the question has no stored explanations; those
+        are generated on demand."""
+        results = []
+        for question in questions:
+            answer = user_answers.get(question.id, '')
+            is_correct = self.evaluator_agent.is_correct(question, answer)
+            results.append({
+                'question_id': question.id,
+                'is_correct': is_correct,
+                'feedback': question.explanation_for(answer),
+                'topic': question.topic,
+                'score': 100 if is_correct else 0
+            })
+        return results
+    
+    def question_feedback(self, question: QuizQuestion, user_answer: str) -> slo.Served:
+        evaluator = self.evaluator_agent
+        is_correct = evaluator.is_correct(question, user_answer)
+        explanation = question.explanation_for(user_answer)
+        if explanation:
+            return slo.Served('feedback', explanation, slo.TIER_AI)
+        return slo.within_budget(
+            'feedback', (question.id, user_answer.strip().lower()),
+            lambda: evaluator.generate_feedback(question, user_answer, is_correct),
+            lambda: evaluator.template_feedback(question, is_correct)
+        )
+    
+    async def aquestion_feedback(self, question: QuizQuestion, user_answer: str) -> slo.Served:
+        evaluator = self.evaluator_agent
+        is_correct = evaluator.is_correct(question, user_answer)
+        explanation = question.explanation_for(user_answer)
+        if explanation:
+            return slo.Served('feedback', explanation, slo.TIER_AI)
+        return await slo.awithin_budget(
+            'feedback', (question.id, user_answer.strip().lower()),
+            lambda: evaluator.agenerate_feedback(question, user_answer, is_correct),
+            lambda: evaluator.template_feedback(question, is_correct)
+        )
+    
+    
+    def recommendation(self, summary: Dict[str, Any]) -> slo.Served:
+        evaluator = self.evaluator_agent
+        return slo.within_budget(
+            'feedback', self._recommendation_key(summary),
+            lambda: evaluator.generate_recommendation(summary),
+            lambda: evaluator.template_recommendation(summary)
+        )
+    
+    async def arecommendation(self, summary: Dict[str, Any]) -> slo.Served:
+        evaluator = self.evaluator_agent
+        return await slo.awithin_budget(
+            'feedback', self._recommendation_key(summary),
+            lambda: evaluator.agenerate_recommendation(summary),
+            lambda: evaluator.template_recommendation(summary)
+        )
+    
+orchestrator = startup.Lazy('orchestrator', AgentOrchestrator)
+
+def warmup(check_gemini: bool = False) -> Dict[str, Any]:
+    """Build the lazy singletons up front (e.g. after fork) instead of on the first request"""
+    storage.get()
+    async_storage.get()
+    orchestrator.get()
+    with startup.profile.step('ping storage'):
+        try:
+            storage.ping()
+        except Exception as e:
+            logger.error("❌ Storage ping failed during warmup: %s", e)
+    if check_gemini:
+        with startup.profile.step('check gemini'):
+            test_gemini_connection()
+    return startup.profile.report()
+
+def create_app(warm: bool = False) -> Flask:
+    """WSGI entry point, e.g. gunicorn 'app:create_app(warm=True)'"""
+    if warm:
+        warmup()
+    return app
+
+# Test Gemini connection on demand (health checks, GEMINI_STARTUP_CHECK)
+def test_gemini_connection():
+    try:
+        if not GEMINI_API_KEY:
+            logger.error("❌ Gemini API key not configured")
+            return False
+            
+        gemini = GeminiClient(agent_name='health')
+        response = gemini.generate("Test prompt: Say hello", max_tokens=10, task='health')
+        logger.info("✅ Gemini AI connection successful")
+        return True
+    except Exception as e:
+        logger.error("❌ Gemini AI connection failed: %s. Make sure your GEMINI_API_KEY is correctly set in .env file", e)
+        return False
+
+# Request handling shared by the Flask routes below and the async routes in asgi.py.
+# Each handler is a coroutine returning (payload, status). TutorService calls the
+# blocking storage and agents inline, so its coroutines complete without ever
+# suspending and the Flask routes run them with run_sync; AsyncTutorService
+# awaits the async storage and agents on the event loop instead.
+T = TypeVar('T')
+
+def run_sync(coroutine: Coroutine[Any, Any, T]) -> T:
+    """Run a TutorService coroutine to completion on the calling thread"""
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        return done.value
+    coroutine.close()
+    raise RuntimeError(f"{coroutine.__qualname__} suspended outside an event loop")
+
+class TutorService:
+    """The Gemini-bound request handlers, over the blocking storage and agents"""
+    
+    mode = 'sync'
+    
+    def __init__(self, storage_view):
+        self.storage = storage_view
+        self.health_gemini = GeminiClient(agent_name='health')
+        self.test_gemini = GeminiClient(agent_name='ai_test')
+    
+    def _build_profile(self, profile_data: Dict) -> LearnerProfile:
         # Ensure knowledge_level is an integer
         knowledge_level = profile_data.get('knowledge_level', 1)
         if isinstance(knowledge_level, str):
@@ -653,7 +1187,7 @@ class AgentOrchestrator:
             weak_areas = []
         
         # Create learner profile
-        profile = LearnerProfile(
+        return LearnerProfile(
             id=str(uuid.uuid4()),
             name=str(profile_data['name']),
             learning_style=str(profile_data['learning_style']),
@@ -662,24 +1196,12 @@ class AgentOrchestrator:
             weak_areas=weak_areas,
             created_at=datetime.utcnow()
         )
-        
-        # Save profile to database
-        db.learner_profiles.insert_one(asdict(profile))
-        print(f"✅ Created learner profile: {profile.id}")
-        
-        # Get available resources
-        resources = list(db.learning_resources.find({}, {'_id': 0}))
-        resource_objects = [LearningResource(**r) for r in resources]
-        print(f"📚 Found {len(resource_objects)} resources")
-        
-        # Generate learning path
-        path_resources = self.path_agent.generate_learning_path(profile, resource_objects)
-        
+    
+    def _build_path(self, profile: LearnerProfile, path_resources: List[str]) -> LearningPath:
         if not path_resources:
             raise Exception("Failed to generate learning path")
         
-        # Create learning path
-        learning_path = LearningPath(
+        return LearningPath(
             id=str(uuid.uuid4()),
             learner_id=profile.id,
             resources=path_resources,
@@ -688,282 +1210,540 @@ class AgentOrchestrator:
             created_at=datetime.utcnow(),
             updated_at=datetime.utcnow()
         )
-        
-        # Save learning path
-        db.learning_paths.insert_one(asdict(learning_path))
-        print(f"✅ Created learning path: {learning_path.id} with {len(path_resources)} resources")
+    
+    def _new_learner_result(self, profile: LearnerProfile, learning_path: LearningPath, path_tier: str) -> Dict[str, Any]:
+        logger.info("✅ Created learning path: %s with %s resources", learning_path.id, len(learning_path.resources))
         
         return {
             'profile_id': profile.id,
             'path_id': learning_path.id,
-            'initial_resources': path_resources[:3]
+            'initial_resources': learning_path.resources[:3],
+            'served_by': {'path': path_tier}
         }
-
-orchestrator = AgentOrchestrator()
-
-# Test Gemini connection on startup
-def test_gemini_connection():
-    try:
-        if not GEMINI_API_KEY:
-            print("❌ Gemini API key not configured")
-            return False
-            
-        gemini = GeminiClient()
-        response = gemini.generate("Test prompt: Say hello", max_tokens=10)
-        print(f"✅ Gemini AI connection successful")
-        return True
-    except Exception as e:
-        print(f"❌ Gemini AI connection failed: {e}")
-        print("Make sure your GEMINI_API_KEY is correctly set in .env file")
-        return False
-
-# Flask routes
-@app.route('/api/health', methods=['GET'])
-def health_check():
-    gemini_status = test_gemini_connection()
-    return jsonify({
-        'status': 'healthy', 
-        'timestamp': datetime.utcnow().isoformat(),
-        'gemini_connected': gemini_status,
-        'ai_model': 'gemini-2.0-flash-exp'
-    })
-
-@app.route('/api/learner/create', methods=['POST'])
-def create_learner():
-    try:
-        data = request.get_json()
-        print(f"🏗️ Creating learner with data: {data}")
-        result = orchestrator.process_new_learner(data)
-        return jsonify({'success': True, 'data': result})
-    except Exception as e:
-        print(f"❌ Error creating learner: {e}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({'success': False, 'error': str(e)}), 500
-
-@app.route('/api/learner/<learner_id>/pretest', methods=['POST'])
-def conduct_pretest(learner_id):
-    try:
-        data = request.get_json()
+    
+    # Everything that blocks goes through these, so a subclass can await it instead
+    
+    async def quiz_questions(self, topic: str, difficulty: int, count: int) -> slo.Served:
+        return orchestrator.quiz_questions(topic, difficulty, count)
+    
+    async def learning_path(self, profile: LearnerProfile, resources: List[LearningResource]) -> slo.Served:
+        return orchestrator.learning_path(profile, resources)
+    
+    async def recommendation(self, summary: Dict[str, Any]) -> slo.Served:
+        return orchestrator.recommendation(summary)
+    
+    async def question_feedback(self, question: QuizQuestion, user_answer: str) -> slo.Served:
+        return orchestrator.question_feedback(question, user_answer)
+    
+    async def generate(self, gemini: GeminiClient, prompt: str, max_tokens: int, task: str) -> str:
+        return gemini.generate(prompt, max_tokens=max_tokens, task=task)
+    
+    def backfill(self, served: slo.Served, store: Callable[[Any], Awaitable]) -> None:
+        """Pass a late AI result to ``store``, a coroutine function over self.storage"""
+        served.backfill(lambda value: run_sync(store(value)))
+    
+    async def document_questions(self, doc: Dict) -> List[QuizQuestion]:
+        """Resolve the questions of a quiz or pretest document"""
+        if 'question_ids' in doc:
+            return [QuizQuestion.from_doc(q) for q in await self.storage.questions.get_many(doc['question_ids'])]
+        # Documents created before question normalization embed full questions
+        return [QuizQuestion.from_doc(q) for q in doc.get('questions', [])]
+    
+    async def health(self) -> Tuple[Dict[str, Any], int]:
+        gemini_status = False
+        if GEMINI_API_KEY:
+            try:
+                await self.generate(self.health_gemini, "Test prompt: Say hello", 10, 'health')
+                gemini_status = True
+            except Exception as e:
+                logger.error("❌ Gemini AI connection failed: %s", e)
+        return {
+            'status': 'healthy',
+            'timestamp': datetime.utcnow().isoformat(),
+            'gemini_connected': gemini_status,
+            'ai_model': routing.route('adhoc').model,
+            'ai_models': routing.models(),
+            'mode': self.mode
+        }, 200
+    
+    @tracing.traced
+    async def create_learner(self, data: Dict) -> Tuple[Dict[str, Any], int]:
+        logger.debug("🏗️ Creating learner with data: %s", data)
+        profile = self._build_profile(data)
+        
+        await self.storage.profiles.insert(asdict(profile))
+        logger.info("✅ Created learner profile: %s", profile.id)
+        
+        resources = [LearningResource(**r) for r in await self.storage.resources.list_all()]
+        logger.debug("📚 Found %s resources", len(resources))
+        
+        served = await self.learning_path(profile, resources)
+        learning_path = self._build_path(profile, served.value)
+        
+        # A late AI path replaces a degraded one until the learner makes progress
+        await self.storage.paths.insert(asdict(learning_path))
+        self.backfill(served, lambda ids: self.storage.paths.reset_resources(profile.id, ids, expected_version=0))
+        return {'success': True, 'data': self._new_learner_result(profile, learning_path, served.tier)}, 200
+    
+    async def conduct_pretest(self, learner_id: str, data: Dict) -> Tuple[Dict[str, Any], int]:
         subject = data.get('subject', 'algebra')
+        logger.info("📝 Conducting pretest for learner %s, subject: %s", learner_id, subject)
         
-        print(f"📝 Conducting pretest for learner {learner_id}, subject: {subject}")
+        # Pretests come from the subject's pool: adaptive once it is large enough,
+        # a drawn fixed form before that, and Gemini only for subjects without one
+        pool = await self.storage.questions.pool(subject)
+        pretest = new_adaptive_pretest(learner_id, subject, pool)
+        if pretest:
+            await self.storage.pretests.insert(pretest)
+            first = next(QuizQuestion.from_doc(q) for q in pool if q['id'] == pretest['question_ids'][0])
+            logger.info("✅ Created adaptive pretest %s from a pool of %s questions", pretest['id'], len(pool))
+            return {
+                'success': True,
+                'pretest_id': pretest['id'],
+                'mode': 'adaptive',
+                'questions': [question_payload(first)],
+                'max_questions': adaptive.max_items()
+            }, 200
         
-        questions = orchestrator.content_agent.generate_quiz_questions(subject, 2, 5)
+        drawn = new_form_pretest(learner_id, subject, pool)
+        if drawn:
+            pretest, form = drawn
+            await self.storage.pretests.insert(pretest)
+            logger.info("✅ Drew pretest %s from a pool of %s questions", pretest['id'], len(pool))
+            return {
+                'success': True,
+                'pretest_id': pretest['id'],
+                'mode': 'fixed',
+                'questions': [question_payload(QuizQuestion.from_doc(doc)) for doc in form]
+            }, 200
+        
+        logger.warning("⚠️ No pretest pool for %s, generating questions with Gemini", subject)
+        served = await self.quiz_questions(subject, 2, adaptive.form_size())
+        questions = served.value
+        await self.storage.questions.save_many(prepare_questions(questions))
         
         pretest = {
             'id': str(uuid.uuid4()),
             'learner_id': learner_id,
             'subject': subject,
-            'questions': [asdict(q) for q in questions],
+            'question_ids': [q.id for q in questions],
             'created_at': datetime.utcnow()
         }
+        await self.storage.pretests.insert(pretest)
+        logger.info("✅ Created pretest %s with %s questions", pretest['id'], len(questions))
         
-        db.pretests.insert_one(pretest)
-        print(f"✅ Created pretest {pretest['id']} with {len(questions)} questions")
-        
-        return jsonify({
+        return {
             'success': True,
             'pretest_id': pretest['id'],
-            'questions': [{'id': q.id, 'question': q.question, 'options': q.options} for q in questions]
-       })
+            'mode': 'fixed',
+            'questions': [question_payload(q) for q in questions],
+            'served_by': {'quiz': served.tier}
+        }, 200
+    
+    async def answer_pretest(self, pretest_id: str, data: Dict) -> Tuple[Dict[str, Any], int]:
+        """Grade one answer of an adaptive pretest and return the next question, if any"""
+        pretest = await self.storage.pretests.get(pretest_id)
+        if not pretest or pretest.get('mode') != 'adaptive':
+            return {'success': False, 'error': 'Adaptive pretest not found'}, 404
+        
+        try:
+            response, ability, standard_error, following = answer_adaptive_pretest(
+                pretest, await self.storage.questions.pool(pretest['subject']),
+                data.get('question_id'), data.get('answer', '')
+            )
+        except ValueError as e:
+            return {'success': False, 'error': str(e)}, 409
+        
+        answered = len(pretest.get('responses', []))
+        if not await self.storage.pretests.record_response(pretest_id, response, ability, standard_error,
+                                                           following['id'] if following else None, answered):
+            return {'success': False, 'error': 'Question was already answered'}, 409
+        
+        logger.debug("📐 Pretest %s: ability %.2f ± %.2f after %s answers", pretest_id, ability, standard_error, answered + 1)
+        return {
+            'success': True,
+            'answered': answered + 1,
+            'finished': following is None,
+            'question': question_payload(QuizQuestion.from_doc(following)) if following else None
+        }, 200
+    
+    async def submit_pretest(self, pretest_id: str, data: Dict) -> Tuple[Dict[str, Any], int]:
+        user_answers = data.get('answers', {})
+        logger.debug("📝 Submitting pretest %s with answers: %s", pretest_id, user_answers)
+        
+        pretest = await self.storage.pretests.get(pretest_id)
+        if not pretest:
+            return {'success': False, 'error': 'Pretest not found'}, 404
+        
+        if pretest.get('mode') == 'adaptive':
+            # Graded as they were answered; only those questions count
+            user_answers = adaptive_answers(pretest)
+            if not user_answers:
+                return {'success': False, 'error': 'No questions answered yet'}, 400
+            questions = [QuizQuestion.from_doc(q) for q in await self.storage.questions.get_many(list(user_answers))]
+        else:
+            questions = await self.document_questions(pretest)
+        results = orchestrator.grade_answers(questions, user_answers)
+        overall_feedback = orchestrator.evaluator_agent.summarize_results(results)
+        
+        learner_id = pretest['learner_id']
+        attempt = build_attempt(learner_id, 'pretest', pretest_id, None,
+                                questions, user_answers, results, overall_feedback)
+        await self.storage.attempts.insert(attempt)
+        logger.debug("📊 Pretest results: %s", overall_feedback)
+        
+        # Update the learner's mastery, which yields their weak areas and knowledge level
+        weak_areas = []
+        served_by = {}
+        updated = await self.storage.profiles.update_with(learner_id, lambda profile: mastery.apply_attempt(profile, attempt))
+        if updated:
+            profile, update_data = updated
+            weak_areas = update_data['weak_areas']
+            logger.debug("🎯 Identified weak areas: %s", weak_areas)
+            
+            # Regenerate learning path with updated profile
+            resources = [LearningResource(**r) for r in await self.storage.resources.list_all()]
+            served_path = await self.learning_path(LearnerProfile.from_doc({**profile, **update_data}), resources)
+            new_path_resources = served_path.value
+            served_by['path'] = served_path.tier
+            
+            await self.storage.paths.reset_resources(learner_id, new_path_resources)
+            current = await self.storage.paths.get_version(learner_id)
+            if current:
+                self.backfill(served_path, lambda ids: self.storage.paths.reset_resources(
+                    learner_id, ids, expected_version=current[0]
+                ))
+            logger.info("🛤️ Updated learning path with %s resources", len(new_path_resources))
+        
+        body = {
+            'success': True,
+            'attempt_id': attempt['id'],
+            'results': results,
+            'overall_feedback': overall_feedback,
+            'weak_areas': weak_areas,
+            'served_by': served_by
+        }
+        if pretest.get('mode') == 'adaptive':
+            body['ability'] = {'estimate': pretest['ability'], 'standard_error': pretest['standard_error']}
+        return body, 200
+    
+    async def resource_quiz(self, resource_id: str) -> Tuple[Dict[str, Any], int]:
+        logger.debug("📝 Getting quiz for resource %s", resource_id)
+        
+        resource = await self.storage.resources.get(resource_id)
+        if not resource:
+            return {'success': False, 'error': 'Resource not found'}, 404
+        
+        served = await self.quiz_questions(resource['topic'], resource['difficulty_level'], 3)
+        questions = served.value
+        await self.storage.questions.save_many(prepare_questions(questions))
+        
+        quiz = {
+            'id': str(uuid.uuid4()),
+            'resource_id': resource_id,
+            'question_ids': [q.id for q in questions],
+            'created_at': datetime.utcnow()
+        }
+        await self.storage.quizzes.insert(quiz)
+        
+        return {
+            'success': True,
+            'data': {
+                'quiz_id': quiz['id'],
+                'questions': [question_payload(q) for q in questions],
+                'served_by': {'quiz': served.tier}
+            }
+        }, 200
+    
+    async def submit_quiz(self, quiz_id: str, data: Dict) -> Tuple[Dict[str, Any], int]:
+        user_answers = data.get('answers', {})
+        learner_id = data.get('learner_id')
+        logger.debug("📝 Submitting quiz %s for learner %s", quiz_id, learner_id)
+        # An attempt without a learner could never be listed or replayed
+        if not learner_id:
+            return {'success': False, 'error': 'learner_id is required'}, 400
+        
+        quiz, question_docs = await self.storage.quizzes.get_with_questions(quiz_id)
+        if not quiz:
+            return {'success': False, 'error': 'Quiz not found'}, 404
+        
+        questions = [QuizQuestion.from_doc(q) for q in question_docs]
+        
+        # Grade locally; explanations and the recommendation are fetched on demand
+        results = orchestrator.grade_answers(questions, user_answers)
+        overall_feedback = orchestrator.evaluator_agent.summarize_results(results)
+        
+        attempt = build_attempt(learner_id, 'quiz', quiz_id, quiz['resource_id'],
+                                questions, user_answers, results, overall_feedback)
+        await self.storage.attempts.insert(attempt)
+        await self.storage.profiles.update_with(learner_id, lambda profile: mastery.apply_attempt(profile, attempt),
+                                                mastery.PROFILE_FIELDS)
+        
+        # Optional optimistic guard: clients may pass the path version they last saw
+        expected_version = data.get('path_version')
+        path = await self.storage.paths.record_quiz_result(
+            learner_id, quiz['resource_id'], attempt,
+            passed=overall_feedback['average_score'] >= 70,
+            expected_version=expected_version
+        )
+        
+        if path:
+            logger.debug("📈 Updated learning path position to %s", path['current_position'])
+        elif expected_version is not None:
+            return {
+                'success': False,
+                'error': 'Learning path was modified concurrently',
+                'data': {'attempt_id': attempt['id'], 'results': results, 'overall_feedback': overall_feedback}
+            }, 409
+        
+        return {
+            'success': True,
+            'data': {
+                'attempt_id': attempt['id'],
+                'results': results,
+                'overall_feedback': overall_feedback,
+                'path_updated': path is not None,
+                'current_position': path['current_position'] if path else None,
+                'path_version': path['version'] if path else None
+            }
+        }, 200
+    
+    async def attempt_feedback(self, attempt_id: str) -> Tuple[Dict[str, Any], int]:
+        """Overall recommendation for a graded attempt, generated on first request and stored"""
+        attempt = await self.storage.attempts.get(attempt_id)
+        if not attempt:
+            return {'success': False, 'error': 'Attempt not found'}, 404
+        
+        if attempt.get('recommendation'):
+            return {'success': True, 'data': {'recommendation': attempt['recommendation'], 'served_by': slo.TIER_AI}}, 200
+        
+        served = await self.recommendation(attempt_summary(attempt))
+        store = lambda text: self.storage.attempts.set_recommendation(attempt_id, text)
+        # Template text is not stored, so a late Gemini answer can still replace it
+        if served.tier == slo.TIER_FALLBACK:
+            self.backfill(served, store)
+        else:
+            await store(served.value)
+        
+        return {'success': True, 'data': {'recommendation': served.value, 'served_by': served.tier}}, 200
+    
+    async def answer_feedback(self, attempt_id: str, question_id: str) -> Tuple[Dict[str, Any], int]:
+        """Explanation of one answered question, generated when the learner first expands it"""
+        response = find_response(await self.storage.attempts.get(attempt_id), question_id)
+        if not response:
+            return {'success': False, 'error': 'Answer not found'}, 404
+        
+        result = {'question_id': question_id, 'is_correct': response['is_correct']}
+        if response.get('feedback'):
+            return {'success': True, 'data': {**result, 'feedback': response['feedback'], 'served_by': slo.TIER_AI}}, 200
+        
+        question_docs = await self.storage.questions.get_many([question_id])
+        if not question_docs:
+            return {'success': False, 'error': 'Question not found'}, 404
+        
+        served = await self.question_feedback(QuizQuestion.from_doc(question_docs[0]), response['answer'])
+        store = lambda text: self.storage.attempts.set_question_feedback(attempt_id, question_id, text)
+        if served.tier == slo.TIER_FALLBACK:
+            self.backfill(served, store)
+        else:
+            await store(served.value)
+        
+        return {'success': True, 'data': {**result, 'feedback': served.value, 'served_by': served.tier}}, 200
+    
+    async def test_ai(self, data: Dict) -> Tuple[Dict[str, Any], int]:
+        prompt = data.get('prompt', 'Hello, how are you?')
+        response = await self.generate(self.test_gemini, prompt, 500, 'test')
+        return {
+            'success': True,
+            'prompt': prompt,
+            'response': response,
+            'model': routing.route('test').model
+        }, 200
+
+class AsyncTutorService(TutorService):
+    """TutorService for the async serving mode: storage and Gemini calls are awaited"""
+    
+    mode = 'async'
+    
+    async def quiz_questions(self, topic: str, difficulty: int, count: int) -> slo.Served:
+        return await orchestrator.aquiz_questions(topic, difficulty, count)
+    
+    async def learning_path(self, profile: LearnerProfile, resources: List[LearningResource]) -> slo.Served:
+        return await orchestrator.alearning_path(profile, resources)
+    
+    async def recommendation(self, summary: Dict[str, Any]) -> slo.Served:
+        return await orchestrator.arecommendation(summary)
+    
+    async def question_feedback(self, question: QuizQuestion, user_answer: str) -> slo.Served:
+        return await orchestrator.aquestion_feedback(question, user_answer)
+    
+    async def generate(self, gemini: GeminiClient, prompt: str, max_tokens: int, task: str) -> str:
+        return await gemini.agenerate(prompt, max_tokens=max_tokens, task=task)
+    
+    def backfill(self, served: slo.Served, store: Callable[[Any], Awaitable]) -> None:
+        served.backfill(store)
+
+inline_storage = startup.Lazy('inline_storage', lambda: AsyncStorage(storage.get(), inline=True))
+service = TutorService(inline_storage)
+
+def serve(handle: Callable[[], Coroutine]):
+    """Run a TutorService handler for the current Flask request"""
+    try:
+        payload, status = run_sync(handle())
     except Exception as e:
-       print(f"❌ Error conducting pretest: {e}")
-       return jsonify({'success': False, 'error': str(e)}), 500
+        logger.exception("❌ Error in %s: %s", request.endpoint, e)
+        payload, status = {'success': False, 'error': str(e)}, 500
+    return jsonify(payload), status
+
+# Flask routes
+@app.route('/api/health', methods=['GET'])
+def health_check():
+    return serve(service.health)
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    body, content_type = metrics.render_metrics()
+    return Response(body, content_type=content_type)
+
+@app.route('/api/learner/create', methods=['POST'])
+def create_learner():
+    return serve(lambda: service.create_learner(request.get_json()))
+
+@app.route('/api/learner/<learner_id>/pretest', methods=['POST'])
+def conduct_pretest(learner_id):
+    return serve(lambda: service.conduct_pretest(learner_id, request.get_json()))
+
+@app.route('/api/pretest/<pretest_id>/answer', methods=['POST'])
+def answer_pretest(pretest_id):
+    return serve(lambda: service.answer_pretest(pretest_id, request.get_json()))
 
 @app.route('/api/pretest/<pretest_id>/submit', methods=['POST'])
 def submit_pretest(pretest_id):
-   try:
-       data = request.get_json()
-       user_answers = data.get('answers', {})
-       
-       print(f"📝 Submitting pretest {pretest_id} with answers: {user_answers}")
-       
-       pretest = db.pretests.find_one({'id': pretest_id}, {'_id': 0})
-       if not pretest:
-           return jsonify({'success': False, 'error': 'Pretest not found'}), 404
-       
-       questions = [QuizQuestion(**q) for q in pretest['questions']]
-       results = []
-       
-       for question in questions:
-           user_answer = user_answers.get(question.id, '')
-           evaluation = orchestrator.evaluator_agent.evaluate_quiz_response(question, user_answer)
-           results.append(evaluation)
-       
-       weak_areas = orchestrator.content_agent.analyze_weak_areas(results)
-       overall_feedback = orchestrator.evaluator_agent.generate_overall_feedback(results)
-       
-       print(f"📊 Pretest results: {overall_feedback}")
-       print(f"🎯 Identified weak areas: {weak_areas}")
-       
-       # Update learner profile with weak areas and knowledge level
-       update_data = {
-           'weak_areas': weak_areas,
-           'knowledge_level': max(1, min(5, int(overall_feedback['average_score'] / 20)))
-       }
-       
-       db.learner_profiles.update_one(
-           {'id': pretest['learner_id']},
-           {'$set': update_data}
-       )
-       
-       # Regenerate learning path with updated profile
-       updated_profile = db.learner_profiles.find_one({'id': pretest['learner_id']}, {'_id': 0})
-       if updated_profile:
-           profile_obj = LearnerProfile(**updated_profile)
-           resources = list(db.learning_resources.find({}, {'_id': 0}))
-           resource_objects = [LearningResource(**r) for r in resources]
-           
-           new_path_resources = orchestrator.path_agent.generate_learning_path(profile_obj, resource_objects)
-           
-           # Update learning path
-           db.learning_paths.update_one(
-               {'learner_id': pretest['learner_id']},
-               {'$set': {
-                   'resources': new_path_resources,
-                   'current_position': 0,
-                   'updated_at': datetime.utcnow()
-               }}
-           )
-           
-           print(f"🛤️ Updated learning path with {len(new_path_resources)} resources")
-       
-       return jsonify({
-           'success': True,
-           'results': results,
-           'overall_feedback': overall_feedback,
-           'weak_areas': weak_areas
-       })
-   except Exception as e:
-       print(f"❌ Error submitting pretest: {e}")
-       return jsonify({'success': False, 'error': str(e)}), 500
+    return serve(lambda: service.submit_pretest(pretest_id, request.get_json()))
+
+# Per-learner data is always revalidated; the dashboard may be reused briefly
+LEARNER_CACHE_MAX_AGE = 0
+ANALYTICS_CACHE_MAX_AGE = int(os.getenv('ANALYTICS_CACHE_MAX_AGE', '15'))
+
+def is_not_modified(etag: str, last_modified: Optional[datetime]) -> bool:
+    """Whether the client's cached copy, per If-None-Match / If-Modified-Since, is current"""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified and request.if_modified_since:
+        return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= request.if_modified_since
+    return False
+
+def with_validators(response, etag: str, last_modified: Optional[datetime], max_age: int):
+    # Weak because the body may be re-encoded (compression) under the same tag
+    response.set_etag(etag, weak=True)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.max_age = max_age
+    response.cache_control.must_revalidate = True
+    return response
+
+def not_modified(etag: str, last_modified: Optional[datetime], max_age: int):
+    return with_validators(Response(status=304), etag, last_modified, max_age)
+
+def path_etag(version: int, catalog_version: int) -> str:
+    # The path response embeds the current resource, so catalog reloads change it too
+    return f"path-{version}-{catalog_version}"
+
+def progress_etag(profile_version: int, path_version: int) -> str:
+    return f"progress-{profile_version}-{path_version}"
+
+def latest(*timestamps: Optional[datetime]) -> Optional[datetime]:
+    present = [t for t in timestamps if t]
+    return max(present) if present else None
 
 @app.route('/api/learner/<learner_id>/path', methods=['GET'])
 def get_learning_path(learner_id):
    try:
-       print(f"🛤️ Getting learning path for learner {learner_id}")
+       logger.debug("🛤️ Getting learning path for learner %s", learner_id)
        
-       path = db.learning_paths.find_one({'learner_id': learner_id}, {'_id': 0})
+       # Revalidation costs two point reads; the path and its current resource are only read when it changed
+       catalog_version = storage.counters.get(CATALOG_COUNTER)
+       current = storage.paths.get_version(learner_id)
+       if current and is_not_modified(path_etag(current[0], catalog_version), current[1]):
+           return not_modified(path_etag(current[0], catalog_version), current[1], LEARNER_CACHE_MAX_AGE)
+       
+       path, current_resource = storage.paths.get_with_current_resource(learner_id)
        if not path:
-           print(f"❌ No learning path found for learner {learner_id}")
+           logger.warning("No learning path found for learner %s", learner_id)
            return jsonify({'success': False, 'error': 'Learning path not found'}), 404
        
-       print(f"📋 Found path: {path}")
-       
-       current_resource_id = None
-       current_resource = None
+       logger.debug("📋 Found path: %s", path)
+       logger.debug("📚 Current resource: %s", current_resource)
        
-       if path['current_position'] < len(path['resources']):
-           current_resource_id = path['resources'][path['current_position']]
-           current_resource = db.learning_resources.find_one({'id': current_resource_id}, {'_id': 0})
-           print(f"📚 Current resource: {current_resource}")
-       
-       return jsonify({
+       response = jsonify({
            'success': True,
            'data': {
                'path_id': path['id'],
                'current_position': path['current_position'],
+               'version': path.get('version', 0),
                'total_resources': len(path['resources']),
                'current_resource': current_resource,
                'progress': path.get('progress', {}),
                'all_resources': path['resources']
            }
        })
+       return with_validators(response, path_etag(path.get('version', 0), catalog_version),
+                              path.get('updated_at'), LEARNER_CACHE_MAX_AGE)
    except Exception as e:
-       print(f"❌ Error getting learning path: {e}")
+       logger.error("❌ Error getting learning path: %s", e)
        return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/api/resource/<resource_id>/quiz', methods=['GET'])
-def get_resource_quiz(resource_id):
+@app.route('/api/resources/seed', methods=['POST'])
+def seed_resources():
    try:
-       print(f"📝 Getting quiz for resource {resource_id}")
-       
-       resource = db.learning_resources.find_one({'id': resource_id}, {'_id': 0})
-       if not resource:
-           return jsonify({'success': False, 'error': 'Resource not found'}), 404
+       # Only bootstraps an empty catalog; replacing a live one is load-data.py's job
+       existing = storage.resources.count()
+       if existing:
+           return jsonify({'success': False,
+                           'error': f'Catalog already has {existing} resources; load-data.py replaces it'}), 409
        
-       questions = orchestrator.content_agent.generate_quiz_questions(resource['topic'], resource['difficulty_level'], 3)
-       
-       quiz = {
-           'id': str(uuid.uuid4()),
-           'resource_id': resource_id,
-           'questions': [asdict(q) for q in questions],
-           'created_at': datetime.utcnow()
-       }
+       logger.info("🌱 Seeding learning resources from the sample catalog")
+       stats = load_catalog(storage, [SAMPLE_CATALOG_PATH])
+       storage.create_indexes()
        
-       db.quizzes.insert_one(quiz)
-       
-       return jsonify({
-           'success': True,
-           'data': {
-               'quiz_id': quiz['id'],
-               'questions': [{'id': q.id, 'question': q.question, 'options': q.options} for q in questions]
-           }
-       })
+       return jsonify({'success': True, 'data': stats})
+   except CatalogError as e:
+       logger.error("❌ Error seeding resources: %s", e)
+       return jsonify({'success': False, 'error': str(e), 'data': e.stats}), 400
    except Exception as e:
-       print(f"❌ Error getting resource quiz: {e}")
+       logger.error("❌ Error seeding resources: %s", e)
        return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/resource/<resource_id>/quiz', methods=['GET'])
+def get_resource_quiz(resource_id):
+    return serve(lambda: service.resource_quiz(resource_id))
+
 @app.route('/api/quiz/<quiz_id>/submit', methods=['POST'])
 def submit_quiz(quiz_id):
-   try:
-       data = request.get_json()
-       user_answers = data.get('answers', {})
-       learner_id = data.get('learner_id')
-       
-       print(f"📝 Submitting quiz {quiz_id} for learner {learner_id}")
-       
-       quiz = db.quizzes.find_one({'id': quiz_id}, {'_id': 0})
-       if not quiz:
-           return jsonify({'success': False, 'error': 'Quiz not found'}), 404
-       
-       questions = [QuizQuestion(**q) for q in quiz['questions']]
-       results = []
-       
-       for question in questions:
-           user_answer = user_answers.get(question.id, '')
-           evaluation = orchestrator.evaluator_agent.evaluate_quiz_response(question, user_answer)
-           results.append(evaluation)
-       
-       overall_feedback = orchestrator.evaluator_agent.generate_overall_feedback(results)
-       
-       # Update learning path progress
-       path = db.learning_paths.find_one({'learner_id': learner_id}, {'_id': 0})
-       if path:
-           if overall_feedback['average_score'] >= 70:
-               new_position = min(path['current_position'] + 1, len(path['resources']) - 1)
-           else:
-               new_position = path['current_position']  # Stay at current position if failed
-           
-           db.learning_paths.update_one(
-               {'learner_id': learner_id},
-               {'$set': {
-                   'current_position': new_position,
-                   f'progress.{quiz["resource_id"]}': overall_feedback,
-                   'updated_at': datetime.utcnow()
-               }}
-           )
-           
-           print(f"📈 Updated learning path position to {new_position}")
-       
-       return jsonify({
-           'success': True,
-           'data': {
-               'results': results,
-               'overall_feedback': overall_feedback,
-               'path_updated': True
-           }
-       })
-   except Exception as e:
-       print(f"❌ Error submitting quiz: {e}")
-       return jsonify({'success': False, 'error': str(e)}), 500
+    return serve(lambda: service.submit_quiz(quiz_id, request.get_json()))
+
+@app.route('/api/attempt/<attempt_id>/feedback', methods=['GET'])
+def get_attempt_feedback(attempt_id):
+    return serve(lambda: service.attempt_feedback(attempt_id))
+
+@app.route('/api/attempt/<attempt_id>/feedback/<question_id>', methods=['GET'])
+def get_question_feedback(attempt_id, question_id):
+    return serve(lambda: service.answer_feedback(attempt_id, question_id))
 
 @app.route('/api/learner/<learner_id>/progress', methods=['GET'])
 def get_learner_progress(learner_id):
    try:
-       profile = db.learner_profiles.find_one({'id': learner_id}, {'_id': 0})
-       path = db.learning_paths.find_one({'learner_id': learner_id}, {'_id': 0})
+       profile_version = storage.profiles.get_version(learner_id)
+       path_version = storage.paths.get_version(learner_id)
+       if profile_version and path_version:
+           etag = progress_etag(profile_version[0], path_version[0])
+           last_modified = latest(profile_version[1], path_version[1])
+           if is_not_modified(etag, last_modified):
+               return not_modified(etag, last_modified, LEARNER_CACHE_MAX_AGE)
+       
+       profile = storage.profiles.get(learner_id)
+       path = storage.paths.get_by_learner(learner_id)
        
        if not profile or not path:
            return jsonify({'success': False, 'error': 'Learner data not found'}), 404
@@ -972,7 +1752,7 @@ def get_learner_progress(learner_id):
        total_resources = len(path['resources'])
        completion_percentage = (completed_resources / total_resources * 100) if total_resources > 0 else 0
        
-       return jsonify({
+       response = jsonify({
            'success': True,
            'data': {
                'learner_profile': profile,
@@ -986,100 +1766,117 @@ def get_learner_progress(learner_id):
                'progress_details': path.get('progress', {})
            }
        })
+       return with_validators(response, progress_etag(profile.get('version', 0), path.get('version', 0)),
+                              latest(profile.get('updated_at') or profile.get('created_at'), path.get('updated_at')),
+                              LEARNER_CACHE_MAX_AGE)
    except Exception as e:
-       print(f"❌ Error getting learner progress: {e}")
+       logger.error("❌ Error getting learner progress: %s", e)
        return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/api/admin/learners', methods=['GET'])
-def get_all_learners():
+@app.route('/api/learner/<learner_id>/attempts', methods=['GET'])
+def get_learner_attempts(learner_id):
    try:
-       learners = list(db.learner_profiles.find({}, {'_id': 0}))
+       limit = max(1, min(100, request.args.get('limit', 20, type=int)))
+       resource_id = request.args.get('resource_id')
        
-       # Sort by creation date (newest first)
-       learners.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+       # Keyset pagination on (timestamp, id): pass the previous page's next_before and
+       # next_before_id to continue, so attempts sharing a timestamp are neither skipped nor repeated
+       before = request.args.get('before')
+       before_id = request.args.get('before_id')
+       if before:
+           try:
+               before = datetime.fromisoformat(before)
+           except ValueError:
+               return jsonify({'success': False, 'error': 'Invalid before timestamp'}), 400
+           # Attempts are stored with naive UTC timestamps
+           if before.tzinfo is not None:
+               before = before.astimezone(timezone.utc).replace(tzinfo=None)
        
-       print(f"📋 Retrieved {len(learners)} learners for admin")
+       attempts = storage.attempts.list_for_learner(learner_id, resource_id, before, limit, before_id)
+       last = attempts[-1] if len(attempts) == limit else None
        
        return jsonify({
            'success': True,
-           'learners': learners,
-           'total': len(learners)
+           'data': {
+               'attempts': attempts,
+               'next_before': last['timestamp'].isoformat() if last else None,
+               'next_before_id': last['id'] if last else None
+           }
        })
    except Exception as e:
-       print(f"❌ Error getting learners: {e}")
+       logger.error("❌ Error getting learner attempts: %s", e)
+       return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/admin/startup', methods=['GET'])
+def get_startup_profile():
+   return jsonify({
+       'success': True,
+       'startup': startup.profile.report(),
+       'built': {
+           'storage': storage.built,
+           'async_storage': async_storage.built,
+           'orchestrator': orchestrator.built
+       }
+   })
+
+@app.route('/api/admin/learners', methods=['GET'])
+def get_all_learners():
+   try:
+       # Newest first, encoded as the cursor is read rather than as one big list
+       learners = storage.profiles.iter_newest_first()
+       logger.debug("📋 Streaming learners for admin")
+       
+       return Response(stream_json({'success': True}, 'learners', learners, count_key='total'),
+                       mimetype='application/json')
+   except Exception as e:
+       logger.error("❌ Error getting learners: %s", e)
        return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/analytics/dashboard', methods=['GET'])
 def get_analytics_dashboard():
    try:
-       total_learners = db.learner_profiles.count_documents({})
-       total_paths = db.learning_paths.count_documents({})
-       total_quizzes = db.quizzes.count_documents({})
-       
-       learning_styles = list(db.learner_profiles.aggregate([
-           {'$group': {'_id': '$learning_style', 'count': {'$sum': 1}}}
-       ]))
+       # Every write that changes these figures bumps the analytics counter
+       etag = f"analytics-{storage.counters.get(ANALYTICS_COUNTER)}"
+       if is_not_modified(etag, None):
+           return not_modified(etag, None, ANALYTICS_CACHE_MAX_AGE)
        
-       avg_completion = list(db.learning_paths.aggregate([
-           {'$project': {
-               'completion_rate': {
-                   '$cond': {
-                       'if': {'$eq': [{'$size': '$resources'}, 0]},
-                       'then': 0,
-                       'else': {
-                           '$multiply': [
-                               {'$divide': ['$current_position', {'$size': '$resources'}]},
-                               100
-                           ]
-                       }
-                   }
-               }
-           }},
-           {'$group': {'_id': None, 'avg_completion': {'$avg': '$completion_rate'}}}
-       ]))
+       total_learners = storage.profiles.count()
+       total_paths = storage.paths.count()
+       total_quizzes = storage.quizzes.count()
+       learning_styles = storage.profiles.learning_style_distribution()
+       avg_completion = storage.paths.average_completion()
        
-       return jsonify({
+       response = jsonify({
            'success': True,
            'analytics': {
                'total_learners': total_learners,
                'total_paths': total_paths,
                'total_quizzes': total_quizzes,
                'learning_styles_distribution': learning_styles,
-               'average_completion_rate': avg_completion[0]['avg_completion'] if avg_completion else 0
+               'average_completion_rate': avg_completion
            }
        })
+       return with_validators(response, etag, None, ANALYTICS_CACHE_MAX_AGE)
    except Exception as e:
-       print(f"❌ Error getting analytics: {e}")
+       logger.error("❌ Error getting analytics: %s", e)
        return jsonify({'success': False, 'error': str(e)}), 500
 
 # AI Test endpoint
 @app.route('/api/ai/test', methods=['POST'])
 def test_ai():
-   try:
-       data = request.get_json()
-       prompt = data.get('prompt', 'Hello, how are you?')
-       
-       gemini = GeminiClient()
-       response = gemini.generate(prompt, max_tokens=500)
-       
-       return jsonify({
-           'success': True,
-           'prompt': prompt,
-           'response': response,
-           'model': 'gemini-2.0-flash-exp'
-       })
-   except Exception as e:
-       print(f"❌ Error testing AI: {e}")
-       return jsonify({'success': False, 'error': str(e)}), 500
+    return serve(lambda: service.test_ai(request.get_json()))
+
+startup.profile.mark('define app')
+startup.profile.check_budget('app import')
 
 if __name__ == '__main__':
-   print("🤖 Starting Personalized Tutor API with Gemini AI")
+   logger.info("🤖 Starting Personalized Tutor API with Gemini AI")
    
-   # Test Gemini connection
-   if test_gemini_connection():
-       print("✅ Ready to serve requests!")
-   else:
-       print("⚠️ Gemini AI connection issues detected, but server will start anyway")
-       print("Make sure to set GEMINI_API_KEY in your .env file")
+   # The live Gemini round-trip is opt-in so restarts stay fast
+   if os.getenv('GEMINI_STARTUP_CHECK', '').lower() in ('1', 'true', 'yes'):
+       if test_gemini_connection():
+           logger.info("✅ Ready to serve requests!")
+       else:
+           logger.warning("⚠️ Gemini AI connection issues detected, but server will start anyway. Make sure to set GEMINI_API_KEY in your .env file")
    
    app.run(debug=True, host='0.0.0.0', port=5000)
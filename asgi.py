@@ -0,0 +1,185 @@
+"""Async serving mode.
+
+Routes whose latency is dominated by Gemini calls are served by coroutines, so
+an in-flight LLM request costs a suspended task instead of a blocked worker.
+Every other request (and CORS preflight) falls through to the Flask app in
+app.py, which remains the synchronous entry point. Both route tables call the
+same handlers, AsyncTutorService here and TutorService in app.py.
+
+Run with: uvicorn asgi:application --host 0.0.0.0 --port 5000
+"""
+import asyncio
+import contextvars
+import json
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+from urllib.parse import parse_qs
+
+import logging
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app import app as flask_app, async_storage, AsyncTutorService, warmup
+from logs import new_request_id, request_id_var
+import metrics
+import serialization
+import tracing
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[..., Awaitable[Tuple[Dict[str, Any], int]]]
+
+wsgi_fallback = WsgiToAsgi(flask_app)
+service = AsyncTutorService(async_storage)
+routes: List[Tuple[str, str, re.Pattern, Handler]] = []
+
+
+def route(method: str, pattern: str):
+    """Register an async handler for a Flask-style path pattern"""
+    regex = re.compile('^' + re.sub(r'<(\w+)>', r'(?P<\1>[^/]+)', pattern) + '$')
+
+    def decorator(handler: Handler) -> Handler:
+        routes.append((method, pattern, regex, handler))
+        return handler
+    return decorator
+
+
+class Request:
+    def __init__(self, scope: Dict, body: bytes):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.args = {k: v[0] for k, v in parse_qs(scope.get('query_string', b'').decode()).items()}
+        self.headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope.get('headers', [])}
+        self.body = body
+
+    def get_json(self) -> Dict:
+        return json.loads(self.body) if self.body else {}
+
+
+async def read_body(receive) -> bytes:
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+async def send_json(send, payload: Dict[str, Any], status: int = 200, accept_encoding: str = None):
+    body = serialization.dumps_bytes(payload)
+    headers = [
+        (b'content-type', b'application/json'),
+        (b'access-control-allow-origin', b'*'),
+        (b'vary', b'Accept-Encoding'),
+        (b'x-request-id', (request_id_var.get() or '').encode())
+    ]
+    encoding = serialization.negotiate_encoding(accept_encoding)
+    if encoding and len(body) >= serialization.COMPRESSION_MIN_BYTES:
+        body = serialization.compress(body, encoding)
+        headers.append((b'content-encoding', encoding.encode()))
+    headers.append((b'content-length', str(len(body)).encode()))
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': headers
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                # Build clients and agents before accepting traffic; the
+                # storage ping may block, so keep it off the event loop
+                await asyncio.get_running_loop().run_in_executor(None, warmup)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    if scope['type'] == 'http':
+        for method, pattern, regex, handler in routes:
+            match = regex.match(scope['path'])
+            if match and scope['method'] == method:
+                started = time.perf_counter()
+                request = Request(scope, await read_body(receive))
+                new_request_id(request.headers.get('x-request-id'))
+                metrics.begin_request()
+                with tracing.span(f"{method} {pattern}", {
+                    'http.method': method, 'http.route': pattern, 'http.target': request.path,
+                    'request_id': request_id_var.get()
+                }):
+                    try:
+                        payload, status = await handler(request, **match.groupdict())
+                    except Exception as e:
+                        logger.exception("❌ Error in %s: %s", handler.__name__, e)
+                        payload, status = {'success': False, 'error': str(e)}, 500
+                    tracing.set_attributes({'http.status_code': status})
+                    await send_json(send, payload, status, request.headers.get('accept-encoding'))
+                metrics.finish_request(pattern, method, status, time.perf_counter() - started)
+                return
+
+    # uvicorn starts the next request on a keep-alive connection from inside the
+    # previous one's send(), so its context (including asgiref's per-request
+    # executor) would leak into this one; run the WSGI bridge in a clean context
+    await contextvars.Context().run(asyncio.ensure_future, wsgi_fallback(scope, receive, send))
+
+
+@route('GET', '/api/health')
+async def health_check(request: Request):
+    return await service.health()
+
+
+@route('POST', '/api/learner/create')
+async def create_learner(request: Request):
+    return await service.create_learner(request.get_json())
+
+
+@route('POST', '/api/learner/<learner_id>/pretest')
+async def conduct_pretest(request: Request, learner_id: str):
+    return await service.conduct_pretest(learner_id, request.get_json())
+
+
+@route('POST', '/api/pretest/<pretest_id>/answer')
+async def answer_pretest(request: Request, pretest_id: str):
+    return await service.answer_pretest(pretest_id, request.get_json())
+
+
+@route('POST', '/api/pretest/<pretest_id>/submit')
+async def submit_pretest(request: Request, pretest_id: str):
+    return await service.submit_pretest(pretest_id, request.get_json())
+
+
+@route('GET', '/api/resource/<resource_id>/quiz')
+async def get_resource_quiz(request: Request, resource_id: str):
+    return await service.resource_quiz(resource_id)
+
+
+@route('POST', '/api/quiz/<quiz_id>/submit')
+async def submit_quiz(request: Request, quiz_id: str):
+    return await service.submit_quiz(quiz_id, request.get_json())
+
+
+@route('GET', '/api/attempt/<attempt_id>/feedback')
+async def get_attempt_feedback(request: Request, attempt_id: str):
+    return await service.attempt_feedback(attempt_id)
+
+
+@route('GET', '/api/attempt/<attempt_id>/feedback/<question_id>')
+async def get_question_feedback(request: Request, attempt_id: str, question_id: str):
+    return await service.answer_feedback(attempt_id, question_id)
+
+
+@route('POST', '/api/ai/test')
+async def test_ai(request: Request):
+    return await service.test_ai(request.get_json())
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    logger.info("🤖 Starting Personalized Tutor API with Gemini AI (async mode)")
+    uvicorn.run(application, host='0.0.0.0', port=5000)
@@ -0,0 +1,245 @@
+"""Microbenchmarks for the pure-CPU hot paths in app.py.
+
+Each case runs at a realistic and at a large input size. Timings are the best
+per-call time over several repeats, compared against benchmarks/baseline.json;
+a case slower than its baseline by more than --threshold is reported as a
+regression and the run exits non-zero.
+
+Baselines are machine specific: record them on the machine that will run the
+comparison.
+
+Usage:
+    python benchmarks/bench_hot_paths.py                 # compare against the baseline
+    python benchmarks/bench_hot_paths.py --save          # record a new baseline
+    python benchmarks/bench_hot_paths.py -k manual_path --threshold 0.1
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+from dataclasses import asdict
+from typing import Any, Callable, Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Importing app must not need a database or print per-call logs
+os.environ.setdefault('STORAGE_BACKEND', 'memory')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+from app import (  # noqa: E402
+    ContentGeneratorAgent, PathGeneratorAgent, EvaluatorAgent,
+    LearnerProfile, LearningResource, QuizQuestion, prepare_questions, build_attempt
+)
+import mastery  # noqa: E402
+import salvage  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+STYLES = ['visual', 'auditory', 'kinesthetic', 'reading', 'universal']
+TOPICS = ['variables', 'linear equations', 'quadratic equations', 'functions', 'graphing',
+          'inequalities', 'polynomials', 'factoring', 'exponents', 'radicals']
+
+
+def make_resources(n: int, rng: random.Random) -> List[LearningResource]:
+    return [
+        LearningResource(
+            id=f'res_{i:06d}', title=f'Resource {i}', type=rng.choice(['video', 'text', 'interactive']),
+            content_url=f'https://example.com/{i}', difficulty_level=rng.randint(1, 5),
+            learning_style=rng.choice(STYLES), topic=rng.choice(TOPICS), prerequisites=[]
+        )
+        for i in range(n)
+    ]
+
+
+def make_questions(n: int, rng: random.Random) -> List[QuizQuestion]:
+    questions = []
+    for i in range(n):
+        options = [f'Option {i}-{k} {rng.random():.6f}' for k in range(4)]
+        questions.append(QuizQuestion(
+            id=str(i), question=f'Question {i} about {rng.choice(TOPICS)}?', options=options,
+            correct_answer=options[0], topic=rng.choice(TOPICS), difficulty_level=rng.randint(1, 5),
+            resource_id=''
+        ))
+    return questions
+
+
+def make_llm_response(size: int, rng: random.Random, as_array: bool) -> str:
+    """A fenced, chatty quiz response of roughly ``size`` bytes.
+
+    Without ``as_array`` the objects are emitted one per block with no
+    enclosing brackets, which salvage_array reads as bare objects."""
+    blocks = []
+    total = 0
+    while total < size:
+        q = make_questions(1, rng)[0]
+        if as_array:
+            block = json.dumps({'question': q.question, 'options': q.options,
+                                'correct_answer': q.correct_answer, 'topic': q.topic}, indent=2)
+        else:
+            block = '{\n' + ',\n'.join(
+                f'  "{key}": {json.dumps(value)}'
+                for key, value in (('question', q.question), ('correct_answer', q.correct_answer), ('topic', q.topic))
+            ) + '\n}'
+        blocks.append(block)
+        total += len(block)
+    body = ('[\n' + ',\n'.join(blocks) + '\n]') if as_array else '\n'.join(blocks)
+    return f"Here are your questions:\n```json\n{body}\n```\nLet me know if you need more!"
+
+
+def make_results(n: int, rng: random.Random) -> List[Dict[str, Any]]:
+    results = []
+    for _ in range(n):
+        is_correct = rng.random() < 0.6
+        results.append({'is_correct': is_correct, 'feedback': 'ok', 'topic': rng.choice(TOPICS),
+                        'score': 100 if is_correct else 0})
+    return results
+
+
+def make_profile() -> LearnerProfile:
+    return LearnerProfile(id='bench', name='Bench Learner', learning_style='visual', knowledge_level=2,
+                          subject='algebra', weak_areas=['factoring', 'radicals', 'graphing'], created_at=None)
+
+
+def build_cases() -> List[Tuple[str, Callable[[], Any]]]:
+    """(name, zero-argument callable) pairs; inputs are built once, up front"""
+    rng = random.Random(42)
+    content = ContentGeneratorAgent()
+    path = PathGeneratorAgent()
+    evaluator = EvaluatorAgent()
+    profile = make_profile()
+
+    cases = []
+    for label, size, as_array in (('2kb', 2_000, True), ('50kb', 50_000, True), ('50kb_objects', 50_000, False)):
+        text = make_llm_response(size, rng, as_array)
+        cases.append((f'salvage_array/{label}', lambda text=text: salvage.salvage_array(text)))
+
+    for n in (40, 100_000):
+        resources = make_resources(n, rng)
+        cases.append((f'manual_path_generation/{n}', lambda r=resources: path._manual_path_generation(profile, r)))
+        cases.append((f'path_prompt/{n}', lambda r=resources: path._path_prompt(profile, r)))
+
+    for n in (5, 10_000):
+        results = make_results(n, rng)
+        cases.append((f'recommendation_prompt/{n}',
+                      lambda r=results: evaluator._recommendation_prompt(evaluator.summarize_results(r))))
+
+    for n in (5, 10_000):
+        questions = make_questions(n, rng)
+        cases.append((f'asdict_questions/{n}', lambda q=questions: [asdict(x) for x in q]))
+        cases.append((f'prepare_questions/{n}', lambda q=questions: prepare_questions(q)))
+
+    for n in (5, 10_000):
+        questions = make_questions(n, rng)
+        answers = {q.id: rng.choice(q.options) for q in questions}
+        attempt = build_attempt('bench', 'quiz', 'quiz', None, questions, answers,
+                                [{'is_correct': answers[q.id] == q.correct_answer} for q in questions],
+                                {'average_score': 0, 'correct_answers': 0, 'total_questions': n})
+        learner = {'knowledge_level': 2, 'mastery': mastery.replay([attempt]).to_doc()}
+        cases.append((f'mastery_update/{n}', lambda a=attempt: mastery.apply_attempt(learner, a)))
+
+    return cases
+
+
+def measure(fn: Callable[[], Any], repeats: int, min_time: float) -> float:
+    """Best per-call time in seconds over ``repeats`` timed batches.
+
+    Like timeit, the garbage collector is paused while timing so collections
+    triggered by earlier cases do not land in this one."""
+    gc_was_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        return _best_time(fn, repeats, min_time)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def _best_time(fn: Callable[[], Any], repeats: int, min_time: float) -> float:
+    fn()  # warm up
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+
+    best = elapsed / number
+    for _ in range(repeats - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - started) / number)
+    return best
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('µs', 1e-6)):
+        if seconds >= scale:
+            return f'{seconds / scale:.2f}{unit}'
+    return f'{seconds / 1e-9:.0f}ns'
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the CPU hot paths and flag regressions")
+    parser.add_argument('--save', action='store_true', help="write the results as the new baseline")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="allowed slowdown against the baseline (0.25 = 25%%)")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2, help="minimum seconds per timed batch")
+    parser.add_argument('-k', dest='pattern', help="only run cases whose name contains this")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+
+    baseline: Dict[str, float] = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+
+    results: Dict[str, float] = {}
+    regressions = []
+    cases = build_cases()
+    print(f"{'case':<40}{'time':>12}{'baseline':>12}{'change':>9}")
+    for name, fn in cases:
+        if args.pattern and args.pattern not in name:
+            continue
+        seconds = measure(fn, args.repeats, args.min_time)
+        results[name] = seconds
+
+        line = f'{name:<40}{format_time(seconds):>12}'
+        if name in baseline:
+            change = seconds / baseline[name] - 1
+            line += f'{format_time(baseline[name]):>12}{change:>+8.0%}'
+            if change > args.threshold:
+                regressions.append(name)
+                line += '  ❌ regression'
+        print(line, flush=True)
+
+    if args.save:
+        # Keep the baselines of cases not run this time (-k), but not of cases that no longer exist
+        names = {name for name, _ in cases}
+        merged = {**{name: seconds for name, seconds in baseline.items() if name in names}, **results}
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'results': merged}, f, indent=2, sort_keys=True)
+        print(f"\n💾 Saved {len(results)} results to {args.baseline}")
+        return 0
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""Encoding cost and bytes on the wire for the largest API payloads.
+
+Compares Flask's default JSON provider with serialization.FastJSONProvider,
+and reports response sizes uncompressed, gzipped and (if brotli is installed)
+brotli-compressed.
+
+Usage:
+    python benchmarks/bench_serialization.py
+"""
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from bench_hot_paths import TOPICS, STYLES, format_time, measure
+
+import serialization
+from serialization import FastJSONProvider, compress, stream_json
+
+
+def learner_profiles(n: int, rng: random.Random) -> List[Dict[str, Any]]:
+    start = datetime(2026, 1, 1)
+    return [{
+        'id': str(uuid.uuid4()), 'name': f'Learner {i}', 'learning_style': rng.choice(STYLES),
+        'knowledge_level': rng.randint(1, 5), 'subject': 'algebra',
+        'weak_areas': rng.sample(TOPICS, 3), 'created_at': start + timedelta(minutes=i)
+    } for i in range(n)]
+
+
+def progress_payload(rng: random.Random) -> Dict[str, Any]:
+    profile = learner_profiles(1, rng)[0]
+    progress = {
+        f'res_{i:04d}': {
+            'average_score': rng.choice([0, 33.3, 66.7, 100]), 'correct_answers': rng.randint(0, 3),
+            'total_questions': 3, 'best_score': 100, 'attempts': rng.randint(1, 4),
+            'last_attempt_at': datetime(2026, 3, 1) + timedelta(hours=i), 'last_attempt_id': str(uuid.uuid4())
+        } for i in range(200)
+    }
+    return {'success': True, 'data': {
+        'learner_profile': profile,
+        'learning_path': {'id': str(uuid.uuid4()), 'current_position': 120, 'total_resources': 200,
+                          'completed_resources': 110, 'completion_percentage': 55.0},
+        'progress_details': progress
+    }}
+
+
+def pretest_results(n: int, rng: random.Random) -> Dict[str, Any]:
+    feedback = ("Good effort on this question. Review how the underlying rule applies to each option "
+                "and try a similar problem to reinforce the concept.")
+    results = [{'is_correct': rng.random() < 0.6, 'feedback': feedback, 'topic': rng.choice(TOPICS),
+                'score': rng.choice([0, 100])} for _ in range(n)]
+    return {'success': True, 'results': results, 'overall_feedback': {
+        'average_score': 60.0, 'total_questions': n, 'correct_answers': n * 3 // 5,
+        'weak_topics': TOPICS[:4], 'strong_topics': TOPICS[4:], 'recommendation': 'Keep practising.'
+    }, 'weak_areas': TOPICS[:3]}
+
+
+def main() -> int:
+    rng = random.Random(7)
+    app = Flask(__name__)
+    default = DefaultJSONProvider(app)
+    fast = FastJSONProvider(app)
+
+    learners = learner_profiles(10_000, rng)
+    payloads = {
+        'admin_learners/10000': {'success': True, 'learners': learners, 'total': len(learners)},
+        'learner_progress/200': progress_payload(rng),
+        'pretest_results/50': pretest_results(50, rng),
+    }
+
+    print(f"{'payload':<26}{'default':>11}{'fast':>11}{'speedup':>9}{'raw':>10}{'gzip':>10}"
+          + (f"{'br':>10}" if serialization.brotli else ''))
+    for name, payload in payloads.items():
+        before = measure(lambda: default.dumps(payload).encode('utf-8'), 3, 0.2)
+        after = measure(lambda: serialization.dumps_bytes(payload), 3, 0.2)
+        body = serialization.dumps_bytes(payload)
+        line = (f'{name:<26}{format_time(before):>11}{format_time(after):>11}{before / after:>8.1f}x'
+                f'{len(body):>10,}{len(compress(body, "gzip")):>10,}')
+        if serialization.brotli:
+            line += f'{len(compress(body, "br")):>10,}'
+        print(line)
+
+    streamed = measure(lambda: b''.join(stream_json({'success': True}, 'learners', learners, 'total')), 3, 0.2)
+    print(f"\n{'admin_learners streamed':<26}{'':>11}{format_time(streamed):>11}"
+          f"  (peak chunk {serialization.STREAM_BATCH_SIZE} profiles)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""Cold-start time of a fresh worker importing app.py.
+
+Each run imports app in a new interpreter and reports the wall time of the
+import together with the startup profile (see startup.py); --warm also builds
+storage and the agents the way a worker's lifespan hook does. The slowest
+modules from ``python -X importtime`` are listed so a new heavy import is easy
+to spot. Exits non-zero when the median exceeds COLD_START_BUDGET_MS.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 10 --warm
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from startup import COLD_START_BUDGET_MS  # noqa: E402
+
+PROBE = """
+import json, time
+started = time.perf_counter()
+import app
+if {warm}:
+    app.warmup()
+elapsed = (time.perf_counter() - started) * 1000
+print(json.dumps({{'ms': elapsed, 'profile': app.startup.profile.report(),
+                   'storage_built': app.storage.built}}))
+"""
+
+
+def child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault('STORAGE_BACKEND', 'memory')
+    env['LOG_LEVEL'] = 'WARNING'
+    return env
+
+
+def run_once(warm: bool) -> Dict[str, Any]:
+    out = subprocess.run([sys.executable, '-c', PROBE.format(warm=warm)], cwd=ROOT, env=child_env(),
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(limit: int) -> List[Tuple[str, float]]:
+    """Modules app imports directly, by cumulative import time, from -X importtime"""
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=ROOT,
+                         env=child_env(), capture_output=True, text=True, check=True)
+    totals: Dict[str, float] = {}
+    for line in out.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:  # imported directly by app
+            totals[name.strip()] = int(cumulative) / 1000
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure the cold-start time of importing app.py")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--warm', action='store_true', help="also build storage and agents")
+    parser.add_argument('--top', type=int, default=10, help="number of slowest imports to list")
+    args = parser.parse_args(argv)
+
+    runs = [run_once(args.warm) for _ in range(args.runs)]
+    times = sorted(run['ms'] for run in runs)
+    median = statistics.median(times)
+    print(f"import app{' + warmup' if args.warm else ''}: median {median:.0f}ms, "
+          f"min {times[0]:.0f}ms, max {times[-1]:.0f}ms over {args.runs} runs")
+    if not args.warm and any(run['storage_built'] for run in runs):
+        print("❌ Importing app built storage; it should be built lazily")
+        return 1
+
+    print(f"\n{'step':<36}{'ms':>10}")
+    for step in runs[len(runs) // 2]['profile']['steps']:
+        print(f"{step['step']:<36}{step['ms']:>10.1f}")
+
+    print(f"\n{'slowest imports':<36}{'ms':>10}")
+    for name, ms in slowest_imports(args.top):
+        print(f'{name:<36}{ms:>10.1f}')
+
+    if median > COLD_START_BUDGET_MS:
+        print(f"\n❌ Median cold start {median:.0f}ms is over the {COLD_START_BUDGET_MS:.0f}ms budget")
+        return 1
+    print(f"\n✅ Within the {COLD_START_BUDGET_MS:.0f}ms budget")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
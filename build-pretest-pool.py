@@ -0,0 +1,122 @@
+import argparse
+import asyncio
+import re
+import sys
+import time
+from collections import Counter
+
+from app import orchestrator, prepare_questions
+from storage import create_storage
+
+# Storage backend selected by STORAGE_BACKEND (MongoDB by default)
+storage = create_storage()
+
+MIN_QUESTION_LENGTH = 10
+
+def normalize(text):
+    return ' '.join(re.findall(r'\w+', text.lower()))
+
+def vet(question, seen):
+    """Why a generated question may not join the pool, or None if it may"""
+    options = [normalize(option) for option in question.options]
+    if len(options) != 4 or not all(options) or len(set(options)) < len(options):
+        return "empty or repeated options"
+    if question.correct_answer not in question.options:
+        return "correct answer is not an option"
+    if len(question.explanations) != len(question.options):
+        return "missing per-option explanations"
+    text = normalize(question.question)
+    if len(text) < MIN_QUESTION_LENGTH:
+        return "question too short"
+    if text in seen:
+        return "duplicate question"
+    seen.add(text)
+    return None
+
+async def generate(subject, topics, levels, per_level, batch_size, concurrency):
+    """Generate ``per_level`` questions for every topic and difficulty level, ``concurrency`` batches at a time"""
+    semaphore = asyncio.Semaphore(concurrency)
+    failed = Counter()
+
+    async def batch(topic, level, count):
+        async with semaphore:
+            try:
+                questions = await orchestrator.content_agent.agenerate_ai_quiz_questions(f"{topic} ({subject})", level, count)
+            except Exception as e:
+                print(f"⚠️  {topic} level {level}: {e}")
+                failed[topic] += count
+                return []
+        for question in questions:
+            question.topic = topic
+        return questions
+
+    batches = await asyncio.gather(*[
+        batch(topic, level, min(batch_size, per_level - done))
+        for topic in topics for level in levels for done in range(0, per_level, batch_size)
+    ])
+    return [question for questions in batches for question in questions], failed
+
+def build_pool(subject, topics, levels=range(1, 6), per_level=4, batch_size=4, concurrency=4, dry_run=False):
+    """Generate, vet and store pretest pool questions for ``subject``"""
+
+    existing = storage.questions.pool(subject)
+    seen = {normalize(doc['question']) for doc in existing}
+
+    questions, failed = asyncio.run(generate(subject, topics, list(levels), per_level, batch_size, concurrency))
+    rejected = Counter()
+    vetted = []
+    for question in questions:
+        reason = vet(question, seen)
+        if reason:
+            rejected[reason] += 1
+        else:
+            vetted.append(question)
+
+    if vetted and not dry_run:
+        storage.questions.save_many(prepare_questions(vetted, subject))
+    return {
+        'existing': len(existing),
+        'generated': len(questions),
+        'added': len(vetted),
+        'rejected': dict(rejected),
+        'failed': sum(failed.values()),
+        'topics': Counter(q.topic for q in vetted)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Grow a subject's pretest pool with vetted generated questions")
+    parser.add_argument('subject', help="Subject the pretests are for")
+    parser.add_argument('--topics', nargs='+', required=True,
+                        help="Topics of the subject to cover, e.g. the catalog topics it spans")
+    parser.add_argument('--levels', nargs='+', type=int, default=[1, 2, 3, 4, 5], help="Difficulty levels to cover")
+    parser.add_argument('--per-level', type=int, default=4, help="Questions to generate per topic and level")
+    parser.add_argument('--batch-size', type=int, default=4, help="Questions per Gemini request")
+    parser.add_argument('--concurrency', type=int, default=4, help="Gemini requests in flight")
+    parser.add_argument('--dry-run', action='store_true', help="Generate and vet without storing questions")
+    args = parser.parse_args()
+
+    print(f"📡 Connecting to {storage.describe()} storage...")
+
+    try:
+        storage.ping()
+        storage.create_indexes()
+        started = time.perf_counter()
+        stats = build_pool(args.subject, args.topics, args.levels, args.per_level, args.batch_size,
+                           args.concurrency, args.dry_run)
+        elapsed = time.perf_counter() - started
+
+        print(f"✅ {'Would add' if args.dry_run else 'Added'} {stats['added']} of {stats['generated']} generated questions "
+              f"to the {args.subject} pool ({stats['existing']} before) in {elapsed:.1f}s")
+        for topic, count in sorted(stats['topics'].items()):
+            print(f"   - {topic}: {count}")
+        if stats['rejected']:
+            print(f"⚠️  Rejected: {stats['rejected']}")
+        if stats['failed']:
+            print(f"⚠️  {stats['failed']} questions could not be generated")
+
+    except Exception as e:
+        print(f"❌ Building the pretest pool failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import sys
+import time
+from collections import defaultdict
+
+import adaptive
+from storage import create_storage
+
+# Storage backend selected by STORAGE_BACKEND (MongoDB by default)
+storage = create_storage()
+
+def pretest_histories():
+    """Graded (question id, correct) pairs of every pretest attempt"""
+    for attempt in storage.attempts.iter_by_learner():
+        if attempt.get('kind') == 'pretest':
+            yield [(r['question_id'], r['is_correct']) for r in attempt.get('responses', [])]
+
+def calibrate_items(subjects=None, min_responses=20, dry_run=False):
+    """Re-estimate the IRT parameters of every pool question from pretest history"""
+
+    histories = list(pretest_histories())
+    question_ids = sorted({question_id for history in histories for question_id, _ in history})
+    pool_docs = [doc for doc in storage.questions.get_many(question_ids) if doc.get('subject')]
+    subject_of = {doc['id']: doc['subject'] for doc in pool_docs}
+
+    # Abilities differ per subject, so each subject's pool is calibrated on its own
+    items = defaultdict(dict)
+    for doc in pool_docs:
+        if not subjects or doc['subject'] in subjects:
+            items[doc['subject']][doc['id']] = adaptive.item_from_doc(doc)
+    by_subject = defaultdict(list)
+    for history in histories:
+        subject = next((subject_of[question_id] for question_id, _ in history if question_id in subject_of), None)
+        if subject in items:
+            by_subject[subject].append(history)
+
+    stats = {}
+    for subject, subject_items in sorted(items.items()):
+        parameters = adaptive.calibrate(by_subject[subject], subject_items, min_responses=min_responses)
+        if parameters and not dry_run:
+            storage.questions.set_parameters(parameters)
+        stats[subject] = {'attempts': len(by_subject[subject]), 'items': len(subject_items),
+                          'calibrated': len(parameters)}
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalibrate pretest pool items from submission history")
+    parser.add_argument('subjects', nargs='*', help="Subjects to calibrate (defaults to all)")
+    parser.add_argument('--min-responses', type=int, default=20,
+                        help="Responses an item needs before its parameters are re-estimated")
+    parser.add_argument('--dry-run', action='store_true', help="Estimate without storing parameters")
+    args = parser.parse_args()
+
+    print(f"📡 Connecting to {storage.describe()} storage...")
+
+    try:
+        storage.ping()
+        started = time.perf_counter()
+        stats = calibrate_items(args.subjects, args.min_responses, args.dry_run)
+        elapsed = time.perf_counter() - started
+
+        print(f"✅ Calibrated {len(stats)} subjects in {elapsed:.1f}s")
+        for subject, subject_stats in stats.items():
+            print(f"   - {subject}: {subject_stats['calibrated']}/{subject_stats['items']} items "
+                  f"{'would be ' if args.dry_run else ''}updated from {subject_stats['attempts']} pretests")
+
+    except Exception as e:
+        print(f"❌ Calibration failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
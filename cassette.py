@@ -0,0 +1,163 @@
+"""Record Gemini exchanges to a cassette file and replay them offline.
+
+In record mode every generateContent response the agents receive is appended
+to a JSON Lines cassette, with the model, the request payload and the latency
+observed. In replay mode the same requests are answered from the cassette
+without any network access, so runs of the agents, routes or load tests can be
+repeated on identical inputs and compared across code changes.
+
+- Responses are looked up by a hash of the model and payload. A request
+  recorded several times (e.g. feedback on a popular question) replays its
+  responses in recorded order, then keeps repeating the last one.
+- Throttled and failed responses are recorded too, so failovers replay as
+  they happened. Transport errors such as timeouts have no response and
+  are not recorded.
+- Replay waits for the recorded latency times GEMINI_CASSETTE_LATENCY:
+  1 replays the original timings, 0 answers at once.
+- A request missing from the cassette fails like an unreachable Gemini, so
+  the agents take their usual fallbacks; misses are counted in metrics.
+
+The API key is sent in the URL, never in the payload, so cassettes hold no
+credentials.
+
+Environment:
+    GEMINI_CASSETTE          cassette file; unset disables recording and replay
+    GEMINI_CASSETTE_MODE     record or replay (default replay)
+    GEMINI_CASSETTE_LATENCY  scale applied to recorded latencies on replay (default 1)
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import httpx
+import requests
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+RECORD = 'record'
+REPLAY = 'replay'
+MODES = (RECORD, REPLAY)
+
+
+class CassetteMiss(Exception):
+    """The request was never recorded"""
+
+
+class Exchange(NamedTuple):
+    status: int
+    body: str
+    latency: float
+
+    def to_requests(self, url: str) -> requests.Response:
+        """The exchange as the response ``requests.post`` would have returned"""
+        response = requests.Response()
+        response.status_code = self.status
+        response._content = self.body.encode('utf-8')
+        response.encoding = 'utf-8'
+        response.url = url
+        return response
+
+    def to_httpx(self, url: str) -> httpx.Response:
+        """The exchange as the response ``httpx.AsyncClient.post`` would have returned"""
+        return httpx.Response(self.status, content=self.body.encode('utf-8'), request=httpx.Request('POST', url))
+
+
+def request_key(model: str, payload: Dict[str, Any]) -> str:
+    """Stable hash of a request, independent of key order"""
+    canonical = json.dumps({'model': model, 'payload': payload}, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class Cassette:
+    """A JSON Lines file of recorded Gemini exchanges, indexed by request"""
+
+    def __init__(self, path: str, mode: str = REPLAY, latency_scale: float = 1.0):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}', expected one of {MODES}")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.lock = threading.Lock()
+        self.index: Dict[str, List[Exchange]] = defaultdict(list)
+        # Next recording to replay per request
+        self.played: Dict[str, int] = defaultdict(int)
+        if mode == REPLAY:
+            self._load()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == REPLAY
+
+    def _load(self) -> None:
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.index[entry['key']].append(Exchange(entry['status'], entry['body'], entry['latency']))
+        logger.info("📼 Replaying %s Gemini exchanges for %s requests from %s",
+                    sum(map(len, self.index.values())), len(self.index), self.path)
+
+    def record(self, model: str, payload: Dict[str, Any], status: int, body: str, latency: float) -> None:
+        line = json.dumps({
+            'key': request_key(model, payload),
+            'model': model,
+            'payload': payload,
+            'status': status,
+            'body': body,
+            'latency': round(latency, 4),
+            'recorded_at': datetime.now(timezone.utc).isoformat()
+        }, ensure_ascii=False) + '\n'
+        # One append per exchange, so concurrent requests never interleave lines
+        with self.lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+    def play(self, model: str, payload: Dict[str, Any]) -> Exchange:
+        """The next recorded exchange for the request; raises CassetteMiss if it was never recorded"""
+        key = request_key(model, payload)
+        with self.lock:
+            recorded = self.index.get(key)
+            if not recorded:
+                metrics.record_cassette_lookup('miss')
+                raise CassetteMiss(f"No recorded {model} response for request {key[:12]}")
+            played = self.played[key]
+            self.played[key] = played + 1
+        metrics.record_cassette_lookup('hit')
+        return recorded[min(played, len(recorded) - 1)]
+
+    def delay(self, exchange: Exchange) -> float:
+        """Seconds to wait before serving a replayed exchange"""
+        return exchange.latency * self.latency_scale
+
+
+_active: Optional[Cassette] = None
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def active() -> Optional[Cassette]:
+    """The cassette configured by the environment, opened on first use; None when disabled"""
+    global _active, _configured
+    if not _configured:
+        with _configure_lock:
+            if not _configured:
+                path = os.getenv('GEMINI_CASSETTE')
+                if path:
+                    _active = Cassette(path, os.getenv('GEMINI_CASSETTE_MODE', REPLAY).lower(),
+                                       float(os.getenv('GEMINI_CASSETTE_LATENCY', '1')))
+                    logger.info("📼 Gemini cassette %s in %s mode", path, _active.mode)
+                _configured = True
+    return _active
+
+
+def use(cassette: Optional[Cassette]) -> None:
+    """Record to or replay from ``cassette`` instead of the environment's, e.g. in a benchmark; None disables"""
+    global _active, _configured
+    with _configure_lock:
+        _active, _configured = cassette, True
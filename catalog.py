@@ -0,0 +1,131 @@
+"""Streaming loader for the learning resource catalog.
+
+Resources are read from JSONL or CSV files one row at a time, validated, and
+written in batches of bulk upserts. A full load goes into a staging area that
+is published atomically, so the live catalog is never empty while loading.
+Memory use is bounded by the batch size plus the set of distinct topics."""
+import csv
+import json
+import os
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Union
+
+SAMPLE_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'sample_resources.jsonl')
+
+REQUIRED_FIELDS = ['id', 'title', 'type', 'content_url', 'difficulty_level', 'learning_style', 'topic']
+MAX_REPORTED_ERRORS = 20
+
+
+class CatalogError(Exception):
+    """Raised when a catalog cannot be published"""
+
+    def __init__(self, message: str, stats: Dict):
+        super().__init__(message)
+        self.stats = stats
+
+
+def read_resources(path: str) -> Iterator[Union[Dict, ValueError]]:
+    """Yield raw resource rows from a .jsonl or .csv file without loading it whole.
+
+    A line that is not valid JSON is yielded as the ValueError describing it,
+    so one bad line is rejected like any invalid row instead of ending the load."""
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith('.csv'):
+            for row in csv.DictReader(f):
+                # Prerequisites are a ';'-separated list in CSV files
+                prerequisites = row.get('prerequisites') or ''
+                row['prerequisites'] = [p.strip() for p in prerequisites.split(';') if p.strip()]
+                yield row
+        else:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield ValueError(f"invalid JSON: {e}")
+
+
+def normalize_resource(raw: Dict) -> Dict:
+    """Validate a raw row and coerce it to the LearningResource shape"""
+    missing = [field for field in REQUIRED_FIELDS if raw.get(field) in (None, '')]
+    if missing:
+        raise ValueError(f"missing fields {missing}")
+
+    difficulty = int(raw['difficulty_level'])
+    if not 1 <= difficulty <= 5:
+        raise ValueError(f"difficulty_level {difficulty} out of range 1-5")
+
+    prerequisites = raw.get('prerequisites') or []
+    if not isinstance(prerequisites, list):
+        raise ValueError("prerequisites must be a list")
+
+    return {
+        'id': str(raw['id']),
+        'title': str(raw['title']),
+        'type': str(raw['type']),
+        'content_url': str(raw['content_url']),
+        'difficulty_level': difficulty,
+        'learning_style': str(raw['learning_style']),
+        'topic': str(raw['topic']),
+        'prerequisites': [str(p) for p in prerequisites]
+    }
+
+
+def _batches(rows: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def load_catalog(storage, sources: List[str], batch_size: int = 1000, swap: bool = True) -> Dict:
+    """Stream resources from ``sources`` into the catalog.
+
+    With ``swap`` the files replace the whole catalog: rows go to a staging area
+    that is published only if every prerequisite names a topic in the new
+    catalog. Without it, rows are upserted into the live catalog and checked
+    against the topics it already has."""
+    stats = {'loaded': 0, 'rejected': 0, 'errors': [], 'topics': 0,
+             'unknown_prerequisites': [], 'published': False}
+    topics = set() if swap else set(storage.resources.topics())
+    prerequisites = set()
+
+    def valid_rows():
+        for source in sources:
+            for row_number, raw in enumerate(read_resources(source), start=1):
+                try:
+                    if isinstance(raw, ValueError):
+                        raise raw
+                    resource = normalize_resource(raw)
+                except (ValueError, TypeError) as e:
+                    stats['rejected'] += 1
+                    if len(stats['errors']) < MAX_REPORTED_ERRORS:
+                        stats['errors'].append(f"{os.path.basename(source)}:{row_number}: {e}")
+                    continue
+                topics.add(resource['topic'])
+                prerequisites.update(resource['prerequisites'])
+                yield resource
+
+    target = storage.resources.begin_load() if swap else storage.resources
+    try:
+        for batch in _batches(valid_rows(), batch_size):
+            stats['loaded'] += target.upsert_batch(batch)
+
+        stats['topics'] = len(topics)
+        stats['unknown_prerequisites'] = sorted(prerequisites - topics)
+
+        if swap:
+            if stats['unknown_prerequisites']:
+                raise CatalogError(f"Prerequisites reference unknown topics: {stats['unknown_prerequisites'][:10]}", stats)
+            if not stats['loaded']:
+                raise CatalogError("No valid resources to publish", stats)
+            target.publish()
+        stats['published'] = True
+        return stats
+    except Exception:
+        if swap:
+            target.discard()
+        raise
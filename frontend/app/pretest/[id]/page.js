@@ -15,6 +15,7 @@ export default function PretestPage({ params }) {
   const [pretest, setPretest] = useState(null);
   const [answers, setAnswers] = useState({});
   const [currentQuestion, setCurrentQuestion] = useState(0);
+  const [isAnswering, setIsAnswering] = useState(false);
 
   useEffect(() => {
     if (learnerId) {
@@ -55,6 +56,8 @@ export default function PretestPage({ params }) {
     }));
   };
 
+  const isAdaptive = pretest?.mode === 'adaptive';
+
   const handleNextQuestion = () => {
     const currentQuestionId = pretest.questions[currentQuestion].id;
     const currentAnswer = answers[currentQuestionId];
@@ -64,11 +67,60 @@ export default function PretestPage({ params }) {
       return;
     }
 
+    if (isAdaptive) {
+      answerAdaptiveQuestion(currentQuestionId, currentAnswer);
+      return;
+    }
+
     if (currentQuestion < pretest.questions.length - 1) {
       setCurrentQuestion(prev => prev + 1);
     }
   };
 
+  // Adaptive pretests choose each question from the previous answers, so they
+  // are answered one at a time and finish once the estimate is precise enough
+  const answerAdaptiveQuestion = async (questionId, answer) => {
+    setIsAnswering(true);
+    try {
+      const response = await apiClient.answerPretest(pretest.pretest_id, questionId, answer);
+      if (!response.success) {
+        throw new Error(response.error || 'Failed to record answer');
+      }
+      if (response.finished) {
+        await finishPretest({});
+        return;
+      }
+      setPretest(prev => ({ ...prev, questions: [...prev.questions, response.question] }));
+      setAnswers(prev => ({ ...prev, [response.question.id]: '' }));
+      setCurrentQuestion(prev => prev + 1);
+    } catch (error) {
+      console.error('Error answering pretest question:', error);
+      toast.error(error.message || 'Failed to record answer');
+    } finally {
+      setIsAnswering(false);
+    }
+  };
+
+  const finishPretest = async (finalAnswers) => {
+    setIsSubmitting(true);
+
+    try {
+      const response = await apiClient.submitPretest(pretest.pretest_id, finalAnswers);
+      
+      if (response.success) {
+        toast.success('Pretest completed successfully!');
+        router.push(`/learning-path/${learnerId}`);
+      } else {
+        throw new Error(response.error || 'Failed to submit pretest');
+      }
+    } catch (error) {
+      console.error('Error submitting pretest:', error);
+      toast.error(error.message || 'Failed to submit pretest');
+    } finally {
+      setIsSubmitting(false);
+    }
+  };
+
   const handlePreviousQuestion = () => {
     if (currentQuestion > 0) {
       setCurrentQuestion(prev => prev - 1);
@@ -101,30 +153,13 @@ export default function PretestPage({ params }) {
       return;
     }
 
-    setIsSubmitting(true);
-
-    try {
-      // Filter out empty answers
-      const finalAnswers = Object.fromEntries(
-        Object.entries(answers).filter(([_, answer]) => answer !== '')
-      );
+    // Filter out empty answers
+    const finalAnswers = Object.fromEntries(
+      Object.entries(answers).filter(([_, answer]) => answer !== '')
+    );
 
-      console.log('Submitting answers:', finalAnswers);
-      
-      const response = await apiClient.submitPretest(pretest.pretest_id, finalAnswers);
-      
-      if (response.success) {
-        toast.success('Pretest completed successfully!');
-        router.push(`/learning-path/${learnerId}`);
-      } else {
-        throw new Error(response.error || 'Failed to submit pretest');
-      }
-    } catch (error) {
-      console.error('Error submitting pretest:', error);
-      toast.error(error.message || 'Failed to submit pretest');
-    } finally {
-      setIsSubmitting(false);
-    }
+    console.log('Submitting answers:', finalAnswers);
+    await finishPretest(finalAnswers);
   };
 
   if (isLoading) {
@@ -152,7 +187,9 @@ export default function PretestPage({ params }) {
   }
 
   const question = pretest.questions[currentQuestion];
-  const progress = ((currentQuestion + 1) / pretest.questions.length) * 100;
+  // Adaptive pretests stop early once the estimate is precise, so their length is an upper bound
+  const totalQuestions = isAdaptive ? pretest.max_questions : pretest.questions.length;
+  const progress = ((currentQuestion + 1) / totalQuestions) * 100;
   const answeredCount = Object.values(answers).filter(answer => answer !== '').length;
   const currentAnswer = answers[question.id] || '';
 
@@ -175,11 +212,13 @@ export default function PretestPage({ params }) {
               ></div>
             </div>
             <p className="text-sm text-gray-500 mt-2">
-              Question {currentQuestion + 1} of {pretest.questions.length}
-            </p>
-            <p className="text-xs text-gray-400">
-              Answered: {answeredCount}/{pretest.questions.length}
+              Question {currentQuestion + 1} of {isAdaptive ? `at most ${totalQuestions}` : totalQuestions}
             </p>
+            {!isAdaptive && (
+              <p className="text-xs text-gray-400">
+                Answered: {answeredCount}/{totalQuestions}
+              </p>
+            )}
           </div>
         </div>
 
@@ -222,15 +261,16 @@ export default function PretestPage({ params }) {
                 <Button
                   variant="secondary"
                   onClick={handlePreviousQuestion}
-                  disabled={currentQuestion === 0}
+                  disabled={currentQuestion === 0 || isAdaptive}
                 >
                   Previous
                 </Button>
 
                 <div className="flex space-x-3">
-                  {currentQuestion < pretest.questions.length - 1 ? (
+                  {isAdaptive || currentQuestion < pretest.questions.length - 1 ? (
                     <Button
                       onClick={handleNextQuestion}
+                      loading={isAnswering || isSubmitting}
                       disabled={!currentAnswer}
                     >
                       Next Question
@@ -251,7 +291,8 @@ export default function PretestPage({ params }) {
           </CardContent>
         </Card>
 
-        {/* Question navigation */}
+        {/* Question navigation; adaptive pretests cannot revisit answered questions */}
+        {!isAdaptive && (
         <div className="mt-6 flex justify-center">
           <div className="flex flex-wrap gap-2 justify-center">
             {pretest.questions.map((q, index) => {
@@ -276,6 +317,7 @@ export default function PretestPage({ params }) {
             })}
           </div>
         </div>
+        )}
 
         {/* Progress indicators */}
         <div className="mt-6 grid grid-cols-5 gap-2">
@@ -300,12 +342,14 @@ export default function PretestPage({ params }) {
           })}
         </div>
 
+        {!isAdaptive && (
         <div className="mt-4 text-center">
           <p className="text-sm text-gray-500">
             Click on question numbers to jump between questions. 
             Green indicates completed questions.
           </p>
         </div>
+        )}
       </div>
     </div>
   );
@@ -20,6 +20,8 @@ export default function QuizPage({ params }) {
   const [answers, setAnswers] = useState({});
   const [results, setResults] = useState(null);
   const [showResults, setShowResults] = useState(false);
+  const [recommendation, setRecommendation] = useState(null);
+  const [explanations, setExplanations] = useState({});
 
   useEffect(() => {
     if (resourceId) {
@@ -86,6 +88,7 @@ export default function QuizPage({ params }) {
         setResults(response.data);
         setShowResults(true);
         toast.success('Quiz completed successfully!');
+        loadRecommendation(response.data.attempt_id);
       } else {
         throw new Error(response.error || 'Failed to submit quiz');
       }
@@ -97,6 +100,48 @@ export default function QuizPage({ params }) {
     }
   };
 
+  const loadRecommendation = async (attemptId) => {
+    try {
+      const response = await apiClient.getAttemptFeedback(attemptId);
+      if (response.success) {
+        setRecommendation(response.data.recommendation);
+      }
+    } catch (error) {
+      console.error('Error loading recommendation:', error);
+    }
+  };
+
+  // Most explanations come with the results; the rest are generated the first time a learner opens one
+  const toggleExplanation = async (questionId) => {
+    const current = explanations[questionId];
+    if (current) {
+      setExplanations(prev => ({ ...prev, [questionId]: { ...current, open: !current.open } }));
+      return;
+    }
+
+    const included = results.results.find(result => result.question_id === questionId)?.feedback;
+    if (included) {
+      setExplanations(prev => ({ ...prev, [questionId]: { open: true, text: included } }));
+      return;
+    }
+
+    setExplanations(prev => ({ ...prev, [questionId]: { open: true, loading: true } }));
+    try {
+      const response = await apiClient.getQuestionFeedback(results.attempt_id, questionId);
+      if (!response.success) {
+        throw new Error(response.error || 'Failed to load explanation');
+      }
+      setExplanations(prev => ({ ...prev, [questionId]: { open: true, text: response.data.feedback } }));
+    } catch (error) {
+      console.error('Error loading explanation:', error);
+      toast.error('Failed to load explanation');
+      setExplanations(prev => {
+        const { [questionId]: _, ...rest } = prev;
+        return rest;
+      });
+    }
+  };
+
   const handleContinue = () => {
     if (learnerId) {
       router.push(`/learning-path/${learnerId}`);
@@ -173,9 +218,11 @@ export default function QuizPage({ params }) {
                   <h3 className="font-medium text-gray-900 mb-2">
                     Recommendation
                   </h3>
-                  <p className="text-gray-600">
-                    {results.overall_feedback.recommendation}
-                  </p>
+                  {recommendation ? (
+                    <p className="text-gray-600">{recommendation}</p>
+                  ) : (
+                    <LoadingSpinner size="sm" />
+                  )}
                 </div>
               </div>
             </CardContent>
@@ -184,7 +231,7 @@ export default function QuizPage({ params }) {
           <Card className="mb-8 animate-slide-up">
             <CardHeader>
               <h2 className="text-xl font-semibold text-gray-900">
-                Detailed Feedback
+                Your Answers
               </h2>
             </CardHeader>
             <CardContent>
@@ -210,9 +257,24 @@ export default function QuizPage({ params }) {
                         Question {index + 1} - {result.topic}
                       </span>
                     </div>
-                    <p className="text-sm text-gray-600 ml-8">
-                      {result.feedback}
-                    </p>
+                    <div className="ml-8">
+                      <button
+                        type="button"
+                        onClick={() => toggleExplanation(result.question_id)}
+                        className="text-sm text-primary-600 hover:text-primary-700"
+                      >
+                        {explanations[result.question_id]?.open ? 'Hide explanation' : 'Show explanation'}
+                      </button>
+                      {explanations[result.question_id]?.open && (
+                        explanations[result.question_id].loading ? (
+                          <LoadingSpinner size="sm" />
+                        ) : (
+                          <p className="text-sm text-gray-600 mt-2">
+                            {explanations[result.question_id].text}
+                          </p>
+                        )
+                      )}
+                    </div>
                   </div>
                 ))}
               </div>
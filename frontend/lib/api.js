@@ -53,6 +53,12 @@ export const apiClient = {
    return response.data;
  },
 
+ // Adaptive pretests: one answer at a time, each returning the next question
+ answerPretest: async (pretestId, questionId, answer) => {
+   const response = await api.post(`/api/pretest/${pretestId}/answer`, { question_id: questionId, answer });
+   return response.data;
+ },
+
  submitPretest: async (pretestId, answers) => {
    const response = await api.post(`/api/pretest/${pretestId}/submit`, { answers });
    return response.data;
@@ -79,6 +85,17 @@ export const apiClient = {
    return response.data;
  },
 
+ // Feedback is generated on demand, after the attempt has been graded
+ getAttemptFeedback: async (attemptId) => {
+   const response = await api.get(`/api/attempt/${attemptId}/feedback`);
+   return response.data;
+ },
+
+ getQuestionFeedback: async (attemptId, questionId) => {
+   const response = await api.get(`/api/attempt/${attemptId}/feedback/${questionId}`);
+   return response.data;
+ },
+
 getAllLearners: async () => {
     const response = await api.get('/api/admin/learners');
     return response.data;
@@ -90,6 +107,11 @@ getAllLearners: async () => {
    return response.data;
  },
 
+ getLearnerAttempts: async (learnerId, params = {}) => {
+   const response = await api.get(`/api/learner/${learnerId}/attempts`, { params });
+   return response.data;
+ },
+
  // Analytics
  getAnalyticsDashboard: async () => {
    const response = await api.get('/api/analytics/dashboard');
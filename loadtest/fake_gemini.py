@@ -0,0 +1,174 @@
+"""Local stand-in for the Gemini generateContent API.
+
+Speaks the same request/response schema as the real endpoint and answers each
+of the tutor's prompts (quiz, learning path, feedback, recommendation) with
+plausible generated content, after a configurable latency. Errors and 429s
+can be injected to exercise the agents' fallbacks. Requests with a
+responseSchema get bare JSON, as with the real structured output mode;
+without one, JSON replies come wrapped in a markdown fence and
+--malformed-rate of quizzes are truncated. --truncate-rate of quizzes stop
+partway through, as replies do at maxOutputTokens, in either mode. Any model
+name in the URL is served; --rate-limit-models confines the injected 429s to
+some of them, to exercise failover to the others.
+
+Usage:
+    python loadtest/fake_gemini.py --port 8089 --latency-ms 800 --jitter 0.4 --rate-limit-rate 0.02
+
+then start the app with
+    GEMINI_API_KEY=fake GEMINI_API_ROOT=http://localhost:8089/v1beta/models
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+from typing import Any, Dict, List, Tuple
+
+QUIZ_RE = re.compile(r'Create exactly (\d+) multiple choice questions about (.+?) at difficulty level (\d)')
+# Resource rows are "id|title|..." under a header row
+RESOURCE_ID_RE = re.compile(r'^([^|\n]+)\|', re.MULTILINE)
+
+
+class FakeGemini:
+    def __init__(self, latency_ms: float = 800, jitter: float = 0.4, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, malformed_rate: float = 0.0, seed: int = None,
+                 truncate_rate: float = 0.0, rate_limit_models: List[str] = None):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.malformed_rate = malformed_rate
+        self.truncate_rate = truncate_rate
+        self.rate_limit_models = set(rate_limit_models or ())
+        self.random = random.Random(seed)
+
+    def latency(self) -> float:
+        """Seconds to wait; lognormal around the median, like real LLM latencies"""
+        if self.latency_ms <= 0:
+            return 0.0
+        return self.random.lognormvariate(0, self.jitter) * self.latency_ms / 1000
+
+    def answer(self, prompt: str, schema: Dict[str, Any] = None) -> str:
+        quiz = QUIZ_RE.search(prompt)
+        if quiz:
+            if not schema and self.random.random() < self.malformed_rate:
+                return '[{"question": "truncated'
+            text = self.as_json(self.quiz(int(quiz.group(1)), quiz.group(2)), schema)
+            if self.random.random() < self.truncate_rate:
+                return text[:int(len(text) * self.random.uniform(0.3, 0.95))]
+            return text
+        if 'AVAILABLE RESOURCES' in prompt:
+            ids = (schema or {}).get('items', {}).get('enum') or \
+                RESOURCE_ID_RE.findall(prompt.split('AVAILABLE RESOURCES', 1)[1])[1:]
+            return self.as_json(self.random.sample(ids, min(len(ids), self.random.randint(6, 8))), schema)
+        if 'educational feedback' in prompt:
+            return ("Good effort on this question. Review how the underlying rule applies to each "
+                    "option and try a similar problem to reinforce the concept.")
+        if 'recommendation' in prompt:
+            return "Nice work so far. Spend a little more time on the topics you missed, then move on."
+        return "Hello! This is the local Gemini stand-in."
+
+    @staticmethod
+    def as_json(value: Any, schema: Dict[str, Any] = None) -> str:
+        # Prose-mode models tend to fence their JSON
+        return json.dumps(value) if schema else f"```json\n{json.dumps(value, indent=2)}\n```"
+
+    def quiz(self, count: int, topic: str) -> List[Dict[str, Any]]:
+        questions = []
+        for i in range(count):
+            options = [f"{topic} answer {i + 1}{suffix}" for suffix in ('', 'a', 'b', 'c')]
+            questions.append({
+                'question': f"Question {i + 1} about {topic} ({self.random.randint(1000, 9999)})?",
+                'options': options,
+                'correct_answer': options[0],
+                'explanations': [f"Well done, {options[0]} is right."] + [
+                    f"Not quite: {option} mixes up the idea; {options[0]} is the answer." for option in options[1:]
+                ],
+                'topic': topic
+            })
+        return questions
+
+    def respond(self, payload: Dict[str, Any], model: str = 'fake') -> Tuple[int, Dict[str, Any]]:
+        roll = self.random.random()
+        rate_limit_rate = self.rate_limit_rate if not self.rate_limit_models or model in self.rate_limit_models else 0.0
+        if roll < rate_limit_rate:
+            return 429, {'error': {'code': 429, 'message': 'Resource has been exhausted', 'status': 'RESOURCE_EXHAUSTED'}}
+        if roll < rate_limit_rate + self.error_rate:
+            return 500, {'error': {'code': 500, 'message': 'Internal error', 'status': 'INTERNAL'}}
+
+        prompt = ''.join(part.get('text', '') for content in payload.get('contents', [])
+                         for part in content.get('parts', []))
+        system = ''.join(part.get('text', '') for part in payload.get('systemInstruction', {}).get('parts', []))
+        text = self.answer(prompt, payload.get('generationConfig', {}).get('responseSchema'))
+        return 200, {
+            'candidates': [{
+                'content': {'parts': [{'text': text}], 'role': 'model'},
+                'finishReason': 'STOP',
+                'index': 0
+            }],
+            'usageMetadata': {
+                'promptTokenCount': len(system + prompt) // 4,
+                'candidatesTokenCount': len(text) // 4,
+                'totalTokenCount': (len(system + prompt) + len(text)) // 4
+            }
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+
+        if scope['method'] == 'POST' and scope['path'].endswith(':generateContent'):
+            await asyncio.sleep(self.latency())
+            model = scope['path'].rsplit('/', 1)[-1].split(':', 1)[0]
+            status, payload = self.respond(json.loads(body or b'{}'), model)
+        else:
+            status, payload = 404, {'error': {'code': 404, 'message': 'Not found', 'status': 'NOT_FOUND'}}
+
+        data = json.dumps(payload).encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(data)).encode())]
+        })
+        await send({'type': 'http.response.body', 'body': data})
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run a local Gemini generateContent stand-in")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency-ms', type=float, default=800, help="median response latency")
+    parser.add_argument('--jitter', type=float, default=0.4, help="lognormal sigma of the latency")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of 500 responses")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="fraction of 429 responses")
+    parser.add_argument('--rate-limit-models', nargs='+', default=None,
+                        help="models the 429s apply to (defaults to all)")
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help="fraction of unstructured quizzes returned as broken JSON")
+    parser.add_argument('--truncate-rate', type=float, default=0.0,
+                        help="fraction of quizzes cut off partway, as at maxOutputTokens")
+    parser.add_argument('--seed', type=int, default=None)
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    args = parse_args()
+    fake = FakeGemini(args.latency_ms, args.jitter, args.error_rate,
+                      args.rate_limit_rate, args.malformed_rate, args.seed, args.truncate_rate,
+                      args.rate_limit_models)
+    print(f"🧪 Fake Gemini on http://{args.host}:{args.port}/v1beta/models/<model>:generateContent")
+    uvicorn.run(fake, host=args.host, port=args.port, log_level='warning')
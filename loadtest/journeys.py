@@ -0,0 +1,249 @@
+"""Load generator that replays realistic learner journeys against the API.
+
+Each virtual learner runs create -> pretest (answered one question at a time
+once the pool is adaptive) -> submit -> path -> quiz ->
+submit -> progress, with optional think time between steps. After a quiz,
+--explain-rate of learners fetch the recommendation and expand one answer's
+explanation, as the results page does on demand. The report gives
+throughput, error counts and latency percentiles per route, and can be saved
+as JSON to compare builds.
+
+Usage:
+    python loadtest/journeys.py --base-url http://localhost:5000 --learners 200 --concurrency 50 --seed-catalog
+    python loadtest/journeys.py ... --json-out run.json --compare baseline.json
+
+To compare builds on identical Gemini traffic, run the app once with
+GEMINI_CASSETTE=run.jsonl GEMINI_CASSETTE_MODE=record, then with
+GEMINI_CASSETTE=run.jsonl (and GEMINI_CASSETTE_LATENCY=0 to take Gemini
+latency out of the measurement); see cassette.py. Requests that depend on
+random choices, such as which answers a learner picks, may miss the cassette
+and are served by the agents' fallbacks.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+LEARNING_STYLES = ['visual', 'auditory', 'kinesthetic', 'reading']
+PERCENTILES = (50, 90, 95, 99)
+
+
+class Recorder:
+    """Collects latencies per route pattern"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def record(self, route: str, seconds: float, status: Optional[int]):
+        self.latencies[route].append(seconds)
+        if status is None or status >= 400:
+            self.errors[route][str(status or 'exception')] += 1
+
+    def report(self) -> Dict[str, Any]:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        routes = {}
+        for route, samples in sorted(self.latencies.items()):
+            ordered = sorted(samples)
+            routes[route] = {
+                'requests': len(ordered),
+                'throughput_rps': len(ordered) / elapsed if elapsed else 0.0,
+                'errors': dict(self.errors.get(route, {})),
+                'mean_ms': 1000 * sum(ordered) / len(ordered),
+                **{f'p{p}_ms': 1000 * percentile(ordered, p) for p in PERCENTILES},
+                'max_ms': 1000 * ordered[-1]
+            }
+        return {'elapsed_s': elapsed, 'routes': routes}
+
+
+def percentile(ordered: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted sample"""
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class Journey:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, rng: random.Random,
+                 subject: str, think_time: float, correct_rate: float, explain_rate: float):
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.subject = subject
+        self.think_time = think_time
+        self.correct_rate = correct_rate
+        self.explain_rate = explain_rate
+
+    async def call(self, method: str, route: str, url: str, **kwargs) -> Optional[Dict]:
+        started = time.perf_counter()
+        status = None
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            status = response.status_code
+            return response.json() if status < 400 else None
+        except (httpx.HTTPError, ValueError):
+            return None
+        finally:
+            self.recorder.record(route, time.perf_counter() - started, status)
+            if self.think_time:
+                await asyncio.sleep(self.rng.expovariate(1 / self.think_time))
+
+    def answers(self, questions: List[Dict]) -> Dict[str, str]:
+        # The API does not reveal correct answers; pick options at random,
+        # biased towards the first one, which the fake Gemini marks correct
+        return {
+            q['id']: q['options'][0] if self.rng.random() < self.correct_rate else self.rng.choice(q['options'])
+            for q in questions
+        }
+
+    async def adaptive_pretest(self, pretest: Dict):
+        # Adaptive pretests serve one question per answer until the estimate is precise enough
+        pretest_id = pretest['pretest_id']
+        question = pretest['questions'][0]
+        while question:
+            answered = await self.call('POST', 'POST /api/pretest/<id>/answer', f'/api/pretest/{pretest_id}/answer',
+                                       json={'question_id': question['id'],
+                                             'answer': self.answers([question])[question['id']]})
+            if not answered:
+                return
+            question = answered.get('question')
+        await self.call('POST', 'POST /api/pretest/<id>/submit', f'/api/pretest/{pretest_id}/submit',
+                        json={'answers': {}})
+
+    async def run(self, index: int):
+        created = await self.call('POST', 'POST /api/learner/create', '/api/learner/create', json={
+            'name': f'Load Learner {index}',
+            'learning_style': self.rng.choice(LEARNING_STYLES),
+            'knowledge_level': self.rng.randint(1, 5),
+            'subject': self.subject
+        })
+        if not created:
+            return
+        learner_id = created['data']['profile_id']
+
+        pretest = await self.call('POST', 'POST /api/learner/<id>/pretest',
+                                  f'/api/learner/{learner_id}/pretest', json={'subject': self.subject})
+        if pretest and pretest.get('mode') == 'adaptive':
+            await self.adaptive_pretest(pretest)
+        elif pretest:
+            await self.call('POST', 'POST /api/pretest/<id>/submit', f"/api/pretest/{pretest['pretest_id']}/submit",
+                            json={'answers': self.answers(pretest['questions'])})
+
+        path = await self.call('GET', 'GET /api/learner/<id>/path', f'/api/learner/{learner_id}/path')
+        if not path or not path['data'].get('current_resource'):
+            return
+        resource_id = path['data']['current_resource']['id']
+
+        quiz = await self.call('GET', 'GET /api/resource/<id>/quiz', f'/api/resource/{resource_id}/quiz')
+        if quiz:
+            submitted = await self.call('POST', 'POST /api/quiz/<id>/submit',
+                                        f"/api/quiz/{quiz['data']['quiz_id']}/submit", json={
+                                            'answers': self.answers(quiz['data']['questions']),
+                                            'learner_id': learner_id,
+                                            'path_version': path['data'].get('version')
+                                        })
+            if submitted and self.rng.random() < self.explain_rate:
+                await self.explain(submitted['data'])
+
+        await self.call('GET', 'GET /api/learner/<id>/progress', f'/api/learner/{learner_id}/progress')
+
+    async def explain(self, submitted: Dict):
+        attempt_id = submitted['attempt_id']
+        await self.call('GET', 'GET /api/attempt/<id>/feedback', f'/api/attempt/{attempt_id}/feedback')
+        if submitted['results']:
+            question_id = self.rng.choice(submitted['results'])['question_id']
+            await self.call('GET', 'GET /api/attempt/<id>/feedback/<q>',
+                            f'/api/attempt/{attempt_id}/feedback/{question_id}')
+
+
+async def run_load(args: argparse.Namespace) -> Dict[str, Any]:
+    recorder = Recorder()
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        if args.seed_catalog:
+            response = await client.post('/api/resources/seed')
+            # 409: the catalog is already loaded
+            if response.status_code != 409:
+                response.raise_for_status()
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for index in range(args.learners):
+            queue.put_nowait(index)
+
+        async def worker(worker_id: int):
+            journey = Journey(client, recorder, random.Random(rng.random()), args.subject,
+                              args.think_time, args.correct_rate, args.explain_rate)
+            while not queue.empty():
+                await journey.run(queue.get_nowait())
+
+        await asyncio.gather(*[worker(i) for i in range(args.concurrency)])
+
+    recorder.finished = time.perf_counter()
+    return recorder.report()
+
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None):
+    header = f"{'route':<34}{'reqs':>7}{'rps':>8}{'err':>6}" + ''.join(f"{f'p{p}':>9}" for p in PERCENTILES)
+    if baseline:
+        header += f"{'Δp95':>9}"
+    print(header)
+    print('-' * len(header))
+    for route, stats in report['routes'].items():
+        line = (f"{route:<34}{stats['requests']:>7}{stats['throughput_rps']:>8.1f}"
+                f"{sum(stats['errors'].values()):>6}" + ''.join(f"{stats[f'p{p}_ms']:>9.0f}" for p in PERCENTILES))
+        if baseline and route in baseline['routes']:
+            before = baseline['routes'][route]['p95_ms']
+            line += f"{(stats['p95_ms'] - before) / before * 100 if before else 0:>+8.0f}%"
+        print(line)
+    print(f"\n⏱️ {report['elapsed_s']:.1f}s elapsed (latencies in ms)")
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay learner journeys against the tutor API")
+    parser.add_argument('--base-url', default='http://localhost:5000')
+    parser.add_argument('--learners', type=int, default=100, help="journeys to run in total")
+    parser.add_argument('--concurrency', type=int, default=20, help="journeys in flight at once")
+    parser.add_argument('--subject', default='algebra')
+    parser.add_argument('--think-time', type=float, default=0.0, help="mean pause between steps, seconds")
+    parser.add_argument('--correct-rate', type=float, default=0.7, help="share of answers picking the first option")
+    parser.add_argument('--explain-rate', type=float, default=0.3,
+                        help="share of learners fetching feedback after a quiz")
+    parser.add_argument('--timeout', type=float, default=120.0)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--seed-catalog', action='store_true',
+                        help="POST /api/resources/seed before starting (a no-op once the catalog has resources)")
+    parser.add_argument('--json-out', help="write the report to this file")
+    parser.add_argument('--compare', help="earlier --json-out report to diff p95 against")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+    report = asyncio.run(run_load(args))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
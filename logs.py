@@ -0,0 +1,143 @@
+"""Structured logging for the tutor API.
+
+Records are handed to a queue and written by a background listener thread, so
+request handlers never block on stdout. Messages use lazy %-formatting: a
+disabled level costs one ``isEnabledFor`` check and no string building.
+
+Environment:
+    LOG_LEVEL              DEBUG, INFO (default), WARNING, ...
+    LOG_FORMAT             json (default) or text
+    LOG_DEBUG_SAMPLE_RATE  fraction of DEBUG records to keep (default 1.0)
+
+When tracing is enabled records also carry the active trace and span ids.
+"""
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+import tracing
+
+request_id_var: contextvars.ContextVar = contextvars.ContextVar('request_id', default=None)
+
+# Attributes every LogRecord has; anything else was passed via ``extra=``
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'request_id', 'trace_id', 'span_id'}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+# Renders tracebacks for records before they are enqueued
+_exception_formatter = logging.Formatter()
+
+
+def new_request_id(incoming: Optional[str] = None) -> str:
+    """Bind a correlation id to the current request context and return it"""
+    request_id = incoming or uuid.uuid4().hex
+    request_id_var.set(request_id)
+    return request_id
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamps records with the correlation and trace ids of the request that emitted them"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        record.trace_id, record.span_id = tracing.current_ids()
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Keeps only a fraction of DEBUG records; higher levels always pass"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+
+class StructuredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records with the message merged but the traceback kept apart in ``exc_text``
+
+    The stock ``prepare`` formats the traceback into the message and drops the
+    exception, which would leave JSON records without their ``exc_info`` field.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            # Tracebacks pin the emitting frames, so only their text crosses the queue
+            record.exc_text = record.exc_text or _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if getattr(record, 'request_id', None):
+            entry['request_id'] = record.request_id
+        if getattr(record, 'trace_id', None):
+            entry['trace_id'] = record.trace_id
+            entry['span_id'] = record.span_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc_info'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None,
+                      debug_sample_rate: Optional[float] = None) -> None:
+    """Route the root logger through a non-blocking queue handler (idempotent)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    level = (level or os.getenv('LOG_LEVEL', 'INFO')).upper()
+    fmt = (fmt or os.getenv('LOG_FORMAT', 'json')).lower()
+    if debug_sample_rate is None:
+        debug_sample_rate = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', '1.0'))
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if fmt == 'json':
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter(
+            '%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'
+        ))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = StructuredQueueHandler(log_queue)
+    # Filters run in the emitting thread, where the request context is bound
+    queue_handler.addFilter(DebugSamplingFilter(debug_sample_rate))
+    queue_handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
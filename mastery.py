@@ -0,0 +1,121 @@
+"""Per-topic learner mastery, updated locally on every graded answer.
+
+Each learner has an Elo-style rating per topic, on the same scale as question
+difficulty: a level-d question (1-5) is rated d - 3, and the chance of a
+correct answer is the logistic of the gap between the two ratings. Every
+answer moves the topic rating by K times the surprise (1 or 0 minus that
+chance); K shrinks as a topic collects answers, so the first few answers
+place a learner quickly and later ones refine the estimate.
+
+Weak areas are the answered topics a learner would more likely than not miss
+at the middle difficulty, weakest first; the knowledge level is the
+difficulty matching the learner's answer-weighted rating. Both are derived
+from the state in microseconds, so grading never waits on Gemini for them.
+
+The state is stored on the learner profile as ``mastery``, a list of
+``[topic, rating, answers]`` rows (topics are user data, so they are not
+used as document keys). ``replay`` rebuilds it from the attempts history.
+
+Environment:
+    MASTERY_WEAK_THRESHOLD  mastery below which a topic is a weak area (default 0.6)
+"""
+import math
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+MIDDLE_DIFFICULTY = 3
+MIN_LEVEL, MAX_LEVEL = 1, 5
+INITIAL_K = 1.5
+MIN_K = 0.3
+MAX_WEAK_AREAS = 5
+WEAK_THRESHOLD = float(os.getenv('MASTERY_WEAK_THRESHOLD', '0.6'))
+# The profile fields apply_attempt reads
+PROFILE_FIELDS = ('mastery', 'knowledge_level')
+
+
+def difficulty_rating(difficulty: Optional[int]) -> float:
+    return float((difficulty or MIDDLE_DIFFICULTY) - MIDDLE_DIFFICULTY)
+
+
+def expected_correct(rating: float, difficulty: Optional[int]) -> float:
+    """Chance a learner with ``rating`` answers a question of ``difficulty`` correctly"""
+    return 1 / (1 + math.exp(difficulty_rating(difficulty) - rating))
+
+
+class Mastery:
+    """One learner's topic ratings and the number of answers behind each"""
+
+    def __init__(self, topics: Optional[Dict[str, List]] = None):
+        # topic -> [rating, answers]
+        self.topics: Dict[str, List] = topics or {}
+
+    @classmethod
+    def from_doc(cls, rows: Optional[List[List]]) -> 'Mastery':
+        return cls({topic: [float(rating), int(answers)] for topic, rating, answers in rows or []})
+
+    def to_doc(self) -> List[List]:
+        return [[topic, round(rating, 4), answers] for topic, (rating, answers) in sorted(self.topics.items())]
+
+    def observe(self, topic: str, difficulty: Optional[int], correct: bool) -> None:
+        """Update the topic's rating with one graded answer"""
+        topic = topic.strip().lower()
+        if not topic:
+            return
+        state = self.topics.setdefault(topic, [0.0, 0])
+        rating, answers = state
+        k = max(MIN_K, INITIAL_K / math.sqrt(1 + answers))
+        state[0] = rating + k * ((1.0 if correct else 0.0) - expected_correct(rating, difficulty))
+        state[1] = answers + 1
+
+    def observe_attempt(self, attempt: Dict) -> None:
+        """Update with every answer of a stored attempt, in question order"""
+        responses = attempt.get('responses', [])
+        if responses and all('topic' in r for r in responses):
+            for response in responses:
+                self.observe(response['topic'], response.get('difficulty'), response['is_correct'])
+            return
+        # Attempts recorded before responses carried their topic only have per-topic counts
+        for topic, counts in attempt.get('topic_results', {}).items():
+            for i in range(counts['total']):
+                self.observe(topic, None, i < counts['correct'])
+
+    def probability(self, topic: str, difficulty: Optional[int] = MIDDLE_DIFFICULTY) -> Optional[float]:
+        """Chance of a correct answer in ``topic``, or None if it has no answers yet"""
+        state = self.topics.get(topic.strip().lower())
+        return expected_correct(state[0], difficulty) if state else None
+
+    def weak_areas(self, threshold: float = None, limit: int = MAX_WEAK_AREAS) -> List[str]:
+        threshold = WEAK_THRESHOLD if threshold is None else threshold
+        scored = [(expected_correct(rating, MIDDLE_DIFFICULTY), topic)
+                  for topic, (rating, answers) in self.topics.items() if answers]
+        return [topic for p, topic in sorted(scored) if p < threshold][:limit]
+
+    def knowledge_level(self, default: int = MIN_LEVEL) -> int:
+        answers = sum(n for _, n in self.topics.values())
+        if not answers:
+            return default
+        rating = sum(r * n for r, n in self.topics.values()) / answers
+        return max(MIN_LEVEL, min(MAX_LEVEL, round(MIDDLE_DIFFICULTY + rating)))
+
+    def profile_fields(self, default_level: int = MIN_LEVEL) -> Dict[str, Any]:
+        """The learner profile fields derived from this state"""
+        return {
+            'mastery': self.to_doc(),
+            'weak_areas': self.weak_areas(),
+            'knowledge_level': self.knowledge_level(default_level)
+        }
+
+
+def apply_attempt(profile: Dict, attempt: Dict) -> Dict[str, Any]:
+    """Profile fields after adding ``attempt`` to the learner's stored mastery"""
+    mastery = Mastery.from_doc(profile.get('mastery'))
+    mastery.observe_attempt(attempt)
+    return mastery.profile_fields(profile.get('knowledge_level') or MIN_LEVEL)
+
+
+def replay(attempts: Iterable[Dict]) -> Mastery:
+    """Rebuild a learner's mastery from their attempts, oldest first"""
+    mastery = Mastery()
+    for attempt in attempts:
+        mastery.observe_attempt(attempt)
+    return mastery
@@ -0,0 +1,178 @@
+"""Prometheus metrics for routes, agents, Gemini calls, latency budgets and MongoDB operations.
+
+All instruments are module-level and label cardinality is bounded: routes are
+labelled by their URL rule, agents by ``agent_name``, Gemini tasks by
+their prompt template (see prompts.py) and models by the routing table
+(see routing.py). Set
+PROMETHEUS_MULTIPROC_DIR when running several worker processes so /metrics
+aggregates across them.
+"""
+import contextvars
+import os
+from typing import Any, Dict, Optional, Tuple
+
+from prometheus_client import (
+    CollectorRegistry, Counter, Histogram, CONTENT_TYPE_LATEST, generate_latest, multiprocess
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+
+HTTP_REQUEST_DURATION = Histogram(
+    'tutor_http_request_duration_seconds', 'HTTP request latency',
+    ['route', 'method', 'status'], buckets=LATENCY_BUCKETS
+)
+GEMINI_CALLS_PER_REQUEST = Histogram(
+    'tutor_gemini_calls_per_request', 'Gemini calls made while serving one request',
+    ['route'], buckets=(0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20)
+)
+GEMINI_TOKENS_PER_REQUEST = Histogram(
+    'tutor_gemini_tokens_per_request', 'Gemini prompt and completion tokens spent serving one request',
+    ['route'], buckets=(0, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+)
+GEMINI_REQUESTS = Counter(
+    'tutor_gemini_requests_total', 'Gemini generateContent calls',
+    ['agent', 'outcome']
+)
+GEMINI_REQUEST_DURATION = Histogram(
+    'tutor_gemini_request_duration_seconds', 'Gemini generateContent latency',
+    ['agent', 'outcome'], buckets=LATENCY_BUCKETS
+)
+GEMINI_TOKENS = Counter(
+    'tutor_gemini_tokens_total', 'Tokens reported in Gemini usageMetadata (prompt, completion, cached)',
+    ['agent', 'task', 'kind']
+)
+GEMINI_ROUTE_DURATION = Histogram(
+    'tutor_gemini_route_duration_seconds', 'Gemini generateContent latency per task and model',
+    ['task', 'model', 'outcome'], buckets=LATENCY_BUCKETS
+)
+GEMINI_COST = Counter(
+    'tutor_gemini_cost_usd_total', 'Estimated Gemini spend from usageMetadata and list prices',
+    ['task', 'model']
+)
+GEMINI_FAILOVERS = Counter(
+    'tutor_gemini_failovers_total', 'Calls retried on the fallback model because the primary was throttled',
+    ['task', 'model']
+)
+GEMINI_CASSETTE_LOOKUPS = Counter(
+    'tutor_gemini_cassette_lookups_total', 'Replayed Gemini requests found (hit) or not (miss) in the cassette',
+    ['result']
+)
+AGENT_FALLBACKS = Counter(
+    'tutor_agent_fallbacks_total', 'Times an agent fell back to its deterministic path',
+    ['agent', 'fallback']
+)
+JSON_PARSE_FAILURES = Counter(
+    'tutor_json_parse_failures_total', 'LLM responses that could not be parsed as the expected JSON',
+    ['agent']
+)
+SLO_SERVED_TIER = Counter(
+    'tutor_slo_served_total', 'AI feature responses by the tier that served them (ai, cache, fallback)',
+    ['feature', 'tier']
+)
+SLO_LATE_RESULTS = Counter(
+    'tutor_slo_late_results_total', 'Gemini calls that overran their latency budget, by what became of them',
+    ['feature', 'outcome']
+)
+SLO_SHED = Counter(
+    'tutor_slo_shed_total', 'Gemini calls not started because every SLO worker was busy and the queue full',
+    ['feature']
+)
+MONGO_COMMAND_DURATION = Histogram(
+    'tutor_mongo_command_duration_seconds', 'MongoDB command latency',
+    ['command', 'outcome'], buckets=DB_BUCKETS
+)
+
+# Gemini calls and tokens of the current request; a list so tasks spawned
+# by the request share the counters with it
+_gemini_calls: contextvars.ContextVar = contextvars.ContextVar('gemini_calls', default=None)
+
+
+def begin_request() -> None:
+    _gemini_calls.set([0, 0])
+
+
+def finish_request(route: str, method: str, status: int, duration: float) -> None:
+    HTTP_REQUEST_DURATION.labels(route, method, str(status)).observe(duration)
+    calls = _gemini_calls.get()
+    if calls is not None:
+        GEMINI_CALLS_PER_REQUEST.labels(route).observe(calls[0])
+        GEMINI_TOKENS_PER_REQUEST.labels(route).observe(calls[1])
+
+
+def observe_gemini_call(agent: str, outcome: str, duration: float,
+                        usage: Optional[Dict[str, Any]] = None, task: str = 'adhoc',
+                        model: str = 'unknown', cost: float = 0.0) -> None:
+    GEMINI_REQUESTS.labels(agent, outcome).inc()
+    GEMINI_REQUEST_DURATION.labels(agent, outcome).observe(duration)
+    GEMINI_ROUTE_DURATION.labels(task, model, outcome).observe(duration)
+    if cost:
+        GEMINI_COST.labels(task, model).inc(cost)
+    usage = usage or {}
+    prompt, completion = usage.get('promptTokenCount', 0), usage.get('candidatesTokenCount', 0)
+    calls = _gemini_calls.get()
+    if calls is not None:
+        calls[0] += 1
+        calls[1] += prompt + completion
+    if usage:
+        GEMINI_TOKENS.labels(agent, task, 'prompt').inc(prompt)
+        GEMINI_TOKENS.labels(agent, task, 'completion').inc(completion)
+        if usage.get('cachedContentTokenCount'):
+            GEMINI_TOKENS.labels(agent, task, 'cached').inc(usage['cachedContentTokenCount'])
+
+
+def record_failover(task: str, model: str) -> None:
+    GEMINI_FAILOVERS.labels(task, model).inc()
+
+
+def record_cassette_lookup(result: str) -> None:
+    GEMINI_CASSETTE_LOOKUPS.labels(result).inc()
+
+
+def record_fallback(agent: str, fallback: str) -> None:
+    AGENT_FALLBACKS.labels(agent, fallback).inc()
+
+
+def record_parse_failure(agent: str) -> None:
+    JSON_PARSE_FAILURES.labels(agent).inc()
+
+
+def record_served_tier(feature: str, tier: str) -> None:
+    SLO_SERVED_TIER.labels(feature, tier).inc()
+
+
+def record_late_result(feature: str, outcome: str) -> None:
+    SLO_LATE_RESULTS.labels(feature, outcome).inc()
+
+
+def record_shed(feature: str) -> None:
+    SLO_SHED.labels(feature).inc()
+
+
+def register_mongo_metrics() -> None:
+    """Time every MongoDB command via PyMongo's command monitoring.
+
+    Must run before the MongoClient is created. pymongo is imported here so
+    processes on other storage backends never load it."""
+    from pymongo import monitoring
+
+    class MongoCommandMetrics(monitoring.CommandListener):
+        def started(self, event):
+            pass
+
+        def succeeded(self, event):
+            MONGO_COMMAND_DURATION.labels(event.command_name, 'success').observe(event.duration_micros / 1e6)
+
+        def failed(self, event):
+            MONGO_COMMAND_DURATION.labels(event.command_name, 'failure').observe(event.duration_micros / 1e6)
+
+    monitoring.register(MongoCommandMetrics())
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Exposition body and content type for the /metrics endpoint"""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,148 @@
+"""Prompt templates for the Gemini agents, with per-task token budgets.
+
+Every Gemini task has one template, parsed once at import. Rendering a
+template gives a ``Prompt``: the task name (the label token usage is
+recorded under), the system instruction, the prompt text and the output
+token budget.
+
+- Each agent's role text is sent as Gemini's ``systemInstruction`` instead
+  of being pasted into every prompt.
+- Templates put their fixed instructions first and the per-request data
+  last, so consecutive requests share the longest possible prefix.
+- Lists are written as compact ``|``-separated rows under a single header
+  line rather than repeating field names on every row.
+- A template with ``max_prompt_tokens`` keeps only the leading rows of its
+  list that fit the budget, so callers pass rows most relevant first.
+  ``max_output_tokens`` becomes the request's maxOutputTokens.
+
+Token counts here are estimates (CHARS_PER_TOKEN); the counts Gemini
+reports in usageMetadata are recorded per task (see metrics.py).
+"""
+import string
+import textwrap
+from typing import Any, Iterable, Iterator, NamedTuple, Optional, Sequence
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def table(header: Sequence[str], rows: Iterable[str]) -> Iterator[str]:
+    """A header row naming the columns, then ``rows``; lazy, so rows past a
+    prompt's budget are never formatted"""
+    yield '|'.join(header)
+    yield from rows
+
+
+def cell(text: str) -> str:
+    """Free text made safe for a ``|``-separated row"""
+    return text.replace('|', '/')
+
+
+class Prompt(NamedTuple):
+    task: str
+    system: str
+    text: str
+    max_tokens: int
+    # Rows of the template's list that fit its budget, not counting the header
+    rows: int = 0
+
+
+class PromptTemplate:
+    """A prompt with ``{field}`` placeholders; ``{rows}`` is filled with as many list rows as the budget allows"""
+
+    def __init__(self, task: str, system: str, body: str, max_output_tokens: int,
+                 max_prompt_tokens: Optional[int] = None):
+        self.task = task
+        self.system = ' '.join(system.split())
+        self.max_output_tokens = max_output_tokens
+        self.max_prompt_tokens = max_prompt_tokens
+        self._parts = [(literal, field, spec) for literal, field, spec, _ in
+                       string.Formatter().parse(textwrap.dedent(body).strip())]
+        self.fields = {field for _, field, _ in self._parts if field}
+
+    def _fill(self, values: dict) -> str:
+        return ''.join(literal + (format(values[field], spec) if field is not None else '')
+                       for literal, field, spec in self._parts)
+
+    def render(self, rows: Iterable[str] = (), **values: Any) -> Prompt:
+        missing = self.fields - set(values) - {'rows'}
+        if missing:
+            raise KeyError(f"Prompt '{self.task}' needs {sorted(missing)}")
+
+        if not self.max_prompt_tokens:
+            included = list(rows)
+        else:
+            # The header row always stays; data rows are kept while they fit
+            budget = (self.max_prompt_tokens - estimate_tokens(self.system)
+                      - estimate_tokens(self._fill({**values, 'rows': ''})))
+            used, included = 0, []
+            for row in rows:
+                used += len(row) // CHARS_PER_TOKEN + 2
+                if included and used > budget:
+                    break
+                included.append(row)
+        text = self._fill({**values, 'rows': '\n'.join(included)})
+        return Prompt(self.task, self.system, text, self.max_output_tokens, max(0, len(included) - 1))
+
+
+QUIZ = PromptTemplate(
+    'quiz',
+    """You are an expert educational content generator who writes accurate, encouraging
+    multiple choice questions for adaptive tutoring.""",
+    """
+    Create exactly {count} multiple choice questions about {topic} at difficulty level {difficulty} out of 5 (1=beginner, 5=expert).
+    - Exactly 4 options, one of them correct; "correct_answer" repeats it verbatim
+    - "explanations": one entry per option, in option order, 1-2 sentences each: confirm why the correct answer is right; for a wrong option, gently name the misconception and point towards the correct idea
+    - "topic": {topic}
+    Return only a JSON array of objects with keys question, options, correct_answer, explanations, topic.{avoid}
+    """,
+    max_output_tokens=4096,
+    max_prompt_tokens=800
+)
+
+PATH = PromptTemplate(
+    'path',
+    """You are a learning path optimization specialist. You order learning resources
+    into a sequence that suits one learner.""",
+    """
+    Choose 6-8 resources and order them for this learner: prefer their learning style, cover their weak areas first, start at or below their level, respect prerequisites and raise difficulty gradually.
+    Return only a JSON array of resource ids, e.g. ["id1", "id2"].
+    LEARNER: style={style} subject={subject} level={level}/5 weak_areas={weak_areas}
+    AVAILABLE RESOURCES:
+    {rows}
+    """,
+    max_output_tokens=200,
+    max_prompt_tokens=1500
+)
+
+# Shared by the evaluator's two tasks
+ASSESSOR = """You are an educational assessment expert. You give learners constructive,
+encouraging feedback on their answers."""
+
+FEEDBACK = PromptTemplate(
+    'feedback',
+    ASSESSOR,
+    """
+    Write 2-3 sentences of educational feedback on this answer: why it is right or wrong, one learning tip, and encouragement. Plain text only.
+    QUESTION: {question}
+    OPTIONS: {options}
+    CORRECT ANSWER: {correct_answer}
+    USER ANSWER: {answer} ({result})
+    """,
+    max_output_tokens=200
+)
+
+RECOMMENDATION = PromptTemplate(
+    'recommendation',
+    ASSESSOR,
+    """
+    Write an encouraging 1-2 sentence recommendation from these quiz results: acknowledge the effort, give specific guidance for improvement and motivate continued learning. Plain text only.
+    Score: {score:.1f}% ({correct}/{total} correct)
+    Strong areas: {strong}
+    Areas to improve: {weak}
+    """,
+    max_output_tokens=120
+)
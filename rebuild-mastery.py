@@ -0,0 +1,54 @@
+import argparse
+import sys
+import time
+from itertools import groupby
+
+import mastery
+from storage import create_storage
+
+# Storage backend selected by STORAGE_BACKEND (MongoDB by default)
+storage = create_storage()
+
+def rebuild_mastery(dry_run=False):
+    """Replay every learner's attempts and store the resulting mastery on their profile"""
+
+    learners = updated = attempts = 0
+    for learner_id, learner_attempts in groupby(storage.attempts.iter_by_learner(), key=lambda a: a.get('learner_id')):
+        replayed = mastery.Mastery()
+        for attempt in learner_attempts:
+            replayed.observe_attempt(attempt)
+            attempts += 1
+        learners += 1
+
+        profile = storage.profiles.get(learner_id) if learner_id else None
+        if not profile:
+            continue
+        fields = replayed.profile_fields(profile.get('knowledge_level') or mastery.MIN_LEVEL)
+        if not dry_run:
+            storage.profiles.update(learner_id, fields)
+        updated += 1
+
+    return {'learners': learners, 'attempts': attempts, 'updated': updated}
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild learner mastery from the attempts history")
+    parser.add_argument('--dry-run', action='store_true', help="Replay without writing profiles")
+    args = parser.parse_args()
+
+    print(f"📡 Connecting to {storage.describe()} storage...")
+
+    try:
+        storage.ping()
+        started = time.perf_counter()
+        stats = rebuild_mastery(dry_run=args.dry_run)
+        elapsed = time.perf_counter() - started
+
+        print(f"✅ Replayed {stats['attempts']} attempts of {stats['learners']} learners in {elapsed:.1f}s")
+        print(f"   - Profiles {'that would be ' if args.dry_run else ''}updated: {stats['updated']}")
+
+    except Exception as e:
+        print(f"❌ Rebuilding mastery failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Which Gemini model serves each task, with what generation settings.
+
+Every Gemini task (the prompt templates in prompts.py, plus the health and
+test probes) has a route: a primary model, a model to fail over to when the
+primary is throttled, a generation config and a request timeout. Short
+plain-text tasks go to the fastest, cheapest model; quiz and path generation,
+which must produce long structured output, go to the stronger one.
+
+A request answered 429 or 503 is retried once on the fallback model with the
+same payload. Other failures are not retried here; the agents have their own
+fallbacks. Timeouts bound the HTTP call itself and sit well above the SLO
+budgets (see slo.py), since a late result is still cached for the next request.
+
+Latency and estimated cost are recorded per task and model (see metrics.py),
+so routes can be tuned from real traffic.
+
+Environment:
+    GEMINI_API_ROOT          models endpoint (default https://generativelanguage.googleapis.com/v1beta/models)
+    GEMINI_MODEL_<TASK>      primary model of a task, e.g. GEMINI_MODEL_QUIZ=gemini-2.0-flash
+    GEMINI_FALLBACK_<TASK>   model tried when the primary is throttled; empty disables failover
+    GEMINI_TIMEOUT_<TASK>_S  request timeout in seconds
+    GEMINI_BASE_URL          one generateContent URL for every task, e.g. a load test stand-in;
+                             routes keep their generation configs and timeouts but do not fail over
+"""
+import os
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+DEFAULT_API_ROOT = 'https://generativelanguage.googleapis.com/v1beta/models'
+
+FLASH = 'gemini-2.0-flash'
+FLASH_LITE = 'gemini-2.0-flash-lite'
+
+# Statuses meaning the model is out of capacity rather than the request being bad
+THROTTLED_STATUSES = frozenset({429, 503})
+
+# USD per million prompt and completion tokens; models not listed are costed at zero
+PRICES_PER_MTOKEN = {
+    FLASH: (0.10, 0.40),
+    FLASH_LITE: (0.075, 0.30),
+}
+
+
+class Route(NamedTuple):
+    task: str
+    model: str
+    fallback: Optional[str]
+    generation_config: Dict[str, Any]
+    timeout: float
+
+    @property
+    def models(self) -> Tuple[str, ...]:
+        """Models to try in order"""
+        return (self.model, self.fallback) if self.fallback and self.fallback != self.model else (self.model,)
+
+
+# task: (model, fallback, generation config, timeout in seconds)
+ROUTES = {
+    # Questions should vary between quizzes, and the reply runs to thousands of tokens
+    'quiz': (FLASH, FLASH_LITE, {'temperature': 0.7, 'topP': 0.9, 'topK': 40}, 30.0),
+    # Ordering ids from a list: stick to the likeliest answer
+    'path': (FLASH, FLASH_LITE, {'temperature': 0.2, 'topP': 0.8, 'topK': 20}, 20.0),
+    'feedback': (FLASH_LITE, FLASH, {'temperature': 0.5, 'topP': 0.8, 'topK': 40}, 8.0),
+    'recommendation': (FLASH_LITE, FLASH, {'temperature': 0.5, 'topP': 0.8, 'topK': 40}, 8.0),
+    'health': (FLASH_LITE, None, {'temperature': 0.0, 'topP': 0.8, 'topK': 1}, 5.0),
+    'test': (FLASH, FLASH_LITE, {'temperature': 0.7, 'topP': 0.8, 'topK': 40}, 30.0),
+    'adhoc': (FLASH, FLASH_LITE, {'temperature': 0.7, 'topP': 0.8, 'topK': 40}, 30.0),
+}
+
+
+def route(task: str) -> Route:
+    """The task's route, with environment overrides; read on each call so .env files loaded late apply"""
+    model, fallback, config, timeout = ROUTES.get(task, ROUTES['adhoc'])
+    key = task.upper()
+    model = os.getenv(f'GEMINI_MODEL_{key}') or model
+    fallback = os.getenv(f'GEMINI_FALLBACK_{key}', fallback) or None
+    if os.getenv('GEMINI_BASE_URL'):
+        fallback = None
+    return Route(task, model, fallback, config, float(os.getenv(f'GEMINI_TIMEOUT_{key}_S', timeout)))
+
+
+def url(model: str) -> str:
+    """The generateContent endpoint of ``model``"""
+    return os.getenv('GEMINI_BASE_URL') or \
+        f"{os.getenv('GEMINI_API_ROOT', DEFAULT_API_ROOT).rstrip('/')}/{model}:generateContent"
+
+
+def cost(model: str, usage: Optional[Dict[str, Any]]) -> float:
+    """Estimated USD cost of one call from its usageMetadata"""
+    prompt_price, completion_price = PRICES_PER_MTOKEN.get(model, (0.0, 0.0))
+    usage = usage or {}
+    return (usage.get('promptTokenCount', 0) * prompt_price
+            + usage.get('candidatesTokenCount', 0) * completion_price) / 1_000_000
+
+
+def models() -> Dict[str, str]:
+    """Primary model per task, as currently configured"""
+    return {task: route(task).model for task in ROUTES}
@@ -0,0 +1,94 @@
+"""Recover the complete elements of a partial or malformed JSON array.
+
+LLM replies can stop mid-array when they hit maxOutputTokens, or contain
+one broken element among good ones. ``salvage_array`` walks the array an
+element at a time and keeps every element that decodes, skipping malformed
+ones whose extent can still be found, and stops at a truncated tail. The
+caller validates the elements and asks for only the shortfall, instead of
+discarding the whole reply.
+
+Markdown fences and prose around the array are ignored. A reply of bare
+objects with no enclosing array is read as if it had one.
+"""
+import json
+from typing import Any, List, NamedTuple, Optional
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+_CLOSERS = {'{': '}', '[': ']'}
+
+
+class Salvaged(NamedTuple):
+    items: List[Any]
+    # False when the reply ended before the array was closed
+    complete: bool
+    # Malformed elements that were passed over
+    skipped: int
+
+
+def _skip_value(text: str, i: int) -> Optional[int]:
+    """Index just past the (possibly invalid) value starting at ``i``, or None if the text ends inside it"""
+    stack, in_string, escaped = [], False, False
+    for j in range(i, len(text)):
+        char = text[j]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in _CLOSERS:
+            stack.append(_CLOSERS[char])
+        elif char in '}]':
+            if not stack:
+                # End of the enclosing array: a malformed scalar runs up to here
+                return j
+            if stack.pop() != char:
+                return None
+            if not stack:
+                return j + 1
+        elif char == ',' and not stack:
+            return j
+    return None
+
+
+def salvage_array(text: str) -> Salvaged:
+    """Every decodable element of the JSON array in ``text``"""
+    array_start, object_start = text.find('['), text.find('{')
+    if array_start == -1 and object_start == -1:
+        return Salvaged([], False, 0)
+    bare = array_start == -1 or -1 < object_start < array_start
+    if not bare:
+        # Most replies are one well-formed array: decode it whole before walking it
+        array_end = text.rfind(']')
+        try:
+            items = json.loads(text[array_start:array_end + 1])
+        except json.JSONDecodeError:
+            pass
+        else:
+            if isinstance(items, list):
+                return Salvaged(items, True, 0)
+    i = object_start if bare else array_start + 1
+
+    items, skipped = [], 0
+    while True:
+        while i < len(text) and (text[i] in _WHITESPACE or text[i] == ','):
+            i += 1
+        if i >= len(text):
+            return Salvaged(items, bare, skipped)
+        if bare and text[i] != '{':
+            return Salvaged(items, True, skipped)
+        if not bare and text[i] == ']':
+            return Salvaged(items, True, skipped)
+        try:
+            value, i = _decoder.raw_decode(text, i)
+            items.append(value)
+        except json.JSONDecodeError:
+            end = _skip_value(text, i)
+            if end is None:
+                return Salvaged(items, False, skipped)
+            skipped += 1
+            i = end
@@ -0,0 +1,185 @@
+"""Response encoding: fast JSON, negotiated compression and streamed lists.
+
+JSON is encoded with orjson when it is installed, which handles datetime,
+date, UUID and dataclasses natively; the stdlib fallback produces the same
+output. Naive datetimes are treated as UTC and written as ISO 8601.
+
+Bodies of at least RESPONSE_COMPRESSION_MIN_BYTES (default 1024) are
+compressed with brotli (if installed) or gzip, according to the client's
+Accept-Encoding.
+"""
+import dataclasses
+import decimal
+import gzip
+import json
+import os
+import uuid
+import zlib
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MIN_BYTES = int(os.getenv('RESPONSE_COMPRESSION_MIN_BYTES', '1024'))
+COMPRESSIBLE_TYPES = ('application/json', 'text/plain', 'text/html', 'text/csv')
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+STREAM_BATCH_SIZE = 500
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any) -> Any:
+    """Types neither encoder handles on its own (all of them for the stdlib)"""
+    if isinstance(obj, datetime):
+        return (obj if obj.tzinfo else obj.replace(tzinfo=timezone.utc)).isoformat()
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, (decimal.Decimal, uuid.UUID)):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    # e.g. a Mongo ObjectId that slipped through a projection
+    if type(obj).__name__ == 'ObjectId':
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by ``dumps_bytes``; responses are always compact"""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            return json.dumps(obj, default=_default, **kwargs)
+        return dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype=self.mimetype)
+
+
+def stream_json(envelope: Dict[str, Any], key: str, items: Iterable[Any],
+                count_key: Optional[str] = None) -> Iterator[bytes]:
+    """Encode ``{**envelope, key: [*items], count_key: n}`` incrementally.
+
+    Items are encoded in batches as they are consumed, so a large result set
+    (or a database cursor) never has to be materialized as one string."""
+    head = dumps_bytes(envelope)[:-1]
+    yield head + (b',' if envelope else b'') + dumps_bytes(key) + b':['
+
+    count = 0
+    batch = []
+    for item in items:
+        batch.append(dumps_bytes(item))
+        if len(batch) >= STREAM_BATCH_SIZE:
+            yield (b',' if count else b'') + b','.join(batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        yield (b',' if count else b'') + b','.join(batch)
+        count += len(batch)
+
+    tail = b']'
+    if count_key:
+        tail += b',' + dumps_bytes(count_key) + b':' + dumps_bytes(count)
+    yield tail + b'}'
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best supported content coding the client accepts, or None"""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    wildcard = accepted.get('*', 0.0)
+    for coding in (('br', 'gzip') if brotli is not None else ('gzip',)):
+        if accepted.get(coding, wildcard) > 0:
+            return coding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            out = compressor.process(chunk)
+            if out:
+                yield out
+        yield compressor.finish()
+        return
+
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def is_compressible(mimetype: Optional[str]) -> bool:
+    return bool(mimetype) and mimetype.split(';')[0].strip() in COMPRESSIBLE_TYPES
+
+
+def compress_response(response, accept_encoding: Optional[str]):
+    """Flask after_request helper: compress the body in place when worthwhile"""
+    if (response.direct_passthrough or 'Content-Encoding' in response.headers
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or not is_compressible(response.mimetype)):
+        return response
+
+    encoding = negotiate_encoding(accept_encoding)
+    response.vary.add('Accept-Encoding')
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < COMPRESSION_MIN_BYTES:
+            return response
+        response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
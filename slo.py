@@ -0,0 +1,267 @@
+"""Latency budgets and tiered degradation for the AI features.
+
+Every AI feature has a latency budget. When Gemini has not answered within it
+the request is served from the next tier instead of waiting:
+
+    ai        the Gemini result, in time
+    cache     the latest Gemini result for an equivalent request
+    fallback  the deterministic fallback the agents already have
+
+A late Gemini call is not cancelled. It keeps running in the background, and
+when it completes its result is cached for the next equivalent request and
+passed to an optional backfill, e.g. one that replaces a stored fallback path.
+
+The sync app runs Gemini calls on a fixed pool of worker threads with a
+bounded queue. When every worker is busy and the queue is full the call is
+not started at all and the request is served from the cache or fallback tier
+at once, rather than queueing behind calls that will themselves be late.
+
+Environment:
+    SLO_FEEDBACK_MS    answer feedback and recommendations (default 1500)
+    SLO_QUIZ_MS        quiz and pretest question generation (default 3000)
+    SLO_PATH_MS        learning path planning (default 5000)
+    SLO_CACHE_ENTRIES  AI results kept per worker for the cache tier (default 2048)
+    SLO_CACHE_TTL_S    how long a cached AI result may be served (default 3600)
+    SLO_WORKERS        threads running budgeted Gemini calls for the sync app (default 32)
+    SLO_QUEUE          calls that may wait for a free worker before new ones are shed (default 32)
+"""
+import asyncio
+import contextvars
+import copy
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Generic, Hashable, Optional, Set, TypeVar
+
+import metrics
+import tracing
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+TIER_AI = 'ai'
+TIER_CACHE = 'cache'
+TIER_FALLBACK = 'fallback'
+TIERS = (TIER_AI, TIER_CACHE, TIER_FALLBACK)
+
+DEFAULT_BUDGETS_MS = {'feedback': 1500, 'quiz': 3000, 'path': 5000}
+
+
+def budget(feature: str) -> float:
+    """The feature's latency budget in seconds; read on each call so .env files loaded late apply"""
+    return float(os.getenv(f'SLO_{feature.upper()}_MS', DEFAULT_BUDGETS_MS[feature])) / 1000
+
+
+class ResultCache:
+    """Thread-safe LRU of recent AI results, each served for at most ``ttl`` seconds"""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+        # Callers may mutate what they are served (e.g. question ids)
+        return copy.deepcopy(value)
+
+    def put(self, key: Hashable, value: Any) -> None:
+        value = copy.deepcopy(value)
+        with self.lock:
+            self.entries[key] = (time.monotonic(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+
+cache = ResultCache(int(os.getenv('SLO_CACHE_ENTRIES', '2048')), float(os.getenv('SLO_CACHE_TTL_S', '3600')))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+# One slot per call running or queued on the executor
+_slots: Optional[threading.Semaphore] = None
+# Late asyncio tasks and their backfills; the event loop only keeps weak references
+_background: Set[asyncio.Future] = set()
+
+
+class Saturated(Exception):
+    """Every worker is busy and the queue is full, so the call was not started"""
+
+
+def executor() -> ThreadPoolExecutor:
+    global _executor, _slots
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = int(os.getenv('SLO_WORKERS', '32'))
+                _slots = threading.Semaphore(workers + int(os.getenv('SLO_QUEUE', '32')))
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='slo')
+    return _executor
+
+
+@dataclass
+class Served(Generic[T]):
+    """A value together with the tier that produced it"""
+    feature: str
+    value: T
+    tier: str
+    pending: Any = None  # the late Gemini call (Future or asyncio Task) when degraded
+
+    def backfill(self, callback: Callable[[T], Any]) -> None:
+        """Pass the AI result to ``callback`` once the late call completes.
+
+        Register it after storing the degraded value, so the callback always
+        finds something to replace. For async calls ``callback`` is a
+        coroutine function. Does nothing when the AI tier served the request."""
+        if self.pending is None:
+            return
+        if isinstance(self.pending, asyncio.Future):
+            self.pending.add_done_callback(lambda task: _run_async_backfill(self.feature, task, callback))
+        else:
+            context = contextvars.copy_context()
+            self.pending.add_done_callback(lambda future: context.run(_run_backfill, self.feature, future, callback))
+
+
+def within_budget(feature: str, key: Optional[Hashable], ai: Callable[[], T],
+                  fallback: Callable[[], T], timeout: Optional[float] = None) -> Served[T]:
+    """Run ``ai`` in a worker thread and serve a degraded tier if it is late or fails.
+
+    ``key`` identifies equivalent requests for the cache tier (None disables
+    it); ``ai`` must raise rather than fall back on its own."""
+    try:
+        future = start(ai)
+    except Saturated:
+        metrics.record_shed(feature)
+        return _degrade(feature, key, fallback, 'saturated')
+    return resolve(feature, key, future, fallback, timeout)
+
+
+def start(ai: Callable[[], T]) -> Future:
+    """Begin a budgeted call, so several can run while the request waits on them.
+
+    Raises Saturated instead of queueing when the workers and queue are full."""
+    pool = executor()
+    if not _slots.acquire(blocking=False):
+        raise Saturated()
+    return pool.submit(_run_in_slot, contextvars.copy_context(), ai)
+
+
+def _run_in_slot(context: contextvars.Context, ai: Callable[[], T]) -> T:
+    # Freed before the result is set, so a caller woken by it can start another call
+    try:
+        return context.run(ai)
+    finally:
+        _slots.release()
+
+
+def resolve(feature: str, key: Optional[Hashable], future: Future,
+            fallback: Callable[[], T], timeout: Optional[float] = None) -> Served[T]:
+    """Wait for a started call until ``timeout`` (default: the feature's budget)"""
+    try:
+        value = future.result(timeout=budget(feature) if timeout is None else timeout)
+    except FutureTimeout:
+        future.add_done_callback(lambda late: _remember_late(feature, key, late))
+        return _degrade(feature, key, fallback, 'timeout', future)
+    except Exception as e:
+        logger.warning("⚠️ %s generation failed: %s", feature, e)
+        return _degrade(feature, key, fallback, 'error')
+    return _served_by_ai(feature, key, value)
+
+
+async def awithin_budget(feature: str, key: Optional[Hashable], ai: Callable[[], Awaitable[T]],
+                         fallback: Callable[[], T]) -> Served[T]:
+    """Async variant of within_budget; ``ai`` is a coroutine function"""
+    task = asyncio.ensure_future(ai())
+    try:
+        # shield: on timeout the call carries on in the background
+        value = await asyncio.wait_for(asyncio.shield(task), budget(feature))
+    except asyncio.TimeoutError:
+        _background.add(task)
+        task.add_done_callback(_background.discard)
+        task.add_done_callback(lambda late: _remember_late(feature, key, late))
+        return _degrade(feature, key, fallback, 'timeout', task)
+    except Exception as e:
+        logger.warning("⚠️ %s generation failed: %s", feature, e)
+        return _degrade(feature, key, fallback, 'error')
+    return _served_by_ai(feature, key, value)
+
+
+def _served_by_ai(feature: str, key: Optional[Hashable], value: T) -> Served[T]:
+    if key is not None:
+        cache.put((feature, key), value)
+    metrics.record_served_tier(feature, TIER_AI)
+    return Served(feature, value, TIER_AI)
+
+
+def _degrade(feature: str, key: Optional[Hashable], fallback: Callable[[], T],
+             reason: str, pending: Any = None) -> Served[T]:
+    cached = cache.get((feature, key)) if key is not None else None
+    if cached is not None:
+        value, tier = cached, TIER_CACHE
+    else:
+        value, tier = fallback(), TIER_FALLBACK
+    logger.info("⏱️ %s served from %s (%s)", feature, tier, reason)
+    metrics.record_served_tier(feature, tier)
+    tracing.set_attributes({f'slo.{feature}.tier': tier, f'slo.{feature}.reason': reason})
+    return Served(feature, value, tier, pending)
+
+
+def _late_result(late) -> Optional[Any]:
+    if late.cancelled() or late.exception() is not None:
+        return None
+    return late.result()
+
+
+def _remember_late(feature: str, key: Optional[Hashable], late) -> None:
+    value = _late_result(late)
+    metrics.record_late_result(feature, 'failed' if value is None else 'completed')
+    if value is not None and key is not None:
+        cache.put((feature, key), value)
+
+
+def _run_backfill(feature: str, late: Future, callback: Callable[[T], Any]) -> None:
+    value = _late_result(late)
+    if value is None:
+        return
+    try:
+        callback(value)
+        metrics.record_late_result(feature, 'backfilled')
+    except Exception as e:
+        logger.error("❌ Backfilling %s failed: %s", feature, e)
+        metrics.record_late_result(feature, 'backfill_failed')
+
+
+def _run_async_backfill(feature: str, late: asyncio.Future, callback: Callable[[T], Awaitable]) -> None:
+    value = _late_result(late)
+    if value is None:
+        return
+
+    async def store():
+        try:
+            await callback(value)
+            metrics.record_late_result(feature, 'backfilled')
+        except Exception as e:
+            logger.error("❌ Backfilling %s failed: %s", feature, e)
+            metrics.record_late_result(feature, 'backfill_failed')
+
+    task = asyncio.ensure_future(store())
+    _background.add(task)
+    task.add_done_callback(_background.discard)
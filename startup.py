@@ -0,0 +1,104 @@
+"""Lazy construction of process-wide objects and a startup profile.
+
+Importing the app only defines things; database clients, agents and their
+HTTP clients are built by ``Lazy`` on first use, or up front by an explicit
+warmup. Every import phase and lazy build is recorded in ``profile`` so a
+slow cold start can be attributed.
+
+Environment:
+    COLD_START_BUDGET_MS  import-time budget; exceeding it logs a warning (default 1000)
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+COLD_START_BUDGET_MS = float(os.getenv('COLD_START_BUDGET_MS', '1000'))
+
+
+class StartupProfile:
+    """Named durations of the phases that make up a worker's start"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.last_mark = self.started
+        self.steps: List[Tuple[str, float]] = []
+        self.lock = threading.Lock()
+
+    def mark(self, name: str) -> float:
+        """Record the time since the previous mark under ``name``"""
+        now = time.perf_counter()
+        with self.lock:
+            duration = now - self.last_mark
+            self.steps.append((name, duration))
+            self.last_mark = now
+        return duration
+
+    @contextmanager
+    def step(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.steps.append((name, time.perf_counter() - started))
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def report(self) -> Dict[str, Any]:
+        with self.lock:
+            steps = [{'step': name, 'ms': round(seconds * 1000, 2)} for name, seconds in self.steps]
+        return {'budget_ms': COLD_START_BUDGET_MS, 'steps': steps}
+
+    def check_budget(self, phase: str) -> float:
+        """Log the time since the profile started against the cold-start budget"""
+        elapsed = self.elapsed_ms()
+        if elapsed > COLD_START_BUDGET_MS:
+            logger.warning("⚠️ %s took %.0fms, over the %.0fms cold-start budget", phase, elapsed,
+                           COLD_START_BUDGET_MS, extra={'startup': self.report()['steps']})
+        else:
+            logger.info("🚀 %s in %.0fms (budget %.0fms)", phase, elapsed, COLD_START_BUDGET_MS)
+        return elapsed
+
+
+profile = StartupProfile()
+
+
+class Lazy:
+    """Proxy that builds its target on first attribute access.
+
+    Module-level names (``storage``, ``orchestrator``) keep working unchanged
+    while the objects behind them are created on first use, once, even under
+    concurrent first requests."""
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        self._name = name
+        self._factory = factory
+        self._target = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        target = self._target
+        if target is None:
+            with self._lock:
+                if self._target is None:
+                    with profile.step(f'build {self._name}'):
+                        self._target = self._factory()
+                    logger.debug("🔧 Built %s", self._name)
+                target = self._target
+        return target
+
+    @property
+    def built(self) -> bool:
+        return self._target is not None
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.get(), attr)
+
+    def __repr__(self) -> str:
+        return f"<Lazy {self._name} {'built' if self.built else 'pending'}>"
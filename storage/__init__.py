@@ -0,0 +1,33 @@
+"""Storage backends for the tutor's data.
+
+``STORAGE_BACKEND`` selects the implementation: ``mongo`` (default, uses
+``MONGODB_URI``) or ``memory`` (in-process, persisted to ``STORAGE_SQLITE_PATH``
+when set)."""
+import os
+
+from .base import (
+    Storage, ProfileRepository, PathRepository, ResourceRepository, CatalogStaging,
+    QuizRepository, PretestRepository, QuestionRepository, AttemptRepository, CounterRepository,
+    ANALYTICS_COUNTER, CATALOG_COUNTER
+)
+from .aio import AsyncStorage
+
+
+def create_storage(backend: str = None) -> Storage:
+    backend = (backend or os.getenv('STORAGE_BACKEND', 'mongo')).lower()
+
+    if backend == 'mongo':
+        from .mongo import MongoStorage
+        return MongoStorage(os.getenv('MONGODB_URI', 'mongodb://localhost:27017/'))
+    if backend == 'memory':
+        from .memory import MemoryStorage
+        return MemoryStorage(os.getenv('STORAGE_SQLITE_PATH') or None)
+
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+__all__ = [
+    'create_storage', 'AsyncStorage', 'Storage', 'ProfileRepository', 'PathRepository', 'ResourceRepository',
+    'CatalogStaging', 'QuizRepository', 'PretestRepository', 'QuestionRepository', 'AttemptRepository',
+    'CounterRepository', 'ANALYTICS_COUNTER', 'CATALOG_COUNTER'
+]
@@ -0,0 +1,55 @@
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from .base import Storage
+
+REPOSITORIES = ('profiles', 'paths', 'resources', 'quizzes', 'pretests', 'questions', 'attempts', 'counters')
+
+
+class _AsyncRepository:
+    """Exposes every repository method as a coroutine"""
+
+    def __init__(self, repository, owner: 'AsyncStorage'):
+        self._repository = repository
+        self._owner = owner
+
+    def __getattr__(self, name):
+        method = getattr(self._repository, name)
+
+        async def call(*args, **kwargs):
+            return await self._owner.run(method, *args, **kwargs)
+
+        call.__name__ = name
+        setattr(self, name, call)
+        return call
+
+
+class AsyncStorage:
+    """Awaitable view of a Storage for the async serving mode.
+
+    Backends that block on I/O run on a bounded thread pool (STORAGE_IO_THREADS)
+    so database round-trips never stall the event loop; purely in-process
+    backends are called inline. With ``inline`` every backend is called on the
+    caller's thread, so the coroutines complete without suspending; the sync
+    app uses this to run the same request handlers as the async one."""
+
+    def __init__(self, storage: Storage, max_workers: int = None, inline: bool = False):
+        self.storage = storage
+        self.inline = inline
+        self.max_workers = max_workers or int(os.getenv('STORAGE_IO_THREADS', '32'))
+        self._executor = None
+        for name in REPOSITORIES:
+            setattr(self, name, _AsyncRepository(getattr(storage, name), self))
+
+    async def run(self, fn, *args, **kwargs):
+        if self.inline or not self.storage.blocking_io:
+            return fn(*args, **kwargs)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='storage-io')
+        loop = asyncio.get_running_loop()
+        # Run in a copy of the caller's context so request ids and trace spans follow the call
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._executor, functools.partial(context.run, fn, *args, **kwargs))
@@ -0,0 +1,257 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+# Counters bumped by writes, used as cheap validators for cached responses
+ANALYTICS_COUNTER = 'analytics'
+CATALOG_COUNTER = 'catalog'
+
+
+class CounterRepository(ABC):
+    """Named monotonic counters"""
+
+    @abstractmethod
+    def get(self, name: str) -> int: ...
+
+    @abstractmethod
+    def increment(self, name: str) -> None: ...
+
+
+class ProfileRepository(ABC):
+    """Learner profiles, keyed by learner id"""
+
+    @abstractmethod
+    def insert(self, profile: Dict) -> None: ...
+
+    @abstractmethod
+    def get(self, learner_id: str) -> Optional[Dict]: ...
+
+    @abstractmethod
+    def update(self, learner_id: str, fields: Dict) -> None:
+        """Set fields, bumping the profile's version and updated_at"""
+
+    @abstractmethod
+    def update_with(self, learner_id: str, compute: Callable[[Dict], Dict],
+                    fields: Optional[Sequence[str]] = None) -> Optional[Tuple[Dict, Dict]]:
+        """Set the fields ``compute(profile)`` returns, as if in one step.
+
+        A concurrent write to the profile in between makes the update re-read
+        the profile and recompute, so read-modify-write updates are never
+        lost. ``fields`` limits which profile fields are read. Returns the
+        profile as read and the fields set, or None if there is no profile."""
+
+    @abstractmethod
+    def get_version(self, learner_id: str) -> Optional[Tuple[int, datetime]]:
+        """(version, last modified) without reading the whole profile"""
+
+    @abstractmethod
+    def list_all(self) -> List[Dict]: ...
+
+    @abstractmethod
+    def iter_newest_first(self) -> Iterator[Dict]:
+        """Yield every profile by descending created_at without loading them all at once"""
+
+    @abstractmethod
+    def count(self) -> int: ...
+
+    @abstractmethod
+    def learning_style_distribution(self) -> List[Dict]:
+        """Return [{'_id': learning_style, 'count': n}, ...]"""
+
+
+class PathRepository(ABC):
+    """Learning paths, one per learner"""
+
+    @abstractmethod
+    def insert(self, path: Dict) -> None: ...
+
+    @abstractmethod
+    def get_by_learner(self, learner_id: str) -> Optional[Dict]: ...
+
+    @abstractmethod
+    def get_version(self, learner_id: str) -> Optional[Tuple[int, datetime]]:
+        """(version, updated_at) without reading the whole path"""
+
+    @abstractmethod
+    def get_with_current_resource(self, learner_id: str) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """The path and the resource at its current position, in one read"""
+
+    @abstractmethod
+    def reset_resources(self, learner_id: str, resources: List[str],
+                        expected_version: Optional[int] = None) -> bool:
+        """Replace the path's resources and restart it from the first one.
+
+        With ``expected_version`` the path is only replaced if it has not
+        changed since. Returns whether a path was replaced."""
+
+    @abstractmethod
+    def record_quiz_result(self, learner_id: str, resource_id: str, attempt: Dict,
+                           passed: bool, expected_version: Optional[int] = None) -> Optional[Dict]:
+        """Atomically advance the path and refresh its compact progress summary.
+
+        The position only advances when ``resource_id`` is the resource at the
+        current position. Returns ``{'current_position', 'version'}`` or None if
+        no path matched (including a version mismatch)."""
+
+    @abstractmethod
+    def count(self) -> int: ...
+
+    @abstractmethod
+    def average_completion(self) -> float: ...
+
+
+class CatalogStaging(ABC):
+    """A catalog being loaded off to the side; readers keep seeing the live
+    catalog until ``publish`` swaps it in atomically"""
+
+    @abstractmethod
+    def upsert_batch(self, resources: List[Dict]) -> int: ...
+
+    @abstractmethod
+    def publish(self) -> None: ...
+
+    @abstractmethod
+    def discard(self) -> None: ...
+
+
+class ResourceRepository(ABC):
+    """Learning resource catalog"""
+
+    @abstractmethod
+    def list_all(self) -> List[Dict]: ...
+
+    @abstractmethod
+    def get(self, resource_id: str) -> Optional[Dict]: ...
+
+    @abstractmethod
+    def upsert_batch(self, resources: List[Dict]) -> int:
+        """Insert or replace resources by id in the live catalog"""
+
+    @abstractmethod
+    def begin_load(self) -> CatalogStaging:
+        """Start a full catalog replacement that is published atomically"""
+
+    @abstractmethod
+    def topics(self) -> List[str]: ...
+
+    @abstractmethod
+    def count(self) -> int: ...
+
+
+class QuizRepository(ABC):
+    """Quizzes, which reference questions by id"""
+
+    @abstractmethod
+    def insert(self, quiz: Dict) -> None: ...
+
+    @abstractmethod
+    def get_with_questions(self, quiz_id: str) -> Tuple[Optional[Dict], List[Dict]]:
+        """Return the quiz and its question documents in quiz order"""
+
+    @abstractmethod
+    def count(self) -> int: ...
+
+
+class PretestRepository(ABC):
+    """Pretests, which reference questions by id"""
+
+    @abstractmethod
+    def insert(self, pretest: Dict) -> None: ...
+
+    @abstractmethod
+    def get(self, pretest_id: str) -> Optional[Dict]: ...
+
+    @abstractmethod
+    def record_response(self, pretest_id: str, response: Dict, ability: float, standard_error: float,
+                        next_question_id: Optional[str], answered: int) -> bool:
+        """Append a graded answer to an adaptive pretest and the question to ask next.
+
+        Applies only while the pretest has ``answered`` responses, so a repeated
+        or concurrent answer is rejected (False) rather than recorded twice."""
+
+
+class QuestionRepository(ABC):
+    """Content-addressed question store. Questions with a ``subject`` form
+    that subject's pretest pool; pool items may carry IRT parameters (``irt``)"""
+
+    @abstractmethod
+    def save_many(self, questions: List[Dict]) -> None:
+        """Insert questions whose id is not stored yet. Existing ones keep their content and
+        calibration, but a ``subject`` given now moves them into that subject's pool"""
+
+    @abstractmethod
+    def get_many(self, question_ids: List[str]) -> List[Dict]:
+        """Return the questions for the given ids, in the given order"""
+
+    @abstractmethod
+    def pool(self, subject: str) -> List[Dict]:
+        """Return the pretest pool of a subject"""
+
+    @abstractmethod
+    def set_parameters(self, parameters: Dict[str, Dict]) -> None:
+        """Store calibrated IRT parameters, keyed by question id"""
+
+
+class AttemptRepository(ABC):
+    """Quiz and pretest attempt history. Graded results are never changed;
+    explanations are added to an attempt later, when a learner asks for them"""
+
+    @abstractmethod
+    def insert(self, attempt: Dict) -> None: ...
+
+    @abstractmethod
+    def get(self, attempt_id: str) -> Optional[Dict]: ...
+
+    @abstractmethod
+    def set_question_feedback(self, attempt_id: str, question_id: str, feedback: str) -> None:
+        """Store the explanation for one answered question of an attempt"""
+
+    @abstractmethod
+    def set_recommendation(self, attempt_id: str, recommendation: str) -> None: ...
+
+    @abstractmethod
+    def list_for_learner(self, learner_id: str, resource_id: Optional[str] = None,
+                         before: Optional[datetime] = None, limit: int = 20,
+                         before_id: Optional[str] = None) -> List[Dict]:
+        """Return the newest attempts first, ordered by (timestamp, id), optionally after the
+        page ending at ``before``/``before_id``; without ``before_id`` only older attempts follow"""
+
+    @abstractmethod
+    def iter_by_learner(self) -> Iterator[Dict]:
+        """Every attempt, grouped by learner and oldest first within a learner"""
+
+
+class Storage(ABC):
+    """A storage backend bundling one repository per collection"""
+
+    name: str
+    # Whether calls block on network or disk I/O (see AsyncStorage)
+    blocking_io: bool = True
+    profiles: ProfileRepository
+    paths: PathRepository
+    resources: ResourceRepository
+    quizzes: QuizRepository
+    pretests: PretestRepository
+    questions: QuestionRepository
+    attempts: AttemptRepository
+    counters: CounterRepository
+
+    @abstractmethod
+    def ping(self) -> bool: ...
+
+    @abstractmethod
+    def create_indexes(self) -> None: ...
+
+    def describe(self) -> str:
+        return self.name
+
+
+def order_by_ids(docs: List[Dict], ids: List[str]) -> List[Dict]:
+    by_id = {doc['id']: doc for doc in docs}
+    return [by_id[doc_id] for doc_id in ids if doc_id in by_id]
+
+
+def completion_rate(path: Dict) -> float:
+    total = len(path.get('resources', []))
+    return path.get('current_position', 0) / total * 100 if total else 0
@@ -0,0 +1,479 @@
+import copy
+import json
+import sqlite3
+import threading
+from bisect import insort
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .base import (
+    Storage, ProfileRepository, PathRepository, ResourceRepository, CatalogStaging,
+    QuizRepository, PretestRepository, QuestionRepository, AttemptRepository, CounterRepository,
+    ANALYTICS_COUNTER, CATALOG_COUNTER, order_by_ids, completion_rate
+)
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {'$date': value.isoformat()}
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _decode(obj):
+    if len(obj) == 1 and '$date' in obj:
+        return datetime.fromisoformat(obj['$date'])
+    return obj
+
+
+class _Table:
+    """A keyed document table held in memory, optionally written through to SQLite"""
+
+    def __init__(self, store: 'MemoryStorage', name: str):
+        self.store = store
+        self.name = name
+        self.docs: Dict[str, Dict] = {}
+        if store.conn is not None:
+            store.conn.execute(f'CREATE TABLE IF NOT EXISTS "{name}" (key TEXT PRIMARY KEY, doc TEXT NOT NULL)')
+            for key, doc in store.conn.execute(f'SELECT key, doc FROM "{name}"'):
+                self.docs[key] = json.loads(doc, object_hook=_decode)
+
+    def get(self, key: str) -> Optional[Dict]:
+        doc = self.docs.get(key)
+        return copy.deepcopy(doc) if doc is not None else None
+
+    def put(self, key: str, doc: Dict) -> None:
+        self.docs[key] = doc
+        if self.store.conn is not None:
+            self.store.conn.execute(
+                f'INSERT OR REPLACE INTO "{self.name}" (key, doc) VALUES (?, ?)',
+                (key, json.dumps(doc, default=_encode))
+            )
+            self.store.conn.commit()
+
+    def put_many(self, docs: Dict[str, Dict]) -> None:
+        self.docs.update(docs)
+        if self.store.conn is not None:
+            with self.store.conn:
+                self.store.conn.executemany(
+                    f'INSERT OR REPLACE INTO "{self.name}" (key, doc) VALUES (?, ?)',
+                    [(key, json.dumps(doc, default=_encode)) for key, doc in docs.items()]
+                )
+
+    def replace_all(self, docs: Dict[str, Dict]) -> None:
+        self.docs = docs
+        if self.store.conn is not None:
+            with self.store.conn:
+                self.store.conn.execute(f'DELETE FROM "{self.name}"')
+                self.store.conn.executemany(
+                    f'INSERT INTO "{self.name}" (key, doc) VALUES (?, ?)',
+                    [(key, json.dumps(doc, default=_encode)) for key, doc in docs.items()]
+                )
+
+    def values(self) -> List[Dict]:
+        return [copy.deepcopy(doc) for doc in self.docs.values()]
+
+
+class MemoryCounterRepository(CounterRepository):
+    def __init__(self, store: 'MemoryStorage'):
+        self.lock = store.lock
+        self.table = _Table(store, 'counters')
+
+    def get(self, name: str) -> int:
+        return self.table.docs.get(name, {}).get('value', 0)
+
+    def increment(self, name: str) -> None:
+        with self.lock:
+            self.table.put(name, {'value': self.get(name) + 1})
+
+
+class MemoryProfileRepository(ProfileRepository):
+    def __init__(self, store: 'MemoryStorage'):
+        self.lock = store.lock
+        self.counters = store.counters
+        self.table = _Table(store, 'learner_profiles')
+
+    def insert(self, profile: Dict) -> None:
+        with self.lock:
+            self.table.put(profile['id'], {'version': 0, **copy.deepcopy(profile)})
+            self.counters.increment(ANALYTICS_COUNTER)
+
+    def get(self, learner_id: str) -> Optional[Dict]:
+        with self.lock:
+            return self.table.get(learner_id)
+
+    def update(self, learner_id: str, fields: Dict) -> None:
+        with self.lock:
+            profile = self.table.docs.get(learner_id)
+            if profile is not None:
+                self.table.put(learner_id, {
+                    **profile,
+                    **copy.deepcopy(fields),
+                    'updated_at': datetime.utcnow(),
+                    'version': profile.get('version', 0) + 1
+                })
+
+    def update_with(self, learner_id: str, compute: Callable[[Dict], Dict],
+                    fields: Optional[Sequence[str]] = None) -> Optional[Tuple[Dict, Dict]]:
+        # The store lock makes the read, compute and write one step
+        with self.lock:
+            profile = self.table.get(learner_id)
+            if profile is None:
+                return None
+            update = compute(profile)
+            self.update(learner_id, update)
+            return profile, update
+
+    def get_version(self, learner_id: str) -> Optional[Tuple[int, datetime]]:
+        profile = self.table.docs.get(learner_id)
+        if profile is None:
+            return None
+        return profile.get('version', 0), profile.get('updated_at') or profile.get('created_at')
+
+    def list_all(self) -> List[Dict]:
+        with self.lock:
+            return self.table.values()
+
+    def iter_newest_first(self) -> Iterator[Dict]:
+        with self.lock:
+            profiles = self.table.values()
+        profiles.sort(key=lambda p: p.get('created_at') or datetime.min, reverse=True)
+        return iter(profiles)
+
+    def count(self) -> int:
+        return len(self.table.docs)
+
+    def learning_style_distribution(self) -> List[Dict]:
+        with self.lock:
+            counts = Counter(p.get('learning_style') for p in self.table.docs.values())
+        return [{'_id': style, 'count': count} for style, count in counts.items()]
+
+
+class MemoryPathRepository(PathRepository):
+    def __init__(self, store: 'MemoryStorage'):
+        self.lock = store.lock
+        self.store = store
+        self.counters = store.counters
+        self.table = _Table(store, 'learning_paths')
+
+    def insert(self, path: Dict) -> None:
+        with self.lock:
+            self.table.put(path['learner_id'], {'version': 0, **copy.deepcopy(path)})
+            self.counters.increment(ANALYTICS_COUNTER)
+
+    def get_by_learner(self, learner_id: str) -> Optional[Dict]:
+        with self.lock:
+            return self.table.get(learner_id)
+
+    def get_version(self, learner_id: str) -> Optional[Tuple[int, datetime]]:
+        path = self.table.docs.get(learner_id)
+        if path is None:
+            return None
+        return path.get('version', 0), path.get('updated_at')
+
+    def get_with_current_resource(self, learner_id: str) -> Tuple[Optional[Dict], Optional[Dict]]:
+        with self.lock:
+            path = self.table.get(learner_id)
+            if path is None:
+                return None, None
+            position, resources = path['current_position'], path['resources']
+            return path, self.store.resources.get(resources[position]) if position < len(resources) else None
+
+    def reset_resources(self, learner_id: str, resources: List[str],
+                        expected_version: Optional[int] = None) -> bool:
+        with self.lock:
+            path = self.table.docs.get(learner_id)
+            if path is None or (expected_version is not None and path.get('version', 0) != expected_version):
+                return False
+            self.table.put(learner_id, {
+                **path,
+                'resources': list(resources),
+                'current_position': 0,
+                'updated_at': datetime.utcnow(),
+                'version': path.get('version', 0) + 1
+            })
+            self.counters.increment(ANALYTICS_COUNTER)
+            return True
+
+    def record_quiz_result(self, learner_id: str, resource_id: str, attempt: Dict,
+                           passed: bool, expected_version: Optional[int] = None) -> Optional[Dict]:
+        with self.lock:
+            path = self.table.docs.get(learner_id)
+            if path is None or (expected_version is not None and path.get('version', 0) != expected_version):
+                return None
+
+            path = copy.deepcopy(path)
+            resources = path['resources']
+            position = path['current_position']
+            if passed and position < len(resources) and resources[position] == resource_id:
+                position = min(position + 1, len(resources) - 1)
+
+            summary = path.setdefault('progress', {}).get(resource_id, {})
+            path['progress'][resource_id] = {
+                'average_score': attempt['score'],
+                'correct_answers': attempt['correct_answers'],
+                'total_questions': attempt['total_questions'],
+                'last_attempt_at': attempt['timestamp'],
+                'last_attempt_id': attempt['id'],
+                'best_score': max(summary.get('best_score', 0), attempt['score']),
+                'attempts': summary.get('attempts', 0) + 1
+            }
+            path['current_position'] = position
+            path['version'] = path.get('version', 0) + 1
+            path['updated_at'] = attempt['timestamp']
+            self.table.put(learner_id, path)
+            self.counters.increment(ANALYTICS_COUNTER)
+
+            return {'current_position': position, 'version': path['version']}
+
+    def count(self) -> int:
+        return len(self.table.docs)
+
+    def average_completion(self) -> float:
+        with self.lock:
+            rates = [completion_rate(path) for path in self.table.docs.values()]
+        return sum(rates) / len(rates) if rates else 0
+
+
+class MemoryCatalogStaging(CatalogStaging):
+    """Builds the new catalog in a separate dict and swaps it in under the lock"""
+
+    def __init__(self, repository: 'MemoryResourceRepository'):
+        self.repository = repository
+        self.docs: Dict[str, Dict] = {}
+
+    def upsert_batch(self, resources: List[Dict]) -> int:
+        for resource in resources:
+            self.docs[resource['id']] = copy.deepcopy(resource)
+        return len(resources)
+
+    def publish(self) -> None:
+        with self.repository.lock:
+            self.repository.table.replace_all(self.docs)
+            self.repository.counters.increment(CATALOG_COUNTER)
+        self.docs = {}
+
+    def discard(self) -> None:
+        self.docs = {}
+
+
+class MemoryResourceRepository(ResourceRepository):
+    def __init__(self, store: 'MemoryStorage'):
+        self.lock = store.lock
+        self.counters = store.counters
+        self.table = _Table(store, 'learning_resources')
+
+    def list_all(self) -> List[Dict]:
+        with self.lock:
+            return self.table.values()
+
+    def get(self, resource_id: str) -> Optional[Dict]:
+        with self.lock:
+            return self.table.get(resource_id)
+
+    def upsert_batch(self, resources: List[Dict]) -> int:
+        docs = {r['id']: copy.deepcopy(r) for r in resources}
+        with self.lock:
+            self.table.put_many(docs)
+            self.counters.increment(CATALOG_COUNTER)
+        return len(resources)
+
+    def begin_load(self) -> CatalogStaging:
+        return MemoryCatalogStaging(self)
+
+    def topics(self) -> List[str]:
+        with self.lock:
+            return list({r['topic'] for r in self.table.docs.values()})
+
+    def count(self) -> int:
+        return len(self.table.docs)
+
+
+class MemoryQuizRepository(QuizRepository):
+    def __init__(self, store: 'MemoryStorage'):
+        self.lock = store.lock
+        self.store = store
+        self.table = _Table(store, 'quizzes')
+
+    def insert(self, quiz: Dict) -> None:
+        with self.lock:
+            self.table.put(quiz['id'], copy.deepcopy(quiz))
+            self.store.counters.increment(ANALYTICS_COUNTER)
+
+    def get_with_questions(self, quiz_id: str) -> Tuple[Optional[Dict], List[Dict]]:
+        with self.lock:
+            quiz = self.table.get(quiz_id)
+            if quiz is None:
+                return None, []
+            if 'question_ids' not in quiz:
+                return quiz, quiz.get('questions', [])
+            return quiz, self.store.questions.get_many(quiz['question_ids'])
+
+    def count(self) -> int:
+        return len(self.table.docs)
+
+
+class MemoryPretestRepository(PretestRepository):
+    def __init__(self, store: 'MemoryStorage'):
+        self.lock = store.lock
+        self.table = _Table(store, 'pretests')
+
+    def insert(self, pretest: Dict) -> None:
+        with self.lock:
+            self.table.put(pretest['id'], copy.deepcopy(pretest))
+
+    def get(self, pretest_id: str) -> Optional[Dict]:
+        with self.lock:
+            return self.table.get(pretest_id)
+
+    def record_response(self, pretest_id: str, response: Dict, ability: float, standard_error: float,
+                        next_question_id: Optional[str], answered: int) -> bool:
+        with self.lock:
+            pretest = self.table.get(pretest_id)
+            if pretest is None or len(pretest.get('responses', [])) != answered:
+                return False
+            pretest.setdefault('responses', []).append(copy.deepcopy(response))
+            if next_question_id:
+                pretest['question_ids'].append(next_question_id)
+            pretest.update(ability=ability, standard_error=standard_error, finished=next_question_id is None)
+            self.table.put(pretest_id, pretest)
+            return True
+
+
+class MemoryQuestionRepository(QuestionRepository):
+    def __init__(self, store: 'MemoryStorage'):
+        self.lock = store.lock
+        self.table = _Table(store, 'questions')
+        # Pool question ids per subject, standing in for the Mongo index
+        self.by_subject = defaultdict(set)
+        for question in self.table.docs.values():
+            if question.get('subject'):
+                self.by_subject[question['subject']].add(question['id'])
+
+    def save_many(self, questions: List[Dict]) -> None:
+        with self.lock:
+            for question in questions:
+                stored = self.table.docs.get(question['id'])
+                if stored is None:
+                    self.table.put(question['id'], copy.deepcopy(question))
+                elif question.get('subject') and stored.get('subject') != question['subject']:
+                    # A question first stored by a quiz joins the pool once vetted for a subject
+                    self.by_subject.get(stored.get('subject'), set()).discard(question['id'])
+                    self.table.put(question['id'], {**stored, 'subject': question['subject']})
+                else:
+                    continue
+                if question.get('subject'):
+                    self.by_subject[question['subject']].add(question['id'])
+
+    def get_many(self, question_ids: List[str]) -> List[Dict]:
+        with self.lock:
+            docs = [self.table.get(qid) for qid in question_ids if qid in self.table.docs]
+        for doc in docs:
+            doc.pop('created_at', None)
+        return order_by_ids(docs, question_ids)
+
+    def pool(self, subject: str) -> List[Dict]:
+        with self.lock:
+            docs = [self.table.get(question_id) for question_id in sorted(self.by_subject.get(subject, ()))]
+        for doc in docs:
+            doc.pop('created_at', None)
+        return docs
+
+    def set_parameters(self, parameters: Dict[str, Dict]) -> None:
+        with self.lock:
+            updated = {question_id: {**self.table.docs[question_id], 'irt': dict(irt)}
+                       for question_id, irt in parameters.items() if question_id in self.table.docs}
+            self.table.put_many(updated)
+
+
+class MemoryAttemptRepository(AttemptRepository):
+    def __init__(self, store: 'MemoryStorage'):
+        self.lock = store.lock
+        self.table = _Table(store, 'attempts')
+        # (timestamp, id) pairs per learner, oldest first, standing in for the Mongo index
+        self.by_learner = defaultdict(list)
+        for attempt in self.table.docs.values():
+            insort(self.by_learner[attempt['learner_id']], (attempt['timestamp'], attempt['id']))
+
+    def insert(self, attempt: Dict) -> None:
+        with self.lock:
+            self.table.put(attempt['id'], copy.deepcopy(attempt))
+            insort(self.by_learner[attempt['learner_id']], (attempt['timestamp'], attempt['id']))
+
+    def get(self, attempt_id: str) -> Optional[Dict]:
+        with self.lock:
+            return self.table.get(attempt_id)
+
+    def set_question_feedback(self, attempt_id: str, question_id: str, feedback: str) -> None:
+        with self.lock:
+            attempt = self.table.get(attempt_id)
+            if attempt is None:
+                return
+            for response in attempt['responses']:
+                if response['question_id'] == question_id:
+                    response['feedback'] = feedback
+            self.table.put(attempt_id, attempt)
+
+    def set_recommendation(self, attempt_id: str, recommendation: str) -> None:
+        with self.lock:
+            attempt = self.table.get(attempt_id)
+            if attempt is not None:
+                self.table.put(attempt_id, {**attempt, 'recommendation': recommendation})
+
+    def list_for_learner(self, learner_id: str, resource_id: Optional[str] = None,
+                         before: Optional[datetime] = None, limit: int = 20,
+                         before_id: Optional[str] = None) -> List[Dict]:
+        results = []
+        with self.lock:
+            for timestamp, attempt_id in reversed(self.by_learner.get(learner_id, [])):
+                if before and (timestamp, attempt_id) >= (before, before_id or ''):
+                    continue
+                attempt = self.table.docs[attempt_id]
+                if resource_id and attempt.get('resource_id') != resource_id:
+                    continue
+                results.append(copy.deepcopy(attempt))
+                if len(results) >= limit:
+                    break
+        return results
+
+    def iter_by_learner(self) -> Iterator[Dict]:
+        with self.lock:
+            ids = [attempt_id for learner_id in sorted(self.by_learner, key=str)
+                   for _, attempt_id in self.by_learner[learner_id]]
+        for attempt_id in ids:
+            attempt = self.get(attempt_id)
+            if attempt is not None:
+                yield attempt
+
+
+class MemoryStorage(Storage):
+    """In-process storage for benchmarks, tests and single-node deploys.
+
+    Documents live in memory; when ``sqlite_path`` is given every write is also
+    persisted to SQLite and the data is reloaded on startup."""
+
+    name = 'memory'
+
+    def __init__(self, sqlite_path: Optional[str] = None):
+        self.lock = threading.RLock()
+        self.sqlite_path = sqlite_path
+        self.conn = sqlite3.connect(sqlite_path, check_same_thread=False) if sqlite_path else None
+        self.blocking_io = self.conn is not None
+        self.counters = MemoryCounterRepository(self)
+        self.profiles = MemoryProfileRepository(self)
+        self.paths = MemoryPathRepository(self)
+        self.resources = MemoryResourceRepository(self)
+        self.questions = MemoryQuestionRepository(self)
+        self.quizzes = MemoryQuizRepository(self)
+        self.pretests = MemoryPretestRepository(self)
+        self.attempts = MemoryAttemptRepository(self)
+
+    def ping(self) -> bool:
+        return True
+
+    def create_indexes(self) -> None:
+        # Tables are keyed dicts; there is nothing to build
+        pass
+
+    def describe(self) -> str:
+        return f"memory ({self.sqlite_path})" if self.sqlite_path else "memory"
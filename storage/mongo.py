@@ -0,0 +1,430 @@
+import random
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from pymongo import MongoClient, UpdateOne, ReplaceOne, ReturnDocument
+
+from .base import (
+    Storage, ProfileRepository, PathRepository, ResourceRepository, CatalogStaging,
+    QuizRepository, PretestRepository, QuestionRepository, AttemptRepository, CounterRepository,
+    ANALYTICS_COUNTER, CATALOG_COUNTER, order_by_ids
+)
+
+# Conditional profile writes that lose to a concurrent writer this many times in a row give up
+PROFILE_UPDATE_ATTEMPTS = 50
+
+
+class MongoCounterRepository(CounterRepository):
+    def __init__(self, db):
+        self.collection = db.counters
+
+    def get(self, name: str) -> int:
+        doc = self.collection.find_one({'_id': name}, {'value': 1})
+        return doc['value'] if doc else 0
+
+    def increment(self, name: str) -> None:
+        self.collection.update_one({'_id': name}, {'$inc': {'value': 1}}, upsert=True)
+
+
+class MongoProfileRepository(ProfileRepository):
+    def __init__(self, db, counters: CounterRepository):
+        self.collection = db.learner_profiles
+        self.counters = counters
+
+    def insert(self, profile: Dict) -> None:
+        self.collection.insert_one({'version': 0, **profile})
+        self.counters.increment(ANALYTICS_COUNTER)
+
+    def get(self, learner_id: str) -> Optional[Dict]:
+        return self.collection.find_one({'id': learner_id}, {'_id': 0})
+
+    def update(self, learner_id: str, fields: Dict) -> None:
+        self.collection.update_one(
+            {'id': learner_id},
+            {'$set': {**fields, 'updated_at': datetime.utcnow()}, '$inc': {'version': 1}}
+        )
+
+    def update_with(self, learner_id: str, compute: Callable[[Dict], Dict],
+                    fields: Optional[Sequence[str]] = None) -> Optional[Tuple[Dict, Dict]]:
+        projection = {'_id': 0, 'version': 1, **{field: 1 for field in fields}} if fields else {'_id': 0}
+        for attempt in range(PROFILE_UPDATE_ATTEMPTS):
+            profile = self.collection.find_one({'id': learner_id}, projection)
+            if profile is None:
+                return None
+            update = compute(profile)
+            # Write only if nobody else has since; profiles created before versioning have no version field
+            version = profile.get('version')
+            result = self.collection.update_one(
+                {'id': learner_id, 'version': {'$in': [0, None]} if not version else version},
+                {'$set': {**update, 'updated_at': datetime.utcnow()}, '$inc': {'version': 1}}
+            )
+            if result.matched_count:
+                return profile, update
+            # Back off for a random, growing while, so racing writers stop colliding
+            time.sleep(random.uniform(0, 0.001 * 2 ** min(attempt, 6)))
+        raise RuntimeError(f"Profile {learner_id} kept changing during {PROFILE_UPDATE_ATTEMPTS} update attempts")
+
+    def get_version(self, learner_id: str) -> Optional[Tuple[int, datetime]]:
+        doc = self.collection.find_one({'id': learner_id}, {'_id': 0, 'version': 1, 'updated_at': 1, 'created_at': 1})
+        if doc is None:
+            return None
+        return doc.get('version', 0), doc.get('updated_at') or doc.get('created_at')
+
+    def list_all(self) -> List[Dict]:
+        return list(self.collection.find({}, {'_id': 0}))
+
+    def iter_newest_first(self) -> Iterator[Dict]:
+        return self.collection.find({}, {'_id': 0}).sort('created_at', -1).batch_size(500)
+
+    def count(self) -> int:
+        return self.collection.count_documents({})
+
+    def learning_style_distribution(self) -> List[Dict]:
+        return list(self.collection.aggregate([
+            {'$group': {'_id': '$learning_style', 'count': {'$sum': 1}}}
+        ]))
+
+
+class MongoPathRepository(PathRepository):
+    def __init__(self, db, counters: CounterRepository):
+        self.collection = db.learning_paths
+        self.counters = counters
+
+    def insert(self, path: Dict) -> None:
+        self.collection.insert_one({'version': 0, **path})
+        self.counters.increment(ANALYTICS_COUNTER)
+
+    def get_by_learner(self, learner_id: str) -> Optional[Dict]:
+        return self.collection.find_one({'learner_id': learner_id}, {'_id': 0})
+
+    def get_version(self, learner_id: str) -> Optional[Tuple[int, datetime]]:
+        doc = self.collection.find_one({'learner_id': learner_id}, {'_id': 0, 'version': 1, 'updated_at': 1})
+        if doc is None:
+            return None
+        return doc.get('version', 0), doc.get('updated_at')
+
+    def get_with_current_resource(self, learner_id: str) -> Tuple[Optional[Dict], Optional[Dict]]:
+        # Join the catalog so the path and its current resource cost one round-trip
+        docs = list(self.collection.aggregate([
+            {'$match': {'learner_id': learner_id}},
+            {'$limit': 1},
+            {'$addFields': {'current_resource_id': {'$arrayElemAt': ['$resources', '$current_position']}}},
+            {'$lookup': {
+                'from': 'learning_resources',
+                'localField': 'current_resource_id',
+                'foreignField': 'id',
+                'as': 'current_resource'
+            }},
+            {'$project': {'_id': 0, 'current_resource_id': 0, 'current_resource._id': 0}}
+        ]))
+        if not docs:
+            return None, None
+        path = docs[0]
+        resources = path.pop('current_resource', [])
+        return path, resources[0] if resources else None
+
+    def reset_resources(self, learner_id: str, resources: List[str],
+                        expected_version: Optional[int] = None) -> bool:
+        path_filter = {'learner_id': learner_id}
+        if expected_version is not None:
+            path_filter['version'] = {'$in': [0, None]} if expected_version == 0 else expected_version
+        result = self.collection.update_one(
+            path_filter,
+            {'$set': {
+                'resources': resources,
+                'current_position': 0,
+                'updated_at': datetime.utcnow()
+            }, '$inc': {'version': 1}}
+        )
+        if result.matched_count:
+            self.counters.increment(ANALYTICS_COUNTER)
+        return bool(result.matched_count)
+
+    def record_quiz_result(self, learner_id: str, resource_id: str, attempt: Dict,
+                           passed: bool, expected_version: Optional[int] = None) -> Optional[Dict]:
+        path_filter = {'learner_id': learner_id}
+        if expected_version is not None:
+            # Paths created before versioning have no version field
+            path_filter['version'] = {'$in': [0, None]} if expected_version == 0 else expected_version
+
+        path = self.collection.find_one_and_update(
+            path_filter,
+            self._progress_pipeline(resource_id, attempt, passed),
+            projection={'_id': 0, 'current_position': 1, 'version': 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if path is not None:
+            self.counters.increment(ANALYTICS_COUNTER)
+        return path
+
+    @staticmethod
+    def _progress_pipeline(resource_id: str, attempt: Dict, passed: bool) -> List[Dict]:
+        """Aggregation-pipeline update computing the new position and progress summary
+        server-side, so concurrent submissions cannot clobber each other"""
+        prefix = f'progress.{resource_id}'
+        resource = {'$literal': resource_id}
+        at_resource = {'$eq': [{'$arrayElemAt': ['$resources', '$current_position']}, resource]}
+
+        return [{'$set': {
+            'current_position': {'$cond': [
+                {'$and': [passed, at_resource]},
+                {'$min': [{'$add': ['$current_position', 1]}, {'$subtract': [{'$size': '$resources'}, 1]}]},
+                '$current_position'
+            ]},
+            f'{prefix}.average_score': attempt['score'],
+            f'{prefix}.correct_answers': attempt['correct_answers'],
+            f'{prefix}.total_questions': attempt['total_questions'],
+            f'{prefix}.last_attempt_at': attempt['timestamp'],
+            f'{prefix}.last_attempt_id': {'$literal': attempt['id']},
+            f'{prefix}.best_score': {'$max': [{'$ifNull': [f'${prefix}.best_score', 0]}, attempt['score']]},
+            f'{prefix}.attempts': {'$add': [{'$ifNull': [f'${prefix}.attempts', 0]}, 1]},
+            'version': {'$add': [{'$ifNull': ['$version', 0]}, 1]},
+            'updated_at': attempt['timestamp']
+        }}]
+
+    def count(self) -> int:
+        return self.collection.count_documents({})
+
+    def average_completion(self) -> float:
+        result = list(self.collection.aggregate([
+            {'$project': {
+                'completion_rate': {
+                    '$cond': {
+                        'if': {'$eq': [{'$size': '$resources'}, 0]},
+                        'then': 0,
+                        'else': {
+                            '$multiply': [
+                                {'$divide': ['$current_position', {'$size': '$resources'}]},
+                                100
+                            ]
+                        }
+                    }
+                }
+            }},
+            {'$group': {'_id': None, 'avg_completion': {'$avg': '$completion_rate'}}}
+        ]))
+        return result[0]['avg_completion'] if result else 0
+
+
+def _upsert_resources(collection, resources: List[Dict]) -> int:
+    operations = [ReplaceOne({'id': r['id']}, dict(r), upsert=True) for r in resources]
+    if operations:
+        collection.bulk_write(operations, ordered=False)
+    return len(operations)
+
+
+def _create_resource_indexes(collection) -> None:
+    collection.create_index("id", unique=True)
+    collection.create_index("topic")
+    collection.create_index("learning_style")
+    collection.create_index("difficulty_level")
+
+
+class MongoCatalogStaging(CatalogStaging):
+    """Loads into a staging collection that replaces the live one via renameCollection"""
+
+    def __init__(self, db, target: str, counters: CounterRepository):
+        self.target = target
+        self.counters = counters
+        self.collection = db[f'{target}_staging_{uuid.uuid4().hex[:8]}']
+        self.collection.create_index("id", unique=True)
+
+    def upsert_batch(self, resources: List[Dict]) -> int:
+        return _upsert_resources(self.collection, resources)
+
+    def publish(self) -> None:
+        _create_resource_indexes(self.collection)
+        self.collection.rename(self.target, dropTarget=True)
+        self.counters.increment(CATALOG_COUNTER)
+
+    def discard(self) -> None:
+        self.collection.drop()
+
+
+class MongoResourceRepository(ResourceRepository):
+    def __init__(self, db, counters: CounterRepository):
+        self.db = db
+        self.collection = db.learning_resources
+        self.counters = counters
+
+    def list_all(self) -> List[Dict]:
+        return list(self.collection.find({}, {'_id': 0}))
+
+    def get(self, resource_id: str) -> Optional[Dict]:
+        return self.collection.find_one({'id': resource_id}, {'_id': 0})
+
+    def upsert_batch(self, resources: List[Dict]) -> int:
+        count = _upsert_resources(self.collection, resources)
+        self.counters.increment(CATALOG_COUNTER)
+        return count
+
+    def begin_load(self) -> CatalogStaging:
+        return MongoCatalogStaging(self.db, self.collection.name, self.counters)
+
+    def topics(self) -> List[str]:
+        return self.collection.distinct('topic')
+
+    def count(self) -> int:
+        return self.collection.count_documents({})
+
+
+class MongoQuizRepository(QuizRepository):
+    def __init__(self, db, counters: CounterRepository):
+        self.collection = db.quizzes
+        self.counters = counters
+
+    def insert(self, quiz: Dict) -> None:
+        self.collection.insert_one(dict(quiz))
+        self.counters.increment(ANALYTICS_COUNTER)
+
+    def get_with_questions(self, quiz_id: str) -> Tuple[Optional[Dict], List[Dict]]:
+        # Join the question store so the quiz and its questions cost one round-trip
+        docs = list(self.collection.aggregate([
+            {'$match': {'id': quiz_id}},
+            {'$limit': 1},
+            {'$lookup': {
+                'from': 'questions',
+                'localField': 'question_ids',
+                'foreignField': 'id',
+                'as': 'question_docs'
+            }},
+            {'$project': {'_id': 0, 'question_docs._id': 0, 'question_docs.created_at': 0}}
+        ]))
+        if not docs:
+            return None, []
+
+        quiz = docs[0]
+        question_docs = quiz.pop('question_docs', [])
+        if 'question_ids' not in quiz:
+            # Quizzes created before question normalization embed full questions
+            return quiz, quiz.get('questions', [])
+        return quiz, order_by_ids(question_docs, quiz['question_ids'])
+
+    def count(self) -> int:
+        return self.collection.count_documents({})
+
+
+class MongoPretestRepository(PretestRepository):
+    def __init__(self, db):
+        self.collection = db.pretests
+
+    def insert(self, pretest: Dict) -> None:
+        self.collection.insert_one(dict(pretest))
+
+    def get(self, pretest_id: str) -> Optional[Dict]:
+        return self.collection.find_one({'id': pretest_id}, {'_id': 0})
+
+    def record_response(self, pretest_id: str, response: Dict, ability: float, standard_error: float,
+                        next_question_id: Optional[str], answered: int) -> bool:
+        update = {
+            '$push': {'responses': response},
+            '$set': {'ability': ability, 'standard_error': standard_error, 'finished': next_question_id is None}
+        }
+        if next_question_id:
+            update['$push']['question_ids'] = next_question_id
+        result = self.collection.update_one({'id': pretest_id, 'responses': {'$size': answered}}, update)
+        return result.modified_count == 1
+
+
+class MongoQuestionRepository(QuestionRepository):
+    def __init__(self, db):
+        self.collection = db.questions
+
+    def save_many(self, questions: List[Dict]) -> None:
+        operations = []
+        for q in questions:
+            update = {'$setOnInsert': {key: value for key, value in q.items() if key != 'subject'}}
+            if q.get('subject'):
+                # A question first stored by a quiz joins the pool once vetted for a subject
+                update['$set'] = {'subject': q['subject']}
+            operations.append(UpdateOne({'id': q['id']}, update, upsert=True))
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
+
+    def get_many(self, question_ids: List[str]) -> List[Dict]:
+        docs = self.collection.find({'id': {'$in': question_ids}}, {'_id': 0, 'created_at': 0})
+        return order_by_ids(list(docs), question_ids)
+
+    def pool(self, subject: str) -> List[Dict]:
+        return list(self.collection.find({'subject': subject}, {'_id': 0, 'created_at': 0}))
+
+    def set_parameters(self, parameters: Dict[str, Dict]) -> None:
+        operations = [UpdateOne({'id': question_id}, {'$set': {'irt': irt}}) for question_id, irt in parameters.items()]
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
+
+
+class MongoAttemptRepository(AttemptRepository):
+    def __init__(self, db):
+        self.collection = db.attempts
+
+    def insert(self, attempt: Dict) -> None:
+        self.collection.insert_one(dict(attempt))
+
+    def get(self, attempt_id: str) -> Optional[Dict]:
+        return self.collection.find_one({'id': attempt_id}, {'_id': 0})
+
+    def set_question_feedback(self, attempt_id: str, question_id: str, feedback: str) -> None:
+        self.collection.update_one(
+            {'id': attempt_id, 'responses.question_id': question_id},
+            {'$set': {'responses.$.feedback': feedback}}
+        )
+
+    def set_recommendation(self, attempt_id: str, recommendation: str) -> None:
+        self.collection.update_one({'id': attempt_id}, {'$set': {'recommendation': recommendation}})
+
+    def list_for_learner(self, learner_id: str, resource_id: Optional[str] = None,
+                         before: Optional[datetime] = None, limit: int = 20,
+                         before_id: Optional[str] = None) -> List[Dict]:
+        query = {'learner_id': learner_id}
+        if resource_id:
+            query['resource_id'] = resource_id
+        if before and before_id:
+            query['$or'] = [{'timestamp': {'$lt': before}}, {'timestamp': before, 'id': {'$lt': before_id}}]
+        elif before:
+            query['timestamp'] = {'$lt': before}
+        return list(self.collection.find(query, {'_id': 0}).sort([('timestamp', -1), ('id', -1)]).limit(limit))
+
+    def iter_by_learner(self) -> Iterator[Dict]:
+        # Walks the (learner_id, timestamp) index
+        return self.collection.find({}, {'_id': 0}).sort([('learner_id', 1), ('timestamp', 1)]).batch_size(500)
+
+
+class MongoStorage(Storage):
+    """Storage backed by a MongoDB database"""
+
+    name = 'mongo'
+
+    def __init__(self, uri: str, database: str = 'personalized_tutor'):
+        self.client = MongoClient(uri)
+        self.db = self.client[database]
+        self.counters = MongoCounterRepository(self.db)
+        self.profiles = MongoProfileRepository(self.db, self.counters)
+        self.paths = MongoPathRepository(self.db, self.counters)
+        self.resources = MongoResourceRepository(self.db, self.counters)
+        self.quizzes = MongoQuizRepository(self.db, self.counters)
+        self.pretests = MongoPretestRepository(self.db)
+        self.questions = MongoQuestionRepository(self.db)
+        self.attempts = MongoAttemptRepository(self.db)
+
+    def ping(self) -> bool:
+        self.db.command('ping')
+        return True
+
+    def create_indexes(self) -> None:
+        _create_resource_indexes(self.db.learning_resources)
+        self.db.questions.create_index("id", unique=True)
+        self.db.questions.create_index("subject")
+        self.db.learner_profiles.create_index("id", unique=True)
+        self.db.learner_profiles.create_index([("created_at", -1)])
+        self.db.learning_paths.create_index("learner_id", unique=True)
+        self.db.quizzes.create_index("id", unique=True)
+        self.db.pretests.create_index("id", unique=True)
+        self.db.attempts.create_index("id", unique=True)
+        self.db.attempts.create_index([("learner_id", 1), ("timestamp", -1), ("id", -1)])
+        self.db.attempts.create_index([("learner_id", 1), ("resource_id", 1), ("timestamp", -1), ("id", -1)])
+
+    def describe(self) -> str:
+        return f"mongo ({self.db.name})"
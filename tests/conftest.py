@@ -0,0 +1,60 @@
+"""Fixtures for the Flask app on the in-memory storage backend.
+
+Tests seed storage directly, use ids unique to the test and make no Gemini calls.
+"""
+import os
+import sys
+import uuid
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ['STORAGE_BACKEND'] = 'memory'
+os.environ.pop('STORAGE_SQLITE_PATH', None)
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+import pytest  # noqa: E402
+
+import app as tutor  # noqa: E402
+
+
+@pytest.fixture
+def storage():
+    return tutor.storage
+
+
+@pytest.fixture
+def client():
+    return tutor.app.test_client()
+
+
+@pytest.fixture
+def learner(storage):
+    """A learner with a three-resource path and a three-question quiz on its first resource"""
+    learner_id = str(uuid.uuid4())
+    resources = [f'res_{uuid.uuid4().hex[:8]}' for _ in range(3)]
+    storage.profiles.insert({
+        'id': learner_id, 'name': 'Test Learner', 'learning_style': 'visual', 'knowledge_level': 2,
+        'subject': 'algebra', 'weak_areas': [], 'created_at': datetime.utcnow()
+    })
+    storage.paths.insert({
+        'id': str(uuid.uuid4()), 'learner_id': learner_id, 'resources': resources,
+        'current_position': 0, 'created_at': datetime.utcnow()
+    })
+    questions = [
+        tutor.QuizQuestion(id='', question=f'{learner_id} question {i}?', options=['a', 'b', 'c', 'd'],
+                           correct_answer='a', topic='equations', difficulty_level=2, resource_id=resources[0])
+        for i in range(3)
+    ]
+    quiz_id = str(uuid.uuid4())
+    storage.quizzes.insert({
+        'id': quiz_id, 'resource_id': resources[0],
+        'question_ids': tutor.save_questions(questions), 'created_at': datetime.utcnow()
+    })
+    return {
+        'id': learner_id,
+        'resources': resources,
+        'quiz_id': quiz_id,
+        'answers': {question.id: question.correct_answer for question in questions}
+    }
@@ -0,0 +1,172 @@
+"""Ability estimates, item selection, fixed forms and the stopping rule of the IRT pretest."""
+import importlib.util
+import os
+import random
+import uuid
+from datetime import datetime
+
+import pytest
+
+import adaptive
+from adaptive import Item
+
+
+def bank(n=30, topics=('equations', 'graphing', 'factoring')):
+    return {f'q{i}': Item(f'q{i}', a=1.0 + (i % 3) * 0.5, b=-2.5 + 5 * i / (n - 1), topic=topics[i % len(topics)])
+            for i in range(n)}
+
+
+def responses(items, correct):
+    return [{'question_id': item_id, 'is_correct': is_correct} for item_id, is_correct in zip(items, correct)]
+
+
+def test_ability_rises_after_a_correct_answer_and_falls_after_a_wrong_one():
+    item = Item('q', a=1.5, b=0.0)
+    prior_mean, prior_se = adaptive.estimate([])
+
+    right, right_se = adaptive.estimate([(item, True)])
+    wrong, wrong_se = adaptive.estimate([(item, False)])
+
+    assert prior_mean == pytest.approx(0, abs=1e-9)
+    assert wrong < prior_mean < right
+    assert right_se < prior_se and wrong_se < prior_se
+
+
+def test_ability_keeps_moving_with_consistent_answers():
+    items = list(bank().values())
+    thetas = [adaptive.estimate([(item, True) for item in items[:n]])[0] for n in range(1, 6)]
+    assert thetas == sorted(thetas)
+
+
+def test_next_item_is_the_most_informative_unused_one_from_the_least_asked_topic():
+    items = bank()
+    administered = {'q0', 'q1'}  # one each of equations and graphing
+
+    chosen = adaptive.next_item(0.0, items.values(), administered)
+
+    factoring = [item for item in items.values() if item.topic == 'factoring']
+    assert chosen.topic == 'factoring'
+    assert chosen == max(factoring, key=lambda item: adaptive.information(0.0, item))
+
+
+def test_next_item_draws_among_the_most_informative_with_a_seeded_rng():
+    items = bank()
+    draws = {adaptive.next_item(1.0, items.values(), set(), adaptive.selection_rng(f'p{n}', 0)).id for n in range(50)}
+    top = sorted(items.values(), key=lambda item: adaptive.information(1.0, item), reverse=True)
+
+    assert draws <= {item.id for item in top[:adaptive.RANDOMESQUE]}
+    assert adaptive.next_item(1.0, items.values(), set(), adaptive.selection_rng('p', 0)) == \
+        adaptive.next_item(1.0, items.values(), set(), adaptive.selection_rng('p', 0))
+
+
+def test_same_seed_gives_the_same_form():
+    pool = [{'id': f'q{i}', 'topic': ('equations', 'graphing', 'factoring')[i % 3], 'difficulty_level': i % 5 + 1}
+            for i in range(12)]
+
+    form = adaptive.assemble_form(pool, 5, 'pretest-1')
+
+    assert form == adaptive.assemble_form(list(reversed(pool)), 5, 'pretest-1')
+    assert len(form) == 5 and len({doc['id'] for doc in form}) == 5
+    assert {doc['topic'] for doc in form} == {'equations', 'graphing', 'factoring'}
+    assert [doc['difficulty_level'] for doc in form] == sorted(doc['difficulty_level'] for doc in form)
+    assert any(adaptive.assemble_form(pool, 5, f'pretest-{n}') != form for n in range(2, 10))
+
+
+def test_pretest_stops_once_the_standard_error_is_small_enough(monkeypatch):
+    monkeypatch.setenv('PRETEST_TARGET_SE', '0.75')
+    monkeypatch.setenv('PRETEST_MAX_ITEMS', '30')
+    items = bank()
+    rng = random.Random(7)
+    answered = []
+    while True:
+        theta, standard_error, item = adaptive.step(items, answered)
+        if item is None:
+            break
+        answered.append({'question_id': item.id, 'is_correct': rng.random() < adaptive.probability(0.5, item)})
+
+    assert standard_error <= 0.75
+    assert adaptive.min_items() <= len(answered) < 30
+    # One answer fewer had not reached the threshold
+    assert adaptive.estimate([(items[r['question_id']], r['is_correct']) for r in answered[:-1]])[1] > 0.75
+
+
+def test_pretest_stops_at_the_maximum_length(monkeypatch):
+    monkeypatch.setenv('PRETEST_TARGET_SE', '0.01')
+    monkeypatch.setenv('PRETEST_MAX_ITEMS', '4')
+    items = bank()
+
+    answered = responses(['q0', 'q1', 'q2'], [True, False, True])
+    assert adaptive.step(items, answered)[2] is not None
+
+    answered = responses(['q0', 'q1', 'q2', 'q3'], [True, False, True, True])
+    assert adaptive.step(items, answered)[2] is None
+
+
+def test_pretest_asks_the_minimum_even_when_precise(monkeypatch):
+    monkeypatch.setenv('PRETEST_TARGET_SE', '5')
+    monkeypatch.setenv('PRETEST_MIN_ITEMS', '3')
+    items = bank()
+
+    assert adaptive.step(items, responses(['q0', 'q1'], [True, True]))[2] is not None
+    assert adaptive.step(items, responses(['q0', 'q1', 'q2'], [True, True, True]))[2] is None
+
+
+TRUE_ITEMS = {f'c{i}': Item(f'c{i}', a=a, b=b) for i, (a, b) in
+              enumerate([(0.8, -1.5), (1.5, -0.5), (1.2, 0.0), (2.0, 0.5), (1.0, 1.5), (1.6, -1.0)])}
+
+
+def simulate(items, learners, seed=3):
+    """Graded pretests of ``learners`` abilities drawn from the standard normal prior"""
+    rng = random.Random(seed)
+    attempts = []
+    for _ in range(learners):
+        theta = rng.gauss(0, 1)
+        attempts.append([(item_id, rng.random() < adaptive.probability(theta, item)) for item_id, item in items.items()])
+    return attempts
+
+
+def test_calibration_recovers_the_parameters_responses_were_drawn_from():
+    uncalibrated = {item_id: Item(item_id, a=1.0, b=0.0) for item_id in TRUE_ITEMS}
+
+    parameters = adaptive.calibrate(simulate(TRUE_ITEMS, 1000), uncalibrated)
+
+    for item_id, item in TRUE_ITEMS.items():
+        assert parameters[item_id]['a'] == pytest.approx(item.a, abs=0.35)
+        assert parameters[item_id]['b'] == pytest.approx(item.b, abs=0.35)
+        assert parameters[item_id]['c'] == adaptive.GUESSING
+        assert parameters[item_id]['n'] == 1000
+
+
+def test_calibration_leaves_items_with_too_few_responses_alone():
+    attempts = simulate(TRUE_ITEMS, 30)
+    attempts = [[response for response in attempt if response[0] != 'c0' or n < 10] for n, attempt in enumerate(attempts)]
+
+    parameters = adaptive.calibrate(attempts, dict(TRUE_ITEMS), min_responses=20)
+
+    assert 'c0' not in parameters
+    assert set(parameters) == set(TRUE_ITEMS) - {'c0'}
+
+
+def test_calibrate_items_stores_the_estimates_per_subject(storage, monkeypatch):
+    spec = importlib.util.spec_from_file_location(
+        'calibrate_items', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'calibrate-items.py'))
+    script = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(script)
+    monkeypatch.setattr(script, 'storage', storage)
+
+    subject = f'subject-{uuid.uuid4().hex[:8]}'
+    ids = {item_id: f'{subject}-{item_id}' for item_id in TRUE_ITEMS}
+    storage.questions.save_many([{'id': ids[item_id], 'subject': subject, 'topic': 'equations', 'difficulty_level': 3}
+                                 for item_id in TRUE_ITEMS])
+    for attempt in simulate(TRUE_ITEMS, 300):
+        storage.attempts.insert({
+            'id': str(uuid.uuid4()), 'learner_id': str(uuid.uuid4()), 'kind': 'pretest', 'timestamp': datetime.utcnow(),
+            'responses': [{'question_id': ids[item_id], 'is_correct': correct} for item_id, correct in attempt]
+        })
+
+    stats = script.calibrate_items([subject])
+
+    assert stats == {subject: {'attempts': 300, 'items': 6, 'calibrated': 6}}
+    pool = {doc['id']: doc for doc in storage.questions.pool(subject)}
+    for item_id, item in TRUE_ITEMS.items():
+        assert pool[ids[item_id]]['irt']['b'] == pytest.approx(item.b, abs=0.6)
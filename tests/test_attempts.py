@@ -0,0 +1,33 @@
+"""Attempt history pages on (timestamp, id), whatever form the cursor timestamp takes."""
+import uuid
+from datetime import datetime
+
+
+def insert_attempts(storage, learner, timestamps):
+    for timestamp in timestamps:
+        storage.attempts.insert({'id': str(uuid.uuid4()), 'learner_id': learner['id'],
+                                 'resource_id': learner['resources'][0], 'score': 1.0, 'timestamp': timestamp})
+
+
+def test_pages_split_attempts_sharing_a_timestamp(client, storage, learner):
+    insert_attempts(storage, learner, [datetime(2026, 1, 1, 12)] * 3 + [datetime(2026, 1, 1, 11)] * 2)
+    url = f"/api/learner/{learner['id']}/attempts"
+
+    seen, params = [], {'limit': 2}
+    while True:
+        page = client.get(url, query_string=params).get_json()['data']
+        seen += [attempt['id'] for attempt in page['attempts']]
+        if not page['next_before']:
+            break
+        params = {'limit': 2, 'before': page['next_before'], 'before_id': page['next_before_id']}
+
+    assert len(seen) == len(set(seen)) == 5
+
+
+def test_timezone_aware_cursor_is_read_as_utc(client, storage, learner):
+    insert_attempts(storage, learner, [datetime(2026, 1, 1, 11), datetime(2026, 1, 1, 13)])
+    url = f"/api/learner/{learner['id']}/attempts"
+
+    response = client.get(url, query_string={'before': '2026-01-01T14:00:00+02:00'})
+    assert response.status_code == 200
+    assert [attempt['timestamp'] for attempt in response.get_json()['data']['attempts']] == ['2026-01-01T11:00:00+00:00']
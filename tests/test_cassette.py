@@ -0,0 +1,121 @@
+"""Gemini exchanges recorded to a cassette replay identically and offline."""
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+
+import httpx
+import pytest
+import requests
+
+import app as tutor
+import cassette
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'loadtest'))
+from fake_gemini import FakeGemini  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def no_cassette(monkeypatch):
+    monkeypatch.delenv('GEMINI_BASE_URL', raising=False)
+    monkeypatch.setattr(cassette, '_active', None)
+    monkeypatch.setattr(cassette, '_configured', False)
+
+
+def serve_sync(monkeypatch, fake, latency=0.0):
+    """Answer the sync client's requests.post from ``fake``, after ``latency`` seconds"""
+    def post(url, json=None, **kwargs):
+        time.sleep(latency)
+        status, body = fake.respond(json, url.split('?', 1)[0].rsplit('/', 1)[-1].split(':', 1)[0])
+        response = requests.Response()
+        response.status_code, response._content, response.url = status, _json_bytes(body), url
+        return response
+    monkeypatch.setattr(tutor.requests, 'post', post)
+
+
+def _json_bytes(body):
+    return json.dumps(body).encode('utf-8')
+
+
+def offline(monkeypatch):
+    """Fail any request that reaches the network"""
+    def refuse(*args, **kwargs):
+        raise AssertionError('replay must not reach the network')
+    monkeypatch.setattr(tutor.requests, 'post', refuse)
+
+
+PROMPTS = ['Say hello', 'Say goodbye', 'Say hello']
+
+
+def test_replay_answers_recorded_requests_identically_and_offline(tmp_path, monkeypatch):
+    path = str(tmp_path / 'gemini.jsonl')
+    serve_sync(monkeypatch, FakeGemini(latency_ms=0, seed=1))
+    client = tutor.GeminiClient(api_key='test')
+
+    cassette.use(cassette.Cassette(path, cassette.RECORD))
+    recorded = [client.generate(prompt, task='test') for prompt in PROMPTS]
+    with open(path, encoding='utf-8') as f:
+        assert len(f.readlines()) == len(PROMPTS)
+
+    offline(monkeypatch)
+    cassette.use(cassette.Cassette(path, cassette.REPLAY, latency_scale=0))
+    assert [client.generate(prompt, task='test') for prompt in PROMPTS] == recorded
+
+
+def test_async_replay_matches_the_recording(tmp_path, monkeypatch):
+    path = str(tmp_path / 'gemini.jsonl')
+    serve_sync(monkeypatch, FakeGemini(latency_ms=0, seed=2))
+    client = tutor.GeminiClient(api_key='test')
+    cassette.use(cassette.Cassette(path, cassette.RECORD))
+    recorded = client.generate('Say hello', task='test')
+
+    cassette.use(cassette.Cassette(path, cassette.REPLAY, latency_scale=0))
+
+    async def replay():
+        client._async_client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(599)))
+        try:
+            return await client.agenerate('Say hello', task='test')
+        finally:
+            await client._async_client.aclose()
+            client._async_client = None
+    assert asyncio.run(replay()) == recorded
+
+
+def test_missing_request_serves_the_fallback_tier(tmp_path, monkeypatch):
+    path = tmp_path / 'gemini.jsonl'
+    path.write_text('')
+    offline(monkeypatch)
+    cassette.use(cassette.Cassette(str(path), cassette.REPLAY, latency_scale=0))
+    evaluator = tutor.orchestrator.evaluator_agent
+    summary = {'average_score': 90, 'correct_answers': 5, 'total_questions': 5,
+               'strong_topics': [f'topic-{uuid.uuid4().hex[:8]}'], 'weak_topics': []}
+
+    served = tutor.orchestrator.recommendation(summary)
+
+    assert served.tier == tutor.slo.TIER_FALLBACK
+    assert served.value == evaluator.template_recommendation(summary)
+
+
+def test_latency_scale_from_the_environment_is_honoured(tmp_path, monkeypatch):
+    path = str(tmp_path / 'gemini.jsonl')
+    serve_sync(monkeypatch, FakeGemini(latency_ms=0, seed=3), latency=0.3)
+    client = tutor.GeminiClient(api_key='test')
+    cassette.use(cassette.Cassette(path, cassette.RECORD))
+    client.generate('Say hello', task='test')
+    offline(monkeypatch)
+
+    monkeypatch.setenv('GEMINI_CASSETTE', path)
+    monkeypatch.setenv('GEMINI_CASSETTE_MODE', 'replay')
+    timings = {}
+    for scale in ('1', '0'):
+        monkeypatch.setenv('GEMINI_CASSETTE_LATENCY', scale)
+        monkeypatch.setattr(cassette, '_configured', False)
+        started = time.perf_counter()
+        client.generate('Say hello', task='test')
+        timings[scale] = time.perf_counter() - started
+
+    assert cassette.active().latency_scale == 0
+    assert timings['1'] >= 0.3
+    assert timings['0'] < 0.1
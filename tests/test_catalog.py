@@ -0,0 +1,43 @@
+"""Catalog loads reject bad rows without aborting, and seeding never replaces a live catalog."""
+import json
+
+from catalog import SAMPLE_CATALOG_PATH, load_catalog
+from storage.memory import MemoryStorage
+
+
+def write_catalog(tmp_path, lines):
+    path = tmp_path / 'resources.jsonl'
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return str(path)
+
+
+def sample_lines(count):
+    with open(SAMPLE_CATALOG_PATH, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()][:count]
+
+
+def test_malformed_json_line_is_rejected_and_the_rest_published(tmp_path):
+    storage = MemoryStorage()
+    lines = sample_lines(3)
+    source = write_catalog(tmp_path, lines[:1] + ['{"id": "broken", "title": '] + lines[1:])
+
+    stats = load_catalog(storage, [source])
+
+    assert stats['published']
+    assert stats['loaded'] == 3
+    assert stats['rejected'] == 1
+    assert stats['errors'][0].startswith('resources.jsonl:2: invalid JSON')
+    assert storage.resources.count() == 3
+
+
+def test_seed_refuses_to_replace_a_loaded_catalog(client, storage):
+    if not storage.resources.count():
+        assert client.post('/api/resources/seed').status_code == 200
+    storage.resources.upsert_batch([{**json.loads(sample_lines(1)[0]), 'id': 'kept_resource'}])
+    count = storage.resources.count()
+
+    response = client.post('/api/resources/seed')
+
+    assert response.status_code == 409
+    assert storage.resources.count() == count
+    assert storage.resources.get('kept_resource') is not None
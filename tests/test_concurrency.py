@@ -0,0 +1,77 @@
+"""Many submissions for one learner at once must each be counted exactly once."""
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import app as tutor
+import mastery
+
+THREADS = 20
+ROUNDS = 5
+
+
+def submit_concurrently(learner, threads=THREADS, rounds=ROUNDS, **body):
+    """POST the learner's quiz ``rounds`` times from each of ``threads`` threads released together"""
+    start = threading.Barrier(threads)
+
+    def submit(_):
+        client = tutor.app.test_client()
+        start.wait()
+        return [client.post(f"/api/quiz/{learner['quiz_id']}/submit",
+                            json={'learner_id': learner['id'], 'answers': learner['answers'], **body})
+                for _ in range(rounds)]
+
+    # Switch threads far more often than the default 5ms, so racing steps interleave
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            return [response for responses in pool.map(submit, range(threads)) for response in responses]
+    finally:
+        sys.setswitchinterval(interval)
+
+
+def test_concurrent_submissions_record_every_attempt_and_advance_once(storage, learner):
+    responses = submit_concurrently(learner)
+
+    assert all(response.status_code == 200 for response in responses)
+    attempts = storage.attempts.list_for_learner(learner['id'], limit=len(responses) + 1)
+    assert len(attempts) == len(responses)
+
+    path = storage.paths.get_by_learner(learner['id'])
+    # Only the first passing submission was for the resource at the learner's position
+    assert path['current_position'] == 1
+    assert path['version'] == len(responses)
+    assert path['progress'][learner['resources'][0]]['attempts'] == len(responses)
+    assert sum(response.get_json()['data']['current_position'] == 1 for response in responses) == len(responses)
+
+
+def test_concurrent_submissions_for_one_path_version_apply_once(storage, learner):
+    responses = submit_concurrently(learner, rounds=1, path_version=0)
+
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses == [200] + [409] * (len(responses) - 1)
+    path = storage.paths.get_by_learner(learner['id'])
+    assert path['current_position'] == 1
+    assert path['version'] == 1
+    # Rejected submissions are still graded and kept in the history
+    assert len(storage.attempts.list_for_learner(learner['id'], limit=len(responses) + 1)) == len(responses)
+
+
+def test_concurrent_submissions_keep_every_mastery_answer(storage, learner, monkeypatch):
+    apply_attempt = mastery.apply_attempt
+
+    def slow_apply_attempt(profile, attempt):
+        # A database round trip's worth of time between reading the profile and writing it back
+        time.sleep(0.001)
+        return apply_attempt(profile, attempt)
+
+    monkeypatch.setattr(mastery, 'apply_attempt', slow_apply_attempt)
+    responses = submit_concurrently(learner)
+
+    assert all(response.status_code == 200 for response in responses)
+    profile = storage.profiles.get(learner['id'])
+    answers = sum(answers for _, _, answers in profile['mastery'])
+    assert answers == len(responses) * len(learner['answers'])
+    assert profile['version'] == len(responses)
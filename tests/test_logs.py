@@ -0,0 +1,32 @@
+"""Records keep their exception through the logging queue."""
+import json
+import logging
+import queue
+
+import logs
+
+
+def enqueued_exception():
+    log_queue = queue.SimpleQueue()
+    logger = logging.getLogger('tests.logs')
+    logger.propagate = False
+    logger.handlers = [logs.StructuredQueueHandler(log_queue)]
+    try:
+        raise ValueError('boom')
+    except ValueError:
+        logger.exception("Failed on %s", 'purpose')
+    return log_queue.get_nowait()
+
+
+def test_json_records_carry_the_traceback_apart_from_the_message():
+    entry = json.loads(logs.JsonFormatter().format(enqueued_exception()))
+
+    assert entry['message'] == 'Failed on purpose'
+    assert 'ValueError: boom' in entry['exc_info']
+
+
+def test_text_records_still_end_with_the_traceback():
+    line = logging.Formatter('%(levelname)s %(message)s').format(enqueued_exception())
+
+    assert line.startswith('ERROR Failed on purpose\nTraceback')
+    assert line.endswith('ValueError: boom')
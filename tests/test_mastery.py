@@ -0,0 +1,88 @@
+"""Elo topic ratings, the weak areas derived from them and their replay from history."""
+import importlib.util
+import math
+import os
+
+import pytest
+
+import mastery
+from storage.memory import MemoryStorage
+
+
+def answers(*graded):
+    """An attempt of (topic, difficulty, correct) answers"""
+    return {'responses': [{'topic': topic, 'difficulty': difficulty, 'is_correct': correct}
+                          for topic, difficulty, correct in graded]}
+
+
+def test_first_answer_moves_the_rating_by_k_times_the_surprise():
+    right, wrong = mastery.Mastery(), mastery.Mastery()
+    right.observe('Equations', 3, True)
+    wrong.observe('equations', 3, False)
+
+    # Even odds at the middle difficulty, so the surprise is 0.5
+    assert right.topics == {'equations': [pytest.approx(mastery.INITIAL_K * 0.5), 1]}
+    assert wrong.topics == {'equations': [pytest.approx(-mastery.INITIAL_K * 0.5), 1]}
+
+
+def test_surprising_answers_move_the_rating_further():
+    hard, easy = mastery.Mastery(), mastery.Mastery()
+    hard.observe('equations', 5, True)
+    easy.observe('equations', 1, True)
+
+    assert hard.topics['equations'][0] > easy.topics['equations'][0] > 0
+
+
+def test_k_shrinks_as_a_topic_collects_answers():
+    state = mastery.Mastery({'equations': [0.0, 3]})
+    state.observe('equations', 3, True)
+
+    assert state.topics['equations'] == [pytest.approx(mastery.INITIAL_K / math.sqrt(4) * 0.5), 4]
+
+
+def test_weak_areas_are_the_likely_misses_weakest_first():
+    state = mastery.Mastery({'graphing': [-0.5, 4], 'radicals': [-2.0, 4], 'factoring': [1.0, 4],
+                             'equations': [-1.0, 4], 'unanswered': [-3.0, 0]})
+
+    assert state.weak_areas() == ['radicals', 'equations', 'graphing']
+    assert state.weak_areas(limit=2) == ['radicals', 'equations']
+
+
+def test_knowledge_level_follows_the_answer_weighted_rating():
+    assert mastery.Mastery().knowledge_level(default=2) == 2
+    assert mastery.Mastery({'equations': [1.0, 3], 'graphing': [-1.0, 1]}).knowledge_level() == 4
+    assert mastery.Mastery({'equations': [9.0, 1]}).knowledge_level() == mastery.MAX_LEVEL
+
+
+def test_apply_attempt_adds_to_the_stored_state():
+    profile = {'mastery': [['equations', 0.75, 1]], 'knowledge_level': 3}
+
+    fields = mastery.apply_attempt(profile, answers(('equations', 3, False), ('graphing', 3, False)))
+
+    rows = {topic: (rating, n) for topic, rating, n in fields['mastery']}
+    assert rows['equations'][1] == 2 and rows['equations'][0] < 0.75
+    assert rows['graphing'][1] == 1
+    assert fields['weak_areas'] == ['graphing', 'equations']
+
+
+def test_rebuild_replays_to_the_mastery_applied_live(client, storage, learner):
+    quiz_url = f"/api/quiz/{learner['quiz_id']}/submit"
+    wrong = {question_id: 'b' for question_id in learner['answers']}
+    for submitted in (learner['answers'], wrong, learner['answers']):
+        assert client.post(quiz_url, json={'learner_id': learner['id'], 'answers': submitted}).status_code == 200
+    live = storage.profiles.get(learner['id'])
+
+    spec = importlib.util.spec_from_file_location(
+        'rebuild_mastery', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'rebuild-mastery.py'))
+    script = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(script)
+    script.storage = rebuilt = MemoryStorage()
+    rebuilt.profiles.insert({key: value for key, value in live.items() if key not in ('mastery', 'weak_areas')})
+    for attempt in reversed(storage.attempts.list_for_learner(learner['id'])):
+        rebuilt.attempts.insert(attempt)
+
+    assert script.rebuild_mastery() == {'learners': 1, 'attempts': 3, 'updated': 1}
+    replayed = rebuilt.profiles.get(learner['id'])
+    assert replayed['mastery'] == live['mastery']
+    assert replayed['weak_areas'] == live['weak_areas']
+    assert replayed['knowledge_level'] == live['knowledge_level']
@@ -0,0 +1,24 @@
+"""Questions are stored once, and a stored quiz question can still join a pretest pool."""
+import uuid
+
+import app as tutor
+
+
+def question(text):
+    return tutor.QuizQuestion(id='', question=text, options=['a', 'b', 'c', 'd'], correct_answer='a',
+                              topic='equations', difficulty_level=2, resource_id='res_pool',
+                              explanations=['yes', 'no', 'no', 'no'])
+
+
+def test_quiz_question_joins_the_pool_when_later_vetted_for_a_subject(storage):
+    subject = f'subject-{uuid.uuid4().hex[:8]}'
+    text = f'{subject}: what is x if x + 1 = 2?'
+    [question_id] = tutor.save_questions([question(text)])
+    storage.questions.set_parameters({question_id: {'a': 1.2, 'b': 0.3, 'c': 0.2}})
+    assert storage.questions.pool(subject) == []
+
+    assert tutor.save_questions([question(text)], subject) == [question_id]
+
+    [pooled] = storage.questions.pool(subject)
+    assert pooled['id'] == question_id
+    assert pooled['irt'] == {'a': 1.2, 'b': 0.3, 'c': 0.2}
@@ -0,0 +1,102 @@
+"""Throttled Gemini calls fail over along their route; other failures do not."""
+import asyncio
+import json
+import os
+import sys
+import uuid
+
+import httpx
+import pytest
+import requests
+
+import app as tutor
+import routing
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'loadtest'))
+from fake_gemini import FakeGemini  # noqa: E402
+
+
+class RecordingGemini(FakeGemini):
+    """The fake Gemini server, remembering which model each request went to"""
+
+    def __init__(self, **kwargs):
+        super().__init__(latency_ms=0, seed=1, **kwargs)
+        self.models = []
+
+    def respond(self, payload, model='fake'):
+        self.models.append(model)
+        return super().respond(payload, model)
+
+
+@pytest.fixture(autouse=True)
+def routed(monkeypatch):
+    monkeypatch.delenv('GEMINI_BASE_URL', raising=False)
+    for task in ('test', 'feedback'):
+        monkeypatch.delenv(f'GEMINI_MODEL_{task.upper()}', raising=False)
+        monkeypatch.delenv(f'GEMINI_FALLBACK_{task.upper()}', raising=False)
+
+
+def serve_sync(monkeypatch, fake):
+    """Answer the sync client's requests.post from ``fake``"""
+    def post(url, json=None, **kwargs):
+        model = url.split('?', 1)[0].rsplit('/', 1)[-1].split(':', 1)[0]
+        status, body = fake.respond(json, model)
+        response = requests.Response()
+        response.status_code, response._content, response.url = status, _json_bytes(body), url
+        return response
+    monkeypatch.setattr(tutor.requests, 'post', post)
+
+
+def _json_bytes(body):
+    return json.dumps(body).encode('utf-8')
+
+
+def agenerate(client, fake, prompt, task):
+    async def call():
+        client._async_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake))
+        try:
+            return await client.agenerate(prompt, task=task)
+        finally:
+            await client._async_client.aclose()
+            client._async_client = None
+    return asyncio.run(call())
+
+
+def test_throttled_primary_fails_over_to_the_next_model(monkeypatch):
+    route = routing.route('test')
+    fake = RecordingGemini(rate_limit_rate=1.0, rate_limit_models=[route.model])
+    serve_sync(monkeypatch, fake)
+    client = tutor.GeminiClient(api_key='test')
+
+    assert client.generate('Say hello', task='test')
+    assert agenerate(client, fake, 'Say hello', 'test')
+    assert fake.models == [route.model, route.fallback] * 2
+
+
+def test_every_model_throttled_serves_the_fallback_tier(monkeypatch):
+    fake = RecordingGemini(rate_limit_rate=1.0)
+    evaluator = tutor.orchestrator.evaluator_agent
+    summary = {'average_score': 40, 'correct_answers': 2, 'total_questions': 5,
+               'strong_topics': [f'topic-{uuid.uuid4().hex[:8]}'], 'weak_topics': ['graphing']}
+
+    async def recommend():
+        monkeypatch.setattr(evaluator.gemini, '_async_client', httpx.AsyncClient(transport=httpx.ASGITransport(app=fake)))
+        return await tutor.orchestrator.arecommendation(summary)
+    served = asyncio.run(recommend())
+
+    assert served.tier == tutor.slo.TIER_FALLBACK
+    assert served.value == evaluator.template_recommendation(summary)
+    assert fake.models == list(routing.route('recommendation').models)
+
+
+def test_server_errors_do_not_fail_over(monkeypatch):
+    route = routing.route('test')
+    fake = RecordingGemini(error_rate=1.0)
+    serve_sync(monkeypatch, fake)
+    client = tutor.GeminiClient(api_key='test')
+
+    with pytest.raises(Exception, match='500'):
+        client.generate('Say hello', task='test')
+    with pytest.raises(Exception, match='500'):
+        agenerate(client, fake, 'Say hello', 'test')
+    assert fake.models == [route.model, route.model]
@@ -0,0 +1,38 @@
+"""Complete elements are recovered from partial, fenced or malformed JSON replies."""
+from salvage import Salvaged, salvage_array
+
+
+def test_whole_array_is_complete():
+    assert salvage_array('[{"a": 1}, {"a": 2}]') == Salvaged([{'a': 1}, {'a': 2}], True, 0)
+
+
+def test_truncated_array_keeps_the_elements_before_the_cut():
+    assert salvage_array('[{"a": 1}, {"a": 2}, {"a": 3, "b": "unfinis') == Salvaged([{'a': 1}, {'a': 2}], False, 0)
+
+
+def test_array_missing_its_closing_bracket_is_incomplete():
+    assert salvage_array('[{"a": 1}, {"a": 2}') == Salvaged([{'a': 1}, {'a': 2}], False, 0)
+
+
+def test_malformed_element_is_skipped():
+    assert salvage_array('[{"a": 1}, {"a": oops}, {"a": 3}]') == Salvaged([{'a': 1}, {'a': 3}], True, 1)
+
+
+def test_bare_object_reads_as_a_one_element_array():
+    assert salvage_array('{"question": "x?", "options": ["a", "b"]}') == Salvaged(
+        [{'question': 'x?', 'options': ['a', 'b']}], True, 0)
+
+
+def test_bare_objects_stop_at_a_truncated_one():
+    assert salvage_array('{"a": 1}\n{"a": 2}\n{"a": ') == Salvaged([{'a': 1}, {'a': 2}], False, 0)
+
+
+def test_fences_and_prose_around_the_array_are_ignored():
+    reply = 'Here are your questions:\n```json\n[\n  {"a": 1},\n  {"a": [2, 3]}\n]\n```\nAnything else? [citation]'
+    assert salvage_array(reply) == Salvaged([{'a': 1}, {'a': [2, 3]}], True, 0)
+
+
+def test_garbage_salvages_nothing():
+    assert salvage_array('Sorry, I cannot help with that.').items == []
+    assert salvage_array('').items == []
+    assert salvage_array('[not json at all').items == []
@@ -0,0 +1,54 @@
+"""The Flask and ASGI routes run the same TutorService handlers."""
+import asyncio
+
+import httpx
+import pytest
+
+import app as tutor
+import asgi
+
+
+def asgi_post(path, body):
+    async def post():
+        transport = httpx.ASGITransport(app=asgi.application)
+        async with httpx.AsyncClient(transport=transport, base_url='http://tutor') as client:
+            return await client.post(path, json=body)
+    return asyncio.run(post())
+
+
+def test_quiz_submission_is_answered_alike_by_both_apps(client, storage, learner):
+    body = {'learner_id': learner['id'], 'answers': learner['answers']}
+
+    flask_response = client.post(f"/api/quiz/{learner['quiz_id']}/submit", json=body)
+    asgi_response = asgi_post(f"/api/quiz/{learner['quiz_id']}/submit", body)
+
+    assert flask_response.status_code == asgi_response.status_code == 200
+    flask_data, asgi_data = flask_response.get_json()['data'], asgi_response.json()['data']
+    assert flask_data.keys() == asgi_data.keys()
+    assert flask_data['overall_feedback'] == asgi_data['overall_feedback']
+    assert flask_data['current_position'] == asgi_data['current_position'] == 1
+    assert len(storage.attempts.list_for_learner(learner['id'])) == 2
+
+
+def test_missing_quiz_is_a_404_in_both_apps(client, learner):
+    body = {'learner_id': learner['id'], 'answers': {}}
+    assert client.post('/api/quiz/missing/submit', json=body).status_code == 404
+    assert asgi_post('/api/quiz/missing/submit', body).status_code == 404
+
+
+def test_submission_without_a_learner_is_refused_and_not_recorded(client, storage, learner):
+    before = sum(1 for _ in storage.attempts.iter_by_learner())
+
+    response = client.post(f"/api/quiz/{learner['quiz_id']}/submit", json={'answers': learner['answers']})
+
+    assert response.status_code == 400
+    assert asgi_post(f"/api/quiz/{learner['quiz_id']}/submit", {'answers': learner['answers']}).status_code == 400
+    assert sum(1 for _ in storage.attempts.iter_by_learner()) == before
+
+
+def test_run_sync_refuses_a_handler_that_suspends():
+    async def suspends():
+        await asyncio.sleep(0)
+
+    with pytest.raises(RuntimeError):
+        tutor.run_sync(suspends())
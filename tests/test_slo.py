@@ -0,0 +1,38 @@
+"""Budgeted calls are shed to the fallback tier when the worker pool and its queue are full."""
+import threading
+import time
+
+import pytest
+
+import slo
+
+
+@pytest.fixture
+def one_slot(monkeypatch):
+    """An executor with one worker and no queue, replaced by a fresh one afterwards"""
+    monkeypatch.setenv('SLO_WORKERS', '1')
+    monkeypatch.setenv('SLO_QUEUE', '0')
+    monkeypatch.setattr(slo, '_executor', None)
+    monkeypatch.setattr(slo, '_slots', None)
+    yield
+    slo.executor().shutdown(wait=True)
+
+
+def test_saturated_pool_serves_the_fallback_at_once(one_slot):
+    release = threading.Event()
+    busy = slo.start(release.wait)
+    try:
+        started = time.monotonic()
+        served = slo.within_budget('feedback', None, lambda: 'ai', lambda: 'fallback', timeout=5)
+        elapsed = time.monotonic() - started
+    finally:
+        release.set()
+    busy.result(timeout=5)
+
+    assert (served.value, served.tier) == ('fallback', slo.TIER_FALLBACK)
+    assert elapsed < 1
+
+
+def test_slot_is_freed_when_a_call_completes(one_slot):
+    assert slo.within_budget('feedback', None, lambda: 'first', lambda: 'fallback').value == 'first'
+    assert slo.within_budget('feedback', None, lambda: 'second', lambda: 'fallback').value == 'second'
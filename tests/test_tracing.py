@@ -0,0 +1,52 @@
+"""Storage spans cover the work they name, including iteration over a cursor."""
+import time
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip('opentelemetry.sdk')
+from opentelemetry.sdk.trace import TracerProvider  # noqa: E402
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor  # noqa: E402
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter  # noqa: E402
+
+import tracing  # noqa: E402
+from storage.memory import MemoryStorage  # noqa: E402
+
+
+@pytest.fixture
+def spans(monkeypatch):
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(tracing, '_tracer', provider.get_tracer(__name__))
+    return exporter
+
+
+def durations(exporter, name):
+    return [(span.end_time - span.start_time) / 1e9 for span in exporter.get_finished_spans() if span.name == name]
+
+
+def test_iterator_span_lasts_until_the_iterator_is_exhausted(spans):
+    storage = tracing.instrument_storage(MemoryStorage())
+    for n in range(3):
+        storage.profiles.insert({'id': str(n), 'name': 'Learner', 'created_at': datetime.utcnow()})
+
+    profiles = storage.profiles.iter_newest_first()
+    assert durations(spans, 'db.profiles.iter_newest_first') == []
+    for _ in profiles:
+        time.sleep(0.01)
+
+    [duration] = durations(spans, 'db.profiles.iter_newest_first')
+    assert duration >= 0.03
+
+
+def test_iterator_span_ends_when_the_iterator_is_closed_early(spans):
+    storage = tracing.instrument_storage(MemoryStorage())
+    storage.profiles.insert({'id': '1', 'name': 'Learner', 'created_at': datetime.utcnow()})
+
+    profiles = storage.profiles.iter_newest_first()
+    next(profiles)
+    profiles.close()
+
+    [span] = [span for span in spans.get_finished_spans() if span.name == 'db.profiles.iter_newest_first']
+    assert not span.events
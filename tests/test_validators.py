@@ -0,0 +1,37 @@
+"""Path and dashboard revalidation answers 304 from version reads alone."""
+
+
+def resource(resource_id, title):
+    return {'id': resource_id, 'title': title, 'type': 'video', 'content_url': f'https://example.com/{resource_id}',
+            'difficulty_level': 2, 'learning_style': 'visual', 'topic': 'equations', 'prerequisites': []}
+
+
+def unread(*args, **kwargs):
+    raise AssertionError('a 304 must not read the full document')
+
+
+def test_path_revalidation_skips_the_join_until_something_changes(client, storage, learner, monkeypatch):
+    current = learner['resources'][0]
+    storage.resources.upsert_batch([resource(current, 'Current')])
+    url = f"/api/learner/{learner['id']}/path"
+    etag = client.get(url).headers['ETag']
+
+    with monkeypatch.context() as patch:
+        patch.setattr(storage.paths, 'get_with_current_resource', unread)
+        assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+    storage.resources.upsert_batch([resource(current, 'Current, revised')])
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['data']['current_resource']['title'] == 'Current, revised'
+
+
+def test_dashboard_revalidation_skips_the_aggregation_until_a_write(client, learner, storage, monkeypatch):
+    etag = client.get('/api/analytics/dashboard').headers['ETag']
+    with monkeypatch.context() as patch:
+        patch.setattr(storage.profiles, 'count', unread)
+        patch.setattr(storage.paths, 'average_completion', unread)
+        assert client.get('/api/analytics/dashboard', headers={'If-None-Match': etag}).status_code == 304
+
+    client.post(f"/api/quiz/{learner['quiz_id']}/submit", json={'learner_id': learner['id'], 'answers': learner['answers']})
+    assert client.get('/api/analytics/dashboard', headers={'If-None-Match': etag}).status_code == 200
@@ -0,0 +1,226 @@
+"""Span-based request tracing.
+
+Spans follow the OpenTelemetry model and are exported through the
+OpenTelemetry SDK, which is an optional dependency. Tracing is off unless
+TRACE_EXPORTER is set; while it is off ``span()`` returns a no-op context
+manager and nothing is instrumented.
+
+Environment:
+    TRACE_EXPORTER      file, otlp or console (unset disables tracing)
+    TRACE_FILE          output of the file exporter, one JSON span per line (default traces.jsonl)
+    TRACE_SAMPLE_RATIO  fraction of traces recorded (default 1.0)
+
+The otlp exporter needs opentelemetry-exporter-otlp-proto-http and reads the
+standard OTEL_EXPORTER_OTLP_* variables.
+"""
+import contextlib
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from storage.aio import REPOSITORIES
+
+try:
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor, ConsoleSpanExporter, SpanExporter, SpanExportResult
+    )
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+except ImportError:
+    trace = None
+    SpanExporter = object
+
+logger = logging.getLogger(__name__)
+
+_tracer = None
+
+
+class JsonLinesSpanExporter(SpanExporter):
+    """Appends finished spans to a local file, one JSON object per line"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans) -> 'SpanExportResult':
+        lines = ''.join(json.dumps(_span_record(s), default=str) + '\n' for s in spans)
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        pass
+
+
+def _span_record(span) -> Dict[str, Any]:
+    return {
+        'trace_id': format(span.context.trace_id, '032x'),
+        'span_id': format(span.context.span_id, '016x'),
+        'parent_id': format(span.parent.span_id, '016x') if span.parent else None,
+        'name': span.name,
+        'start_ns': span.start_time,
+        'duration_ms': (span.end_time - span.start_time) / 1e6,
+        'status': span.status.status_code.name,
+        'attributes': dict(span.attributes or {}),
+        'events': [{'name': e.name, 'attributes': dict(e.attributes or {})} for e in span.events]
+    }
+
+
+def configure_tracing(service_name: str = 'personalized-tutor') -> None:
+    """Install the exporter selected by TRACE_EXPORTER (idempotent)"""
+    global _tracer
+    if _tracer is not None:
+        return
+
+    exporter_name = os.getenv('TRACE_EXPORTER', '').lower()
+    if not exporter_name:
+        return
+    if trace is None:
+        logger.warning("⚠️ TRACE_EXPORTER=%s but opentelemetry-sdk is not installed, tracing disabled", exporter_name)
+        return
+
+    if exporter_name == 'file':
+        exporter = JsonLinesSpanExporter(os.getenv('TRACE_FILE', 'traces.jsonl'))
+    elif exporter_name == 'console':
+        exporter = ConsoleSpanExporter()
+    elif exporter_name == 'otlp':
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        exporter = OTLPSpanExporter()
+    else:
+        raise ValueError(f"Unknown trace exporter: {exporter_name}")
+
+    ratio = float(os.getenv('TRACE_SAMPLE_RATIO', '1.0'))
+    provider = TracerProvider(
+        resource=Resource.create({'service.name': service_name}),
+        sampler=ParentBased(TraceIdRatioBased(ratio))
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer(__name__)
+    logger.info("🔭 Tracing enabled (exporter=%s, sample_ratio=%s)", exporter_name, ratio)
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+def span(name: str, attributes: Optional[Dict[str, Any]] = None):
+    """Context manager timing a child of the current span"""
+    if _tracer is None:
+        return contextlib.nullcontext()
+    attributes = {k: v for k, v in (attributes or {}).items() if v is not None}
+    return _tracer.start_as_current_span(name, attributes=attributes)
+
+
+def set_attributes(attributes: Dict[str, Any]) -> None:
+    if _tracer is None:
+        return
+    current = trace.get_current_span()
+    for key, value in attributes.items():
+        if value is not None:
+            current.set_attribute(key, value)
+
+
+def record_error(error: BaseException) -> None:
+    """Attach a handled exception to the current span without failing it"""
+    if _tracer is not None:
+        trace.get_current_span().record_exception(error)
+
+
+def current_ids() -> Tuple[Optional[str], Optional[str]]:
+    """Hex trace and span ids of the active span, for log correlation"""
+    if _tracer is None:
+        return None, None
+    context = trace.get_current_span().get_span_context()
+    if not context.is_valid:
+        return None, None
+    return format(context.trace_id, '032x'), format(context.span_id, '016x')
+
+
+def traced(fn: Callable) -> Callable:
+    """Wrap a function or coroutine function in a span named after its qualname"""
+    name = fn.__qualname__
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            with span(name):
+                return await fn(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with span(name):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def _traced_operation(method: Callable, name: str, attributes: Dict[str, Any]) -> Callable:
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with span(name, attributes):
+            return method(*args, **kwargs)
+    return wrapper
+
+
+def _traced_iteration(method: Callable, name: str, attributes: Dict[str, Any]) -> Callable:
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        operation = _tracer.start_span(name, attributes=attributes)
+        try:
+            iterator = iter(method(*args, **kwargs))
+        except Exception as e:
+            _end_failed(operation, e)
+            raise
+        return _until_exhausted(operation, iterator)
+    return wrapper
+
+
+def _until_exhausted(operation, iterator: Iterator) -> Iterator:
+    # Documents are fetched as they are consumed, so the span lasts until the iterator is
+    # exhausted or closed. It is never made current: the consumer's own work runs between items.
+    failed = False
+    try:
+        yield from iterator
+    except Exception as e:
+        failed = True
+        _end_failed(operation, e)
+        raise
+    finally:
+        if not failed:
+            operation.end()
+
+
+def _end_failed(operation, error: BaseException) -> None:
+    operation.record_exception(error)
+    operation.set_status(trace.Status(trace.StatusCode.ERROR, f"{type(error).__name__}: {error}"))
+    operation.end()
+
+
+def instrument_storage(storage):
+    """Give every repository call on ``storage`` its own span.
+
+    Wrapping happens on the repository instances, so the Mongo and memory
+    backends are covered alike. The span of an ``iter_*`` method covers the
+    whole iteration rather than the call that returns the iterator. Returns
+    ``storage`` untouched when tracing is disabled."""
+    if _tracer is None:
+        return storage
+    for repository_name in REPOSITORIES:
+        repository = getattr(storage, repository_name)
+        for attr in dir(repository):
+            method = getattr(repository, attr)
+            if attr.startswith('_') or not callable(method):
+                continue
+            wrap = _traced_iteration if attr.startswith('iter_') else _traced_operation
+            setattr(repository, attr, wrap(
+                method, f'db.{repository_name}.{attr}',
+                {'db.system': storage.name, 'db.operation': attr}
+            ))
+    return storage